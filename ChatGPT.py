@@ -3,11 +3,14 @@ import time
 import json
 import os
 from datetime import datetime
-from openai_client import OpenAIClient
+from openai_client import get_shared_client
+from app_profiling import stage, start_rerun
 
-# Initialize OpenAI Client
-openai_client_obj = OpenAIClient()
-client = openai_client_obj.get_client()
+RETRIEVAL_INDEX_DIR = "retrieval_index"
+RETRIEVAL_TOP_K = 5
+RETRIEVAL_NPROBE = 64  # IVF lists scanned per query, when the index has them
+CACHE_MAX_ENTRIES = 1000
+CACHE_TTL = 24 * 3600  # seconds a cached answer is reused
 
 # Streamlit application setup
 st.set_page_config(
@@ -24,7 +27,28 @@ st.title("GPT Chatbot")
 feedback_dir = os.path.join("model_responses", "feedback")
 os.makedirs(feedback_dir, exist_ok=True)
 
-def generate_response(model, messages, temperature, max_tokens, agent_type="Friendly Chatbot"):
+@st.cache_resource
+def load_retrieval_index(index_dir, version):
+    # Memory-maps the index once per folder and build, and shares it across reruns and sessions
+    # numpy is only imported when retrieval is used
+    from page_retrieval import RetrievalIndex
+    return RetrievalIndex(index_dir)
+
+def get_retrieval_index(index_dir):
+    # A missing index is not cached, so an index built while the app runs is found on the next question,
+    # and the build time is part of the cache key, so a rebuilt index is loaded again
+    meta_path = os.path.join(index_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    return load_retrieval_index(index_dir, os.stat(meta_path).st_mtime_ns)
+
+@st.cache_resource
+def get_response_cache():
+    # One semantic cache of answers per process, shared by all sessions
+    from response_cache import SemanticCache
+    return SemanticCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+
+def generate_response(model, messages, temperature, max_tokens, agent_type="Friendly Chatbot", context=None):
     try:
         prepended_message = {
             "Expert Programmer": "You are an expert programmer.",
@@ -36,14 +60,24 @@ def generate_response(model, messages, temperature, max_tokens, agent_type="Frie
         # Prepend system message according to agent type
         messages.insert(0, {"role": "system", "content": prepended_message})
 
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=max_tokens,
-            n=1,
-            stop=None,
-            temperature=temperature,
-        )
+        # Ground the answer in retrieved passages from crawled pages
+        if context:
+            messages.insert(1, {
+                "role": "system",
+                "content": "Use the following passages from crawled web pages when they are relevant to the "
+                           "question and cite their URLs. If they are not relevant, answer normally.\n\n" + context,
+            })
+
+        # the client is created on the first request, not when the page loads
+        with stage("API call"):
+            response = get_shared_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                n=1,
+                stop=None,
+                temperature=temperature,
+            )
         return response.choices[0].message.content
     except Exception as e:
         st.error(f"An unexpected error occurred: {e}")
@@ -78,6 +112,15 @@ def main():
         # max tokens
         max_tokens = st.text_input("Enter max tokens. ",max_chars=5,value=100,help="Use wisely to manage costs")
 
+        # retrieval over crawled pages (index built with page_retrieval.py)
+        use_retrieval = st.checkbox("Ground answers in crawled pages", value=False)
+        index_dir = st.text_input("Retrieval index folder", value=RETRIEVAL_INDEX_DIR, disabled=not use_retrieval)
+
+        # answers to earlier, similar queries are reused without a model call
+        use_cache = st.checkbox("Reuse answers to similar questions (cache)", value=True)
+        cache_threshold = st.slider("Cache similarity threshold", min_value=0.8, max_value=1.0, step=0.01, value=0.9,
+                                    disabled=not use_cache, help="Higher only reuses answers to closer paraphrases")
+
         # Clear history button
         if st.button("Clear History"):
             st.session_state.user_input = ""
@@ -106,7 +149,34 @@ def main():
                 messages = [{"role": "assistant" if i % 2 else "user", "content": message} for i, message in enumerate(st.session_state.history)]
                 messages.append({"role": "user", "content": st.session_state.user_input})
 
-                st.session_state.response = generate_response(model_selection, messages, creativity_value, int(max_tokens), agent_type)
+                sources = []
+                cached = None
+                # answers are only reused for the same model, agent, retrieval index, max tokens and creativity,
+                # and only for the first question of a conversation: a follow-up answer depends on this
+                # session's history
+                cache_namespace = "|".join([model_selection, agent_type, index_dir if use_retrieval else "",
+                                            str(max_tokens), str(creativity_value)])
+                use_cache_now = use_cache and not st.session_state.history
+                if use_cache_now:
+                    with stage("cache lookup"):
+                        cached = get_response_cache().lookup(st.session_state.user_input, cache_namespace, cache_threshold)
+                if cached:
+                    st.session_state.response = cached["response"]
+                else:
+                    if use_retrieval:
+                        with stage("retrieval"):
+                            index = get_retrieval_index(index_dir)
+                            if index is None:
+                                st.warning(f"No retrieval index found in '{index_dir}'. Build one with page_retrieval.py.")
+                            else:
+                                sources = index.search(st.session_state.user_input, k=RETRIEVAL_TOP_K, nprobe=RETRIEVAL_NPROBE)
+                    if sources:
+                        from page_retrieval import format_passages
+
+                    st.session_state.response = generate_response(model_selection, messages, creativity_value, int(max_tokens), agent_type,
+                                                                  context=format_passages(sources) if sources else None)
+                    if use_cache_now and st.session_state.response:
+                        get_response_cache().store(st.session_state.user_input, st.session_state.response, cache_namespace)
                 if st.session_state.response:
                     # Update history with new response
                     st.session_state.history.extend([
@@ -121,15 +191,31 @@ def main():
                             yield word + " "
                             time.sleep(0.02)
 
-                    st.write(f"**You:** {st.session_state.user_input}")
-                    st.write("**Bot:**")
-                    st.write_stream((stream_data()))
-                    st.write("---")
+                    with stage("render"):
+                        st.write(f"**You:** {st.session_state.user_input}")
+                        st.write("**Bot:**")
+                        if cached:
+                            # a cached answer is shown at once, not typed out
+                            st.write(st.session_state.response)
+                            st.caption(f"Served from the response cache (similarity {cached['similarity']:.2f} to \"{cached['query']}\")")
+                        else:
+                            st.write_stream((stream_data()))
+                        if sources:
+                            with st.expander("Sources"):
+                                for number, source in enumerate(sources, start=1):
+                                    st.write(f"[{number}] [{source['title'] or source['url']}]({source['url']}) (score {source['score']:.2f})")
+                        st.write("---")
                     st.session_state.user_input = ""
                     # st.session_state.feedback = "### Did you find the response helpful?"
         else:
             st.warning("Select a model to continue.. ")
             st.stop()
 
+    if use_cache:
+        cache_stats = get_response_cache().stats()
+        st.sidebar.caption(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                           f"({cache_stats['hit_rate']:.0%} hit rate) | {cache_stats['entries']} answers")
+
 if __name__ == "__main__":
-    main()
+    with start_rerun("ChatGPT"):
+        main()
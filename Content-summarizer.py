@@ -9,14 +9,17 @@ Key Features:
 - Upload and process PDF files.
 - Generate text summaries using OpenAI models.
 - Save summaries as DOCX or show them on the screen in real-time.
+- Batch mode: summarize many PDFs concurrently with per-document progress, results shown as they finish and
+  bulk DOCX/PPTX downloads (summary_batch.py).
 - Streamlit-based user interface with customizable model and document type options.
 
 Dependencies:
 - os
 - streamlit
-- PyPDF2
-- docx
-- pptx
+- document_summary (PDF text, the summary prompt and DOCX/PPTX writers; PyPDF2 is imported when a PDF is summarized)
+- summary_batch (concurrent batch summarization)
+- docx (imported when a DOCX is generated)
+- pptx (imported when a PPTX is generated)
 - io
 - time
 
@@ -26,15 +29,19 @@ Date: August 2024
 
 import os
 import streamlit as st
-from PyPDF2 import PdfReader
-from docx import Document
-from pptx import Presentation
 from openai_connector import OpenAIConnector
+from document_summary import SUMMARY_PROMPT, extract_pdf_text, write_docx, write_pptx
+from summary_batch import SummaryBatchStats, bulk_outputs, run_summary_batch, summarize_document
+from app_profiling import stage, start_rerun
 import io
 import time
 
-# Initialize OpenAI Connector
-openai_connector = OpenAIConnector()
+BATCH_WORKERS = 4
+
+# Initialize OpenAI Connector once per process, on the first summary, instead of on every rerun
+@st.cache_resource
+def get_openai_connector():
+    return OpenAIConnector()
 
 # Setting page config
 st.set_page_config(
@@ -65,13 +72,10 @@ def generate_summary_from_pdf(file, model, num_pages):
     """
 
     if num_pages > 0:
-        prompt = "You are an expert summarizer. You need to summarize the document in a very concise manner highlighting key points in bulleted format"
-        pdf = PdfReader(file)
-        text = ""
-        for page_num in range(min(num_pages, len(pdf.pages))):
-            page = pdf.pages[page_num]
-            text += page.extract_text()
-        return openai_connector.summarize_text(text, model,prompt)
+        with stage("extract"):
+            text = extract_pdf_text(file, num_pages)
+        with stage("API call"):
+            return get_openai_connector().summarize_text(text, model, SUMMARY_PROMPT)
     else:
         st.warning("Number of pages needs to be greater than 0")
         st.stop()
@@ -89,13 +93,7 @@ def save_summary_as_docx(summary, filename):
     Returns:
         str: The path to the saved DOCX file.
     """
-
-    doc = Document()
-    doc.add_heading('Document Summary', 0)
-    doc.add_paragraph(summary)
-    summary_path = f"{filename}-summary.docx"
-    doc.save(summary_path)
-    return summary_path
+    return write_docx([(None, summary)], f"{filename}-summary.docx")
 
 def save_summary_as_pptx(summary, filename):
     """
@@ -110,18 +108,7 @@ def save_summary_as_pptx(summary, filename):
     Returns:
         str: The path to the saved PPTX file.
     """
-    
-    pres = Presentation()
-    slide_layout = pres.slide_layouts[1]  # Title and Content layout
-    slide = pres.slides.add_slide(slide_layout)
-    title = slide.shapes.title
-    content = slide.placeholders[1]
-
-    title.text = "Document Summary"
-    content.text = summary
-    summary_path = f"{filename}-summary.pptx"
-    pres.save(summary_path)
-    return summary_path
+    return write_pptx([(None, summary)], f"{filename}-summary.pptx")
 
 # Streamlit UI
 st.title("Content Summarizer")
@@ -130,12 +117,93 @@ st.write("---")
 # Sidebar Inputs
 model_choices = OpenAIConnector.model_choices
 document_choices = ['Display on Screen', 'Generate DOCX']
+mode = st.sidebar.radio("Mode", ["Single Document", "Batch"], horizontal=True)
 model_type = st.sidebar.radio("Choose a model type:", model_choices)
-doc_type = st.sidebar.radio("Choose document type:", document_choices)
+if mode == "Single Document":
+    doc_type = st.sidebar.radio("Choose document type:", document_choices)
+else:
+    output_formats = st.sidebar.multiselect("Bulk output", ["DOCX", "PPTX"], default=["DOCX"])
+    max_workers = st.sidebar.slider("Parallel summaries", 1, 16, BATCH_WORKERS)
 num_pages_input = st.sidebar.text_input("Number of pages to summarize ", max_chars=5, value="1")
 
 # File uploader
-uploaded_file = st.file_uploader("Upload a PDF file", type="pdf")
+if mode == "Single Document":
+    uploaded_file = st.file_uploader("Upload a PDF file", type="pdf")
+else:
+    uploaded_file = None
+    uploaded_files = st.file_uploader("Upload PDF files", type="pdf", accept_multiple_files=True)
+
+def summarize_batch(uploaded_files, model, num_pages, output_formats, max_workers):
+    """
+    Summarize many PDF documents concurrently and offer the summaries for download in bulk.
+
+    Every document gets a status line up front, and its summary is shown as soon as it finishes,
+    in completion order. The summaries are then written as DOCX and/or PPTX files to one zip archive.
+
+    Args:
+        uploaded_files (list[UploadedFile]): The uploaded PDF files.
+        model (str): The name of the AI model to use for summarization.
+        num_pages (int): The number of pages to summarize from each PDF.
+        output_formats (list[str]): "DOCX" and/or "PPTX".
+        max_workers (int): The number of documents summarized at the same time.
+    """
+    # the connector is created here, on the script thread, and shared by the workers
+    summarize_text = get_openai_connector().summarize_text
+    documents = []
+    for file in uploaded_files:
+        name = os.path.splitext(file.name)[0]
+        # uploads with the same file name get a number, so their outputs do not overwrite each other
+        while name in dict(documents):
+            name += "-1"
+        documents.append((name, file))
+    stats = SummaryBatchStats(len(documents))
+    progress = st.progress(0.0, text=f"0/{len(documents)} documents")
+    statuses = {}
+    for name, _ in documents:
+        statuses[name] = st.empty()
+        statuses[name].caption(f"{name}: queued")
+    results = st.container()
+
+    summaries, failures = {}, []
+    batch = run_summary_batch(documents, lambda file: summarize_document(summarize_text, file, model, num_pages), max_workers)
+    for name, result, error in batch:
+        stats.record(result, error)
+        if error is None:
+            summaries[name] = result["summary"]
+            statuses[name].caption(f"{name}: done in {result['seconds']:.1f}s")
+            with results.expander(f"Summary of {name}"):
+                st.markdown(result["summary"])
+        else:
+            failures.append((name, str(error)))
+            statuses[name].error(f"{name}: {error}")
+        progress.progress(stats.done / stats.total, text=f"{stats.done}/{stats.total} documents - {name}")
+    st.success(stats.summary())
+
+    # keep the upload order in the bulk files
+    ordered = [(name, summaries[name]) for name, _ in documents if name in summaries]
+    archive = None
+    if ordered and output_formats:
+        with stage("bulk output"):
+            archive = bulk_outputs(ordered, output_formats)
+        download_summaries(archive)
+    # any later rerun (a widget change) shows the results again instead of dropping them
+    st.session_state.batch_results = {"summaries": ordered, "failures": failures, "stats": stats.summary(), "archive": archive}
+
+def download_summaries(archive):
+    # the download does not rerun the script, so the page stays as it is
+    st.download_button("Download summaries (.zip)", data=archive, file_name="summaries.zip", mime="application/zip",
+                       on_click="ignore")
+
+def show_batch_results(batch):
+    """Show the results of the last batch, kept in the session state, again."""
+    for name, summary in batch["summaries"]:
+        with st.expander(f"Summary of {name}"):
+            st.markdown(summary)
+    for name, error in batch["failures"]:
+        st.error(f"{name}: {error}")
+    st.success(batch["stats"])
+    if batch["archive"] is not None:
+        download_summaries(batch["archive"])
 
 def main():
     """
@@ -168,14 +236,33 @@ def main():
                 summary = generate_summary_from_pdf(uploaded_file, model_type, num_pages)
                 summary = summary.replace('$','USD')
                 
-                if doc_type == 'Generate DOCX':
-                    summary_file = save_summary_as_docx(summary, filename)
-                    st.success(f"Summary generated and saved as {summary_file}")
-                elif doc_type == "Display on Screen":
-                    st.write_stream((stream_data(summary)))
+                with stage("render"):
+                    if doc_type == 'Generate DOCX':
+                        summary_file = save_summary_as_docx(summary, filename)
+                        st.success(f"Summary generated and saved as {summary_file}")
+                    elif doc_type == "Display on Screen":
+                        st.write_stream((stream_data(summary)))
 
         except Exception as e:
             st.error(f"Error: {str(e)}")
+    elif mode == "Batch":
+        if st.button("Summarize all"):
+            try:
+                num_pages = int(num_pages_input) if num_pages_input else 1
+            except ValueError:
+                st.warning("Number of pages needs to be a whole number")
+                st.stop()
+            if num_pages <= 0:
+                st.warning("Number of pages needs to be greater than 0")
+                st.stop()
+            if uploaded_files:
+                with stage("batch"):
+                    summarize_batch(uploaded_files, model_type, num_pages, output_formats, max_workers)
+            else:
+                st.warning("Please upload one or more PDF files")
+        elif "batch_results" in st.session_state:
+            show_batch_results(st.session_state.batch_results)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with start_rerun("Content-summarizer"):
+        main()
\ No newline at end of file
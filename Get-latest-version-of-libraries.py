@@ -3,12 +3,20 @@ Library Version Checker and Progress Bar Script
 
 Description:
 ------------
-This Python script processes a list of libraries with their current versions,
-checks if there are newer versions available using `pip index versions`, and
-writes the results to a `requirements.txt` file. For each library:
+This Python script processes a list of libraries with their current versions
+(the built-in list below or any requirements file), checks if there are newer
+versions available and writes the results to a `requirements.txt` file. For
+each library:
 - If a newer version is available, the latest version is recorded.
 - If the library is already up to date or an error occurs, the current version
   is written to the file as is.
+- Lines that are not pinned with == (ranges, unpinned names) are kept as written.
+
+Versions are looked up concurrently by a bounded pool of worker threads (see
+package_index.py) and index responses are cached on disk for a few hours, so a
+200-package file takes seconds and a rerun is almost instant. Instead of PyPI,
+a PEP 503 simple index (e.g. a local mirror) or a wheelhouse folder can be used
+for offline runs.
 
 Additionally, the script provides a visual progress bar in the format:
 [ == % done == ] to indicate the progress of library version checking.
@@ -18,6 +26,14 @@ Key Features:
 - Check for the latest versions of Python libraries.
 - Generate or update `requirements.txt` with current/latest versions.
 - Display a dynamic Linux-style progress bar to track the processing of libraries.
+- Concurrent lookups, a disk cache with a TTL and offline index sources.
+
+Usage:
+------
+    python Get-latest-version-of-libraries.py
+    python Get-latest-version-of-libraries.py --requirements requirements-old.txt --output requirements.txt
+    python Get-latest-version-of-libraries.py --index-url http://127.0.0.1:8767/simple
+    python Get-latest-version-of-libraries.py --wheelhouse ./wheels
 
 Functions:
 ----------
@@ -26,9 +42,21 @@ Functions:
 
 """
 
-import subprocess
+import argparse
 import time
 
+from package_index import (
+    IndexCache,
+    PyPIJsonSource,
+    SimpleIndexSource,
+    WheelhouseSource,
+    parse_requirements,
+    read_requirements,
+    resolve_latest,
+)
+
+CACHE_DIR = ".package_index_cache"
+
 old_libraries = [
     "click==8.1.7",
     "docx==0.2.4",
@@ -65,37 +93,49 @@ def progress_bar(progress, total, bar_length=40):
     print(f"\r[ {bar} {percent}% libraries processed ]", end='')
 
 # generate the new requirements.txt file
-def process_libraries():
-    total_libraries = len(old_libraries)
-    with open("requirements.txt", "w") as f:
-        for idx, library in enumerate(old_libraries):
-            library_name, current_version = library.split("==")
-            try:
-                # Get the latest version of the library using 'pip index versions'
-                latest_version_output = subprocess.check_output(
-                    ["pip", "index", "versions", library_name],
-                    stderr=subprocess.STDOUT
-                ).decode()
-                
-                # Extract the latest version from the output
-                latest_version = current_version  # Default to the current version
-                lines = latest_version_output.splitlines()
-                for line in lines:
-                    if line.strip().startswith("LATEST:"):
-                        latest_version = line.split()[1]  # Extract version after "LATEST:"
-                        break
-                
-                # Write either the latest version or the current version if already up to date
-                f.write(f"{library_name}=={latest_version}\n")
-            
-            except (subprocess.CalledProcessError, IndexError):
-                # If there's an error (e.g., package not found), write the original version to the file
-                f.write(library + "\n")
-            
-            # Update the progress bar after each library is processed
-            progress_bar(idx + 1, total_libraries)
-            time.sleep(0.1)  # Simulate processing time for better visual effect
-
-print("Processing libraries...\n")
-process_libraries()
-print("\nDone! Check requirements.txt file to get latest version of the libraries")
+def process_libraries(requirements, output="requirements.txt", source=None, cache=None, max_workers=16):
+    source = source or PyPIJsonSource()
+    results = resolve_latest(requirements, source, cache=cache, max_workers=max_workers, on_progress=progress_bar)
+    with open(output, "w") as f:
+        for result in results:
+            # Write either the latest version or the current version if already up to date or on errors
+            f.write(result.output_line + "\n")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update pinned library versions to their latest release")
+    parser.add_argument("--requirements", help="requirements file to read (default: the built-in library list)")
+    parser.add_argument("--output", default="requirements.txt", help="requirements file to write")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent index lookups")
+    parser.add_argument("--index-url", help="PEP 503 simple index to use instead of PyPI (e.g. a local mirror)")
+    parser.add_argument("--wheelhouse", help="folder of wheels/sdists to use instead of an index (offline)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where index responses are cached")
+    parser.add_argument("--ttl", type=float, default=6, help="hours before a cached index response is refreshed")
+    parser.add_argument("--no-cache", action="store_true", help="always query the index")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    requirements = read_requirements(args.requirements) if args.requirements else parse_requirements(old_libraries)
+    if args.wheelhouse:
+        source = WheelhouseSource(args.wheelhouse)
+    elif args.index_url:
+        source = SimpleIndexSource(args.index_url)
+    else:
+        source = PyPIJsonSource()
+    # a wheelhouse is already local, caching it would only hide newly added files
+    cache = None if args.no_cache or args.wheelhouse else IndexCache(args.cache_dir, ttl=args.ttl * 3600)
+
+    print("Processing libraries...\n")
+    started = time.perf_counter()
+    results = process_libraries(requirements, args.output, source, cache, args.workers)
+    elapsed = time.perf_counter() - started
+    print()
+    for result in results:
+        if result.error:
+            print(f"Could not check {result.requirement.name}: {result.error}")
+    cached = sum(result.cached for result in results)
+    print(f"\nDone in {elapsed:.1f}s ({cached} of {len(results)} from cache)! "
+          f"Check {args.output} file to get latest version of the libraries")
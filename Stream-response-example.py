@@ -1,6 +1,4 @@
 import time
-import numpy as np
-import pandas as pd
 import streamlit as st
 
 _LOREM_IPSUM = """
@@ -0,0 +1,666 @@
+"""
+API Gateway Overview:
+This module serves the tools of this repository over HTTP, so they can be used without the Streamlit pages,
+run as several processes behind a load balancer and load tested like any other backend. It is an ASGI
+application (Starlette, served by uvicorn) with JSON endpoints and server-sent event (SSE) streams. The event
+loop only parses requests and relays results: every blocking model call, download or file conversion runs in
+a bounded worker pool, and requests beyond the pool's queue are rejected with 503 instead of piling up.
+
+Endpoints:
+- GET  /health             : status and worker pool counters.
+- POST /v1/chat            : chat completion for {"messages": [...]}, streamed as SSE unless "stream" is false.
+- POST /v1/summarize       : summary of an uploaded PDF (multipart "file") or of JSON {"text": ...}.
+- POST /v1/posts           : social media post for {"platform", "topic"} (Claude).
+- POST /v1/stocks/analyze  : SSE stream of the statistics and the streamed analysis of every ticker.
+- POST /v1/code/convert    : SSE progress per converted unit, then the converted file.
+- POST /v1/speech          : MP3 audio, streamed segment by segment as it is synthesized.
+- POST /v1/images          : DALL-E image, saved to the Generate-Images gallery, platform renditions rendered.
+- GET  /v1/images/{name}   : a generated image, or with ?platform=Instagram&variant=portrait its rendition for
+                             a social media platform (the platform's default variant without "variant").
+
+SSE streams end with a "done" event, or with an "error" event when the work failed after the response started.
+
+Usage:
+    python api_gateway.py --port 8000 --workers 16 --max-pending 64
+    GATEWAY_WORKERS=16 uvicorn api_gateway:app --workers 4
+
+Dependencies:
+- starlette
+- uvicorn
+- python-multipart (PDF uploads)
+- asyncio
+- concurrent.futures
+- openai_client, openai_connector, social_posts, document_summary, stock_analytics, market_data,
+  code_conversion, code_preprocess, speech_synthesis, speech_cache, image_gallery, image_cache,
+  image_renditions
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from datetime import date
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from code_conversion import TruncatedResponse, complete, convert_units, split_source, stitch, strip_code_fence, unit_prompt
+from code_preprocess import preprocess, shrink
+from document_summary import SUMMARY_PROMPT, extract_pdf_text
+from image_cache import make_cache_key
+from image_gallery import IMAGE_PREFIX
+from openai_client import get_shared_client
+from social_posts import PLATFORMS, generate_post
+from speech_synthesis import TTS_MODEL, new_request_dir, split_into_segments, split_sentences, synthesize_in_order, synthesize_segment
+
+DEFAULT_WORKERS = 16
+DEFAULT_MAX_PENDING = 64
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, "images")
+SPEECH_DIR = os.path.join(BASE_DIR, "speech")
+SPEECH_CACHE_DIR = os.path.join(SPEECH_DIR, "cache")
+
+CHAT_MODEL = "gpt-4o-mini"
+CODE_MODEL = "gpt-4o-2024-08-06"
+STOCK_MODEL = "gpt-4"
+SUMMARY_MODEL = "gpt-4o-mini"
+CONVERSION_WORKERS = 4
+AGENT_PROMPTS = {
+    "Expert Programmer": "You are an expert programmer.",
+    "Friendly Chatbot": "You are a helpful assistant.",
+    "Travel Agent": "You are a travel planner.",
+    "Prompt Expert": "You are an expert prompt engineer",
+}
+STOCK_SYSTEM_PROMPT = "You are an expert stock market data analyst"
+VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+IMAGE_SIZES = ["1024x1024", "1024x1792", "1792x1024"]
+IMAGE_QUALITIES = ["standard", "hd"]
+IMAGE_STYLES = ["vivid", "natural"]
+IMAGE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+_END = object()
+
+
+class PoolFull(Exception):
+    """Raised when the worker pool has no room for another request."""
+
+
+class StreamCancelled(Exception):
+    """Raised inside a worker when the client of its stream went away."""
+
+
+class WorkerPool:
+    """
+    Bounded thread pool for the blocking tool calls. At most max_workers calls run at once and at most
+    max_pending more wait for a thread. Anything beyond that raises PoolFull, which the app answers with 503.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gateway")
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _admit(self, count=1):
+        with self._lock:
+            if self._admitted + count > self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise PoolFull(f"All {self.max_workers} workers are busy and {self.max_pending} requests are waiting")
+            self._admitted += count
+
+    def _call(self, fn, args):
+        succeeded = False
+        try:
+            result = fn(*args)
+            succeeded = True
+            return result
+        finally:
+            with self._lock:
+                self._admitted -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool and return its result."""
+        self._admit()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, fn, args)
+
+    def stream(self, fn, *args):
+        """
+        Start fn(emit, *args) in the pool and return an async iterator over everything it passes to emit.
+
+        Admission happens here, before a response is started, so a full pool still turns into a 503. When the
+        consumer stops early (the client went away) the worker's next emit raises StreamCancelled.
+        """
+        return self.streams([(fn, args)])[0]
+
+    def streams(self, calls):
+        """
+        stream() for several (fn, args) calls of one request. They are admitted together: either all of them
+        start, or PoolFull is raised and none of them does.
+        """
+        self._admit(len(calls))
+        return [self._start_stream(fn, args) for fn, args in calls]
+
+    def _start_stream(self, fn, args):
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(item):
+            if cancelled.is_set():
+                raise StreamCancelled()
+            loop.call_soon_threadsafe(items.put_nowait, item)
+
+        future = loop.run_in_executor(self._executor, self._call, fn, (emit,) + args)
+
+        def finished(f):
+            if not f.cancelled():
+                f.exception()  # marks the error as retrieved, relay() raises it again while it is being consumed
+            # emitted items were queued on the loop before the future completed, so _END always comes last
+            items.put_nowait(_END)
+
+        future.add_done_callback(finished)
+
+        async def relay():
+            try:
+                while (item := await items.get()) is not _END:
+                    yield item
+                future.result()
+            finally:
+                cancelled.set()
+
+        return relay()
+
+    def stats(self):
+        with self._lock:
+            admitted = self._admitted
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(admitted, self.max_workers),
+            "waiting": max(admitted - self.max_workers, 0),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_resources = {}
+_resources_lock = threading.Lock()
+
+
+def shared(name, factory):
+    """One instance per process of an expensive resource, created by the first worker that needs it."""
+    with _resources_lock:
+        if name not in _resources:
+            _resources[name] = factory()
+        return _resources[name]
+
+
+def _openai_connector():
+    from openai_connector import OpenAIConnector
+    return OpenAIConnector()
+
+
+def _anthropic_client():
+    from anthropic import Anthropic
+
+    load_dotenv()
+    return Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+
+def _market_data_store():
+    from market_data import MarketDataStore
+    return MarketDataStore()
+
+
+def _gallery():
+    from image_cache import GenerationCache
+    from image_gallery import GalleryIndex, ThumbnailWorker
+
+    gallery = GalleryIndex(IMAGES_DIR)
+    return gallery, ThumbnailWorker(gallery), GenerationCache(gallery)
+
+
+def _renditions():
+    from image_renditions import RENDITIONS_FOLDER, RenditionStore
+    return RenditionStore(os.path.join(IMAGES_DIR, RENDITIONS_FOLDER))
+
+
+def _speech_cache():
+    from speech_cache import SpeechCache
+    return SpeechCache(SPEECH_CACHE_DIR)
+
+
+# ---- the tool calls, run in the worker pool ----
+
+def chat_once(model, messages, temperature, max_tokens):
+    response = get_shared_client().chat.completions.create(
+        model=model, messages=messages, max_tokens=max_tokens, n=1, temperature=temperature,
+    )
+    return response.choices[0].message.content
+
+
+def chat_stream(emit, model, messages, temperature, max_tokens):
+    response = get_shared_client().chat.completions.create(
+        model=model, messages=messages, max_tokens=max_tokens, n=1, temperature=temperature, stream=True,
+    )
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            emit(("delta", {"text": chunk.choices[0].delta.content}))
+
+
+def summarize_text(text, model, prompt):
+    return shared("openai_connector", _openai_connector).summarize_text(text, model, prompt)
+
+
+def summarize_pdf(data, model, num_pages):
+    return summarize_text(extract_pdf_text(io.BytesIO(data), num_pages), model, SUMMARY_PROMPT)
+
+
+def write_post(platform, topic):
+    return generate_post(shared("anthropic", _anthropic_client), platform, topic)
+
+
+def stock_summaries(tickers, start_date, end_date):
+    """Statistics summary per ticker with data, from one batched download."""
+    from stock_analytics import compute_statistics, format_summary
+
+    market_data = shared("market_data", _market_data_store).get(tickers, start_date, end_date, interval="5d")
+    statistics = compute_statistics(market_data)
+    return {ticker: format_summary(ticker, statistics[ticker]) for ticker in tickers if ticker in statistics}
+
+
+def stock_analysis_stream(emit, ticker, prompt, temperature, max_tokens):
+    # a failed ticker is reported in the stream, the other tickers carry on
+    started = time.perf_counter()
+    try:
+        response = get_shared_client().chat.completions.create(
+            model=STOCK_MODEL,
+            messages=[{"role": "system", "content": STOCK_SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+            max_tokens=max_tokens, n=1, temperature=temperature, stream=True,
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                emit(("delta", {"ticker": ticker, "text": chunk.choices[0].delta.content}))
+    except StreamCancelled:
+        raise
+    except Exception as e:
+        emit(("error", {"ticker": ticker, "message": str(e)}))
+        return
+    emit(("analysis", {"ticker": ticker, "latency": round(time.perf_counter() - started, 3)}))
+
+
+def convert_code_stream(emit, code, target_language, filename):
+    prepared = preprocess(code, "conversion", filename)
+    # split the original source, the splitter relies on the blank lines that preprocessing removes
+    units, context = split_source(code)
+
+    def convert(index, unit):
+        prompt = unit_prompt(shrink(unit, prepared.language, "conversion"), index, len(units), context, prepared.language, target_language)
+        create = functools.partial(get_shared_client().chat.completions.create, model=CODE_MODEL, n=1)
+        messages = [{"role": "system", "content": "You are an expert programmer"}, {"role": "user", "content": prompt}]
+        try:
+            content = complete(create, messages)
+        except TruncatedResponse as e:
+            # ends the stream with an "error" event, half a unit would not compile
+            raise TruncatedResponse(f"Part {index + 1} of {len(units)}: {e}", e.partial) from e
+        emit(("unit", {"index": index, "units": len(units)}))
+        return strip_code_fence(content)
+
+    converted = stitch(convert_units(units, convert, CONVERSION_WORKERS))
+    emit(("result", {
+        "code": converted, "language": prepared.language, "units": len(units),
+        "tokens_before": prepared.tokens_before, "tokens_after": prepared.tokens_after,
+    }))
+
+
+def speech_stream(emit, text, voice, use_cache):
+    # same segmentation as Text-to-Speech: sentences when cached, larger segments otherwise
+    if use_cache:
+        segments = split_sentences(text)
+        synthesize = shared("speech_cache", _speech_cache).wrap(synthesize_segment, TTS_MODEL)
+    else:
+        segments = split_into_segments(text)
+        synthesize = synthesize_segment
+    request_dir = new_request_dir(SPEECH_DIR)
+    try:
+        for _, segment_path in synthesize_in_order(segments, voice, request_dir, synthesize=synthesize):
+            with open(segment_path, "rb") as f:
+                emit(f.read())
+    finally:
+        shutil.rmtree(request_dir, ignore_errors=True)
+
+
+def create_image(prompt, size, quality, style, use_cache):
+    """Generate, save and index one image. Returns (name, served from cache)."""
+    gallery, thumbnail_worker, cache = shared("gallery", _gallery)
+    cache_key = make_cache_key(prompt, size, quality, style)
+    if use_cache:
+        cached_name = cache.lookup(cache_key)
+        if cached_name:
+            return cached_name, True
+    response = get_shared_client().images.generate(
+        model="dall-e-3", size=size, prompt=prompt, n=1, response_format="url", quality=quality, style=style,
+    )
+    name = IMAGE_PREFIX + uuid.uuid4().hex[:10]
+    with urllib.request.urlopen(response.data[0].url, timeout=60) as image, open(gallery.image_path(name), "wb") as f:
+        shutil.copyfileobj(image, f)
+    gallery.add(name, prompt, size, quality, style)
+    thumbnail_worker.submit(name)
+    shared("renditions", _renditions).submit(gallery.image_path(name))
+    if use_cache:
+        cache.store(cache_key, name)
+    return name, False
+
+
+# ---- request handling ----
+
+async def read_json(request):
+    try:
+        payload = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(400, "The request body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "The request body must be a JSON object")
+    return payload
+
+
+def required(payload, name):
+    value = payload.get(name)
+    if value is None or (isinstance(value, (str, list)) and not value):
+        raise HTTPException(400, f"'{name}' is required")
+    return value
+
+
+def number(payload, name, default, kind=int):
+    try:
+        return kind(payload.get(name, default))
+    except (TypeError, ValueError):
+        raise HTTPException(400, f"'{name}' must be a number")
+
+
+def choice(payload, name, options, default):
+    value = payload.get(name, default)
+    if value not in options:
+        raise HTTPException(400, f"'{name}' must be one of {', '.join(options)}")
+    return value
+
+
+def parse_date(value, name):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise HTTPException(400, f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def event_stream(events):
+    """SSE response over an async iterator of (event, data) pairs."""
+    async def body():
+        try:
+            async with aclosing(events):
+                async for event, data in events:
+                    yield sse(event, data)
+        except Exception as e:
+            # the status line is already sent, so failures are reported in the stream
+            yield sse("error", {"message": str(e)})
+        else:
+            yield sse("done", {})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def merge(streams):
+    """Interleave several async iterators, yielding every item as soon as any of them produces it."""
+    items = asyncio.Queue()
+
+    async def pump(stream):
+        try:
+            async with aclosing(stream):
+                async for item in stream:
+                    await items.put(item)
+        except Exception as e:
+            await items.put(("error", {"message": str(e)}))
+        finally:
+            await items.put(_END)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await items.get()
+            if item is _END:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_tool(request, fn, *args):
+    """Run a tool call in the app's pool. Failures of the tool or the API behind it are answered with 502."""
+    try:
+        return await request.app.state.pool.run(fn, *args)
+    except (HTTPException, PoolFull):
+        raise
+    except Exception as e:
+        raise HTTPException(502, f"{type(e).__name__}: {e}")
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "pool": request.app.state.pool.stats()})
+
+
+async def chat(request):
+    payload = await read_json(request)
+    messages = required(payload, "messages")
+    if not isinstance(messages, list) or not all(isinstance(m, dict) and "role" in m and "content" in m for m in messages):
+        raise HTTPException(400, "'messages' must be a list of {\"role\", \"content\"} objects")
+    system = AGENT_PROMPTS.get(payload.get("agent_type"), AGENT_PROMPTS["Friendly Chatbot"])
+    args = (
+        payload.get("model", CHAT_MODEL),
+        [{"role": "system", "content": system}] + messages,
+        number(payload, "temperature", 0.5, float),
+        number(payload, "max_tokens", 500),
+    )
+    pool = request.app.state.pool
+    if payload.get("stream", True):
+        return event_stream(pool.stream(chat_stream, *args))
+    return JSONResponse({"response": await run_tool(request, chat_once, *args)})
+
+
+async def summarize(request):
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        async with request.form() as form:
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(400, "Upload the PDF as the 'file' field")
+            data = await upload.read()
+            model = form.get("model", SUMMARY_MODEL)
+            num_pages = number(form, "pages", 1)
+        if num_pages <= 0:
+            raise HTTPException(400, "'pages' must be greater than 0")
+        summary = await run_tool(request, summarize_pdf, data, model, num_pages)
+    else:
+        payload = await read_json(request)
+        summary = await run_tool(
+            request, summarize_text, required(payload, "text"), payload.get("model", SUMMARY_MODEL), payload.get("prompt", SUMMARY_PROMPT)
+        )
+    return JSONResponse({"summary": summary})
+
+
+async def posts(request):
+    payload = await read_json(request)
+    platform = choice(payload, "platform", PLATFORMS, PLATFORMS[0])
+    post = await run_tool(request, write_post, platform, required(payload, "topic"))
+    return JSONResponse({"platform": platform, "post": post})
+
+
+async def analyze_stocks(request):
+    from stock_analytics import build_prompt
+
+    payload = await read_json(request)
+    tickers = required(payload, "tickers")
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    start_date = parse_date(payload.get("start_date", "2022-01-01"), "start_date")
+    end_date = parse_date(payload.get("end_date", "2024-09-01"), "end_date")
+    temperature = number(payload, "temperature", 0.7, float)
+    max_tokens = number(payload, "max_tokens", 1500)
+
+    pool = request.app.state.pool
+    summaries = await run_tool(request, stock_summaries, tickers, start_date, end_date)
+    # one admission for all tickers, a full pool rejects the request before any analysis starts
+    analyses = pool.streams([
+        (stock_analysis_stream, (ticker, build_prompt(ticker, summary, start_date, end_date), temperature, max_tokens))
+        for ticker, summary in summaries.items()
+    ])
+
+    async def events():
+        for ticker in tickers:
+            if ticker in summaries:
+                yield "statistics", {"ticker": ticker, "summary": summaries[ticker]}
+            else:
+                yield "missing", {"ticker": ticker}
+        async for item in merge(analyses):
+            yield item
+
+    return event_stream(events())
+
+
+async def convert_code(request):
+    payload = await read_json(request)
+    stream = request.app.state.pool.stream(
+        convert_code_stream, required(payload, "code"), required(payload, "target_language"), payload.get("filename")
+    )
+    return event_stream(stream)
+
+
+async def speech(request):
+    payload = await read_json(request)
+    text = required(payload, "text")
+    if not split_sentences(text):
+        raise HTTPException(400, "'text' has nothing to synthesize")
+    voice = choice(payload, "voice", VOICES, "alloy")
+    audio = request.app.state.pool.stream(speech_stream, text, voice, bool(payload.get("cache", True)))
+    return StreamingResponse(audio, media_type="audio/mpeg")
+
+
+async def images(request):
+    payload = await read_json(request)
+    name, cached = await run_tool(
+        request, create_image,
+        required(payload, "prompt"),
+        choice(payload, "size", IMAGE_SIZES, IMAGE_SIZES[0]),
+        choice(payload, "quality", IMAGE_QUALITIES, IMAGE_QUALITIES[0]),
+        choice(payload, "style", IMAGE_STYLES, IMAGE_STYLES[0]),
+        bool(payload.get("cache", False)),
+    )
+    return JSONResponse({"name": name, "url": str(request.url_for("image", name=name)), "cached": cached})
+
+
+async def image(request):
+    name = request.path_params["name"]
+    path = os.path.join(IMAGES_DIR, name)
+    if not IMAGE_NAME.match(name) or not os.path.isfile(path):
+        raise HTTPException(404, f"No image named '{name}'")
+    platform = request.query_params.get("platform")
+    if platform is None:
+        return FileResponse(path, media_type="image/png")
+    renditions = shared("renditions", _renditions)
+    if platform not in renditions.renditions:
+        raise HTTPException(400, f"'platform' must be one of {', '.join(renditions.renditions)}")
+    variant = request.query_params.get("variant")
+    if variant is not None and variant not in {spec.name for spec in renditions.renditions[platform]}:
+        raise HTTPException(404, f"{platform} has no rendition named '{variant}'")
+    spec, rendition_path = await run_tool(request, renditions.rendition, path, platform, variant)
+    return FileResponse(rendition_path, media_type=spec.media_type)
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+async def pool_full(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+def create_app(max_workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+    pool = WorkerPool(max_workers, max_pending)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        pool.shutdown()
+
+    app = Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/v1/chat", chat, methods=["POST"]),
+            Route("/v1/summarize", summarize, methods=["POST"]),
+            Route("/v1/posts", posts, methods=["POST"]),
+            Route("/v1/stocks/analyze", analyze_stocks, methods=["POST"]),
+            Route("/v1/code/convert", convert_code, methods=["POST"]),
+            Route("/v1/speech", speech, methods=["POST"]),
+            Route("/v1/images", images, methods=["POST"]),
+            Route("/v1/images/{name}", image, name="image"),
+        ],
+        exception_handlers={HTTPException: http_error, PoolFull: pool_full},
+        lifespan=lifespan,
+    )
+    app.state.pool = pool
+    return app
+
+
+# for `uvicorn api_gateway:app`, one pool per process
+app = create_app(
+    int(os.getenv("GATEWAY_WORKERS", DEFAULT_WORKERS)),
+    int(os.getenv("GATEWAY_MAX_PENDING", DEFAULT_MAX_PENDING)),
+)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="HTTP API gateway for the tools in this repository")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent tool calls")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="queued tool calls before 503")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.workers, args.max_pending), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+App Profiling Overview:
+This module is an opt-in profiling mode shared by the Streamlit apps. When the APP_PROFILE environment
+variable is set, every rerun of an app is timed, together with the named stages the app marks (extract, OCR,
+prompt build, API call, render, ...), and a collapsible timing breakdown is shown at the bottom of the
+sidebar. Optionally each rerun is also captured with cProfile or with a small sampling profiler and written to
+a folder, next to a JSON lines log of the timings. With APP_PROFILE unset everything here is a no-op.
+
+Environment:
+- APP_PROFILE=1                      enable timers and the sidebar panel.
+- APP_PROFILE_DIR=profiles           folder for captured profiles and timings.jsonl (logging is on when set).
+- APP_PROFILE_CAPTURE=cprofile       one .prof file per rerun (open with `python -m pstats` or snakeviz).
+- APP_PROFILE_CAPTURE=sample         one .folded file per rerun (collapsed stacks for flamegraph/speedscope).
+- APP_PROFILE_SAMPLE_INTERVAL=0.005  seconds between samples.
+
+Usage:
+    from app_profiling import stage, start_rerun
+
+    with start_rerun("ChatGPT"):        # around the whole script, st.stop() and st.rerun() exit it too
+        with stage("API call"):
+            ...
+
+Stages are recorded on the script thread. Work that runs in worker threads is timed by the stage around
+the code that waits for it.
+
+Dependencies:
+- cProfile
+- contextvars
+- json
+- os
+- sys
+- threading
+- time
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import contextvars
+import cProfile
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.getenv("APP_PROFILE", "").lower() not in ("", "0", "false", "no")
+CAPTURE = os.getenv("APP_PROFILE_CAPTURE", "").lower()
+PROFILE_DIR = os.getenv("APP_PROFILE_DIR") or ("profiles" if CAPTURE else None)
+SAMPLE_INTERVAL = float(os.getenv("APP_PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+_current = contextvars.ContextVar("app_profiling_rerun", default=None)
+_counter = itertools.count(1)
+_seen_apps = set()
+_log_lock = threading.Lock()
+
+
+class _Sampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval and counts the collapsed stacks."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name="app-profiling-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Rerun:
+    """Timers of one rerun of an app. Also a context manager that finishes the rerun on exit."""
+
+    def __init__(self, app):
+        self.app = app
+        self.number = next(_counter)
+        self.cold = app not in _seen_apps
+        _seen_apps.add(app)
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.total = None
+        self.stages = {}
+        self.profile_path = None
+        self._depth = 0
+        self._profiler = None
+        self._sampler = None
+        if CAPTURE == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif CAPTURE == "sample":
+            self._sampler = _Sampler(threading.get_ident(), SAMPLE_INTERVAL)
+            self._sampler.start()
+        _current.set(self)
+
+    @contextmanager
+    def stage(self, name):
+        entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "depth": self._depth})
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] += time.perf_counter() - started
+            entry["calls"] += 1
+            self._depth -= 1
+
+    def _stop_capture(self):
+        if self._profiler is None and self._sampler is None:
+            return
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', self.app)}-{time.strftime('%Y%m%d-%H%M%S')}-{self.number:04d}")
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path = stem + ".prof"
+            self._profiler.dump_stats(self.profile_path)
+        else:
+            self._sampler.stop()
+            self.profile_path = stem + ".folded"
+            self._sampler.write(self.profile_path)
+
+    def _log(self):
+        record = {
+            "app": self.app,
+            "rerun": self.number,
+            "cold": self.cold,
+            "started_at": self.started_at,
+            "total": round(self.total, 6),
+            "stages": {name: round(entry["seconds"], 6) for name, entry in self.stages.items()},
+            "profile": self.profile_path,
+        }
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with _log_lock, open(os.path.join(PROFILE_DIR, "timings.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def finish(self, render=True):
+        """Stop the timers, write the capture and log, and show the sidebar panel (skipped with render=False)."""
+        if self.total is not None:
+            return
+        self.total = time.perf_counter() - self.started
+        self._stop_capture()
+        if PROFILE_DIR:
+            self._log()
+        if _current.get() is self:
+            _current.set(None)
+        if render:
+            self.render()
+
+    def breakdown(self):
+        """(name, depth, calls, seconds) per stage in first-use order, then the time outside any stage."""
+        rows = [(name, entry["depth"], entry["calls"], entry["seconds"]) for name, entry in self.stages.items()]
+        staged = sum(seconds for _, depth, _, seconds in rows if depth == 0)
+        rows.append(("(other)", 0, 1, max((self.total or 0) - staged, 0.0)))
+        return rows
+
+    def render(self):
+        import streamlit as st
+
+        with st.sidebar.expander(f"⏱ Rerun timing: {self.total * 1000:.0f} ms"):
+            lines = ["| Stage | Calls | ms | Share |", "|---|---:|---:|---:|"]
+            for name, depth, calls, seconds in self.breakdown():
+                share = seconds / self.total if self.total else 0.0
+                lines.append(f"| {'&nbsp;' * 4 * depth}{name} | {calls} | {seconds * 1000:.1f} | {share:.0%} |")
+            st.markdown("\n".join(lines), unsafe_allow_html=True)
+            st.caption(f"{'Cold' if self.cold else 'Warm'} rerun #{self.number} of {self.app}"
+                       + (f". Profile: {self.profile_path}" if self.profile_path else ""))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # st.stop() and st.rerun() end the script with an exception, the panel can only be drawn on a normal exit
+        self.finish(render=exc_type is None)
+        return False
+
+
+class _NullRerun:
+    def stage(self, name):
+        return nullcontext()
+
+    def finish(self, render=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_RERUN = _NullRerun()
+
+
+def start_rerun(app):
+    """Start timing a rerun of app, use it as a context manager. Returns a no-op object unless APP_PROFILE is set."""
+    if not ENABLED:
+        return _NULL_RERUN
+    return Rerun(app)
+
+
+def stage(name):
+    """Time a named stage of the current rerun. A no-op when profiling is off or outside a rerun."""
+    rerun = _current.get()
+    return rerun.stage(name) if rerun is not None else nullcontext()
@@ -0,0 +1,96 @@
+"""
+Crawler Benchmark:
+Runs the production crawl mode of website-crawler.py against the local static-site fixture server and
+reports pages per second, plus the memory used by the seen-URL Bloom filter compared with a plain set of
+the same URLs. Crawlee storage is kept in memory so the numbers measure crawling, not disk writes. The
+growth of the process peak RSS during the crawl is reported as well: the Bloom filter is fixed, the request
+queue held by crawlee is not.
+
+Usage:
+    python benchmarks/bench_crawler.py --pages 2000 --max-concurrency 50 --per-domain-concurrency 50
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("CRAWLEE_PERSIST_STORAGE", "false")
+# crawlee purges and touches its storage folder on start, keep it away from the one of the real crawler
+os.environ.setdefault("CRAWLEE_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "bench-crawler-storage"))
+
+from crawl_frontier import BloomFilter  # noqa: E402
+from static_site_server import start_server  # noqa: E402
+
+
+def load_crawler_module():
+    spec = importlib.util.spec_from_file_location("website_crawler", os.path.join(ROOT, "website-crawler.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (ru_maxrss is in KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def set_memory(urls):
+    return sys.getsizeof(urls) + sum(sys.getsizeof(url) for url in urls)
+
+
+async def run(args):
+    server, base_url = start_server(args.pages)
+    website_crawler = load_crawler_module()
+    crawler, seen = website_crawler.build_production_crawler(
+        [base_url + "/"],
+        max_concurrency=args.max_concurrency,
+        per_domain_concurrency=args.per_domain_concurrency,
+        seen_capacity=args.seen_capacity,
+        push_data=not args.no_push,
+        extractor=args.extractor,
+    )
+    peak_before = peak_rss()
+    started = time.perf_counter()
+    stats = await crawler.run([base_url + "/"])
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    pages = stats.requests_finished
+    growth = peak_rss() - peak_before
+    print(f"crawled {pages} pages in {elapsed:.1f}s ({pages / elapsed:.1f} pages/s)")
+    print(f"peak RSS grew by {growth / (1024 * 1024):.1f} MB during the crawl ({growth / max(pages, 1) / 1024:.1f} KB/page)")
+    print(f"seen-URL filter: {seen.count} URLs in {seen.memory_bytes / 1024:.0f} KB (fixed, sized for {args.seen_capacity:,})")
+
+    # what the same URLs would cost in a Python set, extrapolated to the filter capacity
+    urls = {f"{base_url}/page/{i}.html" for i in range(min(args.pages, 100_000))}
+    per_url = set_memory(urls) / len(urls)
+    print(f"plain set: ~{per_url:.0f} bytes/URL, ~{per_url * args.seen_capacity / (1024 * 1024):.0f} MB for {args.seen_capacity:,} URLs")
+    bloom = BloomFilter(args.seen_capacity)
+    print(f"Bloom filter: {bloom.memory_bytes / (1024 * 1024):.1f} MB for {args.seen_capacity:,} URLs at 1% false positives")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--max-concurrency", type=int, default=50)
+    parser.add_argument("--per-domain-concurrency", type=int, default=50)
+    parser.add_argument("--seen-capacity", type=int, default=1_000_000)
+    parser.add_argument("--extractor", default="lxml", help="page extraction backend (bs4, lxml, selectolax)")
+    parser.add_argument("--no-push", action="store_true", help="skip pushing records to the dataset")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
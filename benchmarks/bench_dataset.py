@@ -0,0 +1,107 @@
+"""
+Crawl Dataset Benchmark:
+Stores the same crawl records as one pretty-printed JSON file per record (the layout crawlee's dataset
+writes) and as compressed shards (crawl_dataset.py), then compares write time, files and bytes on disk,
+a full scan and random-access reads.
+
+Usage:
+    python benchmarks/bench_dataset.py --records 100000
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawl_dataset import ShardReader, ShardWriter, folder_bytes  # noqa: E402
+from page_extract import extract_lxml  # noqa: E402
+from static_site_server import render_page  # noqa: E402
+
+
+def make_records(count):
+    # a few hundred distinct pages, with the url and title varied per record
+    templates = [extract_lxml(render_page(i, 1000).decode("utf-8"), "")[0] for i in range(200)]
+    for i in range(count):
+        record = dict(templates[i % len(templates)])
+        record["url"] = f"https://example.com/page/{i}.html"
+        record["title"] = f"Fixture page {i}"
+        yield record
+
+
+def timed(label, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"  {label:<22} {time.perf_counter() - started:8.2f}s")
+    return result
+
+
+def bench_json_files(records, folder, samples):
+    def write():
+        for i, record in enumerate(records):
+            with open(os.path.join(folder, f"{i + 1:09d}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2)
+
+    def scan():
+        count = 0
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                json.load(f)
+            count += 1
+        return count
+
+    def lookup():
+        for i in samples:
+            with open(os.path.join(folder, f"{i + 1:09d}.json"), "r", encoding="utf-8") as f:
+                json.load(f)
+
+    print("one JSON file per record:")
+    timed("write", write)
+    timed("full scan", scan)
+    timed(f"{len(samples)} random reads", lookup)
+    print(f"  {len(os.listdir(folder))} files, {folder_bytes(folder) / (1024 * 1024):.1f} MB")
+
+
+def bench_shards(records, folder, samples):
+    def write():
+        with ShardWriter(folder) as writer:
+            for record in records:
+                writer.write(record)
+
+    def scan():
+        with ShardReader(folder) as reader:
+            return sum(1 for _ in reader)
+
+    def lookup():
+        with ShardReader(folder) as reader:
+            for i in samples:
+                reader[i]
+
+    print("compressed shards:")
+    timed("write", write)
+    timed("full scan", scan)
+    timed(f"{len(samples)} random reads", lookup)
+    print(f"  {len(os.listdir(folder))} files, {folder_bytes(folder) / (1024 * 1024):.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+
+    records = list(make_records(args.records))
+    samples = random.Random(0).sample(range(args.records), min(args.samples, args.records))
+    with tempfile.TemporaryDirectory() as json_folder, tempfile.TemporaryDirectory() as shard_folder:
+        bench_json_files(records, json_folder, samples)
+        bench_shards(records, shard_folder, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Page Extraction Benchmark:
+Compares the crawler's extraction backends (page_extract.EXTRACTORS) on fixture pages: pages per second
+of extraction alone, and bytes stored per record (records are stored as indented JSON by crawlee).
+Pass --html-dir to benchmark saved real-world pages instead of the synthetic fixture pages.
+
+Usage:
+    python benchmarks/bench_extraction.py --pages 500
+    python benchmarks/bench_extraction.py --html-dir ./saved_pages
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from page_extract import EXTRACTORS  # noqa: E402
+from static_site_server import render_page  # noqa: E402
+
+
+def load_pages(args):
+    if args.html_dir:
+        pages = []
+        for name in sorted(os.listdir(args.html_dir)):
+            with open(os.path.join(args.html_dir, name), "r", encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+        return pages
+    return [render_page(i, args.pages).decode("utf-8") for i in range(args.pages)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--html-dir", help="folder of saved .html pages to use instead of fixture pages")
+    args = parser.parse_args()
+    pages = load_pages(args)
+
+    for name, extract in EXTRACTORS.items():
+        try:
+            started = time.perf_counter()
+            records = [extract(html, f"https://example.com/{i}")[0] for i, html in enumerate(pages)]
+            elapsed = time.perf_counter() - started
+        except ImportError as e:
+            print(f"{name:<11} skipped ({e})")
+            continue
+        stored = sum(len(json.dumps(record, indent=2).encode("utf-8")) for record in records)
+        print(f"{name:<11} {len(pages) / elapsed:9.1f} pages/s   {stored / len(records):9.0f} bytes/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+API Gateway Load Benchmark:
+Load tests api_gateway.py against the local stand-in server. The gateway runs under uvicorn in this process
+with a given worker pool size, and a number of concurrent clients send chat requests, streamed (SSE) or
+plain JSON. Reports requests per second, latency percentiles, the time to the first streamed event, how many
+requests were turned away with 503 because the pool's queue was full and how many failed to connect. A pool
+of one worker behaves like the single-user Streamlit apps, which run one model call at a time.
+
+Usage:
+    python benchmarks/bench_gateway.py --requests 200 --clients 64 --latency 0.5 --workers 1 8 32 64
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from standin_server import start_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "benchmark question"}]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gateway(create_app, workers, max_pending):
+    """Run the gateway under uvicorn in a daemon thread. Returns (server, base_url)."""
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(workers, max_pending), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def one_request(client, url, stream):
+    """Returns (status, seconds to the first event or the response, total seconds). Status is None on connection errors."""
+    started = time.perf_counter()
+    try:
+        return await _send(client, url, stream, started)
+    except httpx.TransportError:
+        return None, None, time.perf_counter() - started
+
+
+async def _send(client, url, stream, started):
+    payload = {"messages": MESSAGES, "stream": stream}
+    if not stream:
+        response = await client.post(url, json=payload)
+        elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, elapsed
+    first = None
+    async with client.stream("POST", url, json=payload) as response:
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("event:"):
+                first = time.perf_counter() - started
+    return response.status_code, first, time.perf_counter() - started
+
+
+async def load(base_url, requests, clients, stream):
+    url = base_url + "/v1/chat"
+    results = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client_loop(client):
+        while not queue.empty():
+            queue.get_nowait()
+            results.append(await one_request(client, url, stream))
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        return results, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=64, help="concurrent client connections")
+    parser.add_argument("--latency", type=float, default=0.5, help="stand-in seconds per API call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--max-pending", type=int, default=256, help="queued calls before the gateway answers 503")
+    parser.add_argument("--no-stream", action="store_true", help="plain JSON responses instead of SSE")
+    args = parser.parse_args()
+
+    server, openai_url = start_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    os.environ["OPENAI_API_KEY"] = "stand-in"
+    from api_gateway import create_app
+
+    stream = not args.no_stream
+    print(f"{args.requests} {'SSE' if stream else 'JSON'} chat requests from {args.clients} clients, "
+          f"stand-in latency {args.latency:.2f}s")
+    print(f"{'workers':>8} {'req/s':>8} {'p50':>8} {'p95':>8} {'first p50':>10} {'503s':>6} {'errors':>7}")
+    for workers in args.workers:
+        gateway, base_url = start_gateway(create_app, workers, args.max_pending)
+        results, elapsed = asyncio.run(load(base_url, args.requests, args.clients, stream))
+        gateway.should_exit = True
+        ok = [result for result in results if result[0] == 200]
+        totals = [total for _, _, total in ok]
+        firsts = [first for _, first, _ in ok if first is not None]
+        print(f"{workers:>8} {len(ok) / elapsed:>8.1f} {statistics.median(totals) if totals else float('nan'):>7.2f}s "
+              f"{percentile(totals, 0.95):>7.2f}s {statistics.median(firsts) if firsts else float('nan'):>9.2f}s "
+              f"{sum(status == 503 for status, _, _ in results):>6} {sum(status is None for status, _, _ in results):>7}")
+        time.sleep(0.2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Batch Image Generation Benchmark:
+Measures images per minute of the batch generation queue (image_batch.run_batch) against the local
+stand-in server for a range of worker counts. Each job performs the same calls as generate-images.py:
+an images.generate request followed by a download of the returned URL.
+
+Usage:
+    python benchmarks/bench_image_batch.py --images 24 --latency 2.0 --workers 1 2 4 8
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+
+import requests
+from openai import OpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_batch import BatchStats, build_jobs, run_batch  # noqa: E402
+from standin_server import start_server  # noqa: E402
+
+
+def make_worker(client, output_dir):
+    def worker(job):
+        response = client.images.generate(
+            model="dall-e-3", prompt=job["prompt"], size=job["size"], quality=job["quality"],
+            style=job["style"], n=1, response_format="url",
+        )
+        image_path = os.path.join(output_dir, uuid.uuid4().hex)
+        with open(image_path, "wb") as image_file:
+            image_file.write(requests.get(response.data[0].url).content)
+        return image_path
+    return worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, failure_rate=args.failure_rate)
+    # retries are handled by the batch queue, not the client
+    client = OpenAI(api_key="stand-in", base_url=base_url, max_retries=0)
+    prompts = [f"benchmark prompt {i}" for i in range(args.images)]
+    jobs = build_jobs(prompts, ["1024x1024"], ["standard"], ["vivid"])
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for max_workers in args.workers:
+            stats = BatchStats(len(jobs))
+            for _, _, error, attempts in run_batch(jobs, make_worker(client, output_dir), max_workers, retries=2, backoff=0.1):
+                stats.record(error, attempts)
+            print(f"workers={max_workers:<3} {stats.summary()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Market Data Cache Benchmark:
+Loads N tickers through market_data.MarketDataStore backed by an offline FixtureSource with synthetic
+OHLCV data, and reports the cold (empty cache), warm (fully cached) and incremental (range extended)
+load times together with the number of batched source calls.
+
+Usage:
+    python benchmarks/bench_market_data.py --tickers 50 --years 10
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from market_data import FixtureSource, MarketDataStore  # noqa: E402
+
+
+def synthetic_frames(tickers, start, end, seed=42):
+    """Random-walk OHLCV frames on business days, one per ticker."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, end)
+    frames = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        frames[ticker] = pd.DataFrame(
+            {
+                "Open": close * (1 + rng.normal(0, 0.002, len(index))),
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": rng.integers(1_000_000, 10_000_000, len(index)),
+            },
+            index=index,
+        )
+    return frames
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<12} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    end = pd.Timestamp("2024-09-01")
+    start = end - pd.DateOffset(years=args.years)
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    source = FixtureSource(synthetic_frames(tickers, start - pd.DateOffset(years=1), end))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = MarketDataStore(cache_dir, source)
+        timed("cold", lambda: store.get(tickers, start, end))
+        timed("warm", lambda: store.get(tickers, start, end))
+        timed("incremental", lambda: store.get(tickers, start - pd.DateOffset(months=6), end))
+    print(f"source calls: {len(source.calls)} (one batched call per missing range)")
+
+
+if __name__ == "__main__":
+    main()
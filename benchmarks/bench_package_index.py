@@ -0,0 +1,60 @@
+"""
+Package Index Benchmark:
+Resolves the latest versions of a 200-package requirements file against the local simple index stand-in
+(benchmarks/simple_index_server.py): one lookup at a time like the original script, with the bounded worker
+pool on a cold cache, again on the warm cache, and from an offline wheelhouse folder. Every result is
+checked against the versions the stand-in serves.
+
+Usage:
+    python benchmarks/bench_package_index.py --packages 200 --latency 0.2 --workers 16
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_index import IndexCache, SimpleIndexSource, WheelhouseSource, read_requirements, resolve_latest  # noqa: E402
+from simple_index_server import latest_release, start_server, write_requirements, write_wheelhouse  # noqa: E402
+
+
+def timed_resolve(label, requirements, source, cache, workers):
+    started = time.perf_counter()
+    results = resolve_latest(requirements, source, cache=cache, max_workers=workers)
+    elapsed = time.perf_counter() - started
+    wrong = sum(result.latest != latest_release(int(result.requirement.name.split("-")[1])) for result in results)
+    print(f"{label:<28} {elapsed:6.2f}s  ({len(results) - wrong}/{len(results)} correct)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--packages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per index request")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    server, index_url = start_server(args.packages, latency=args.latency)
+    with tempfile.TemporaryDirectory() as folder:
+        requirements_path = os.path.join(folder, "requirements.txt")
+        write_requirements(requirements_path, args.packages)
+        requirements = read_requirements(requirements_path)
+        source = SimpleIndexSource(index_url)
+        cache = IndexCache(os.path.join(folder, "cache"))
+
+        timed_resolve("serial, no cache", requirements, source, None, 1)
+        timed_resolve(f"{args.workers} workers, cold cache", requirements, source, cache, args.workers)
+        timed_resolve(f"{args.workers} workers, warm cache", requirements, source, cache, args.workers)
+
+        wheelhouse = os.path.join(folder, "wheels")
+        write_wheelhouse(wheelhouse, args.packages)
+        timed_resolve("wheelhouse (offline)", requirements, WheelhouseSource(wheelhouse), None, args.workers)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Incremental Recrawl Benchmark:
+Crawls the static-site fixture twice with the incremental production mode of website-crawler.py: a first
+full crawl fills the crawl state, then a part of the pages gets a new revision and the site is crawled
+again. Reports both wall times and the pages skipped, bytes avoided and time saved by the second run.
+Use --no-validators to measure a server without ETag/Last-Modified, where only the content hash helps.
+
+Usage:
+    python benchmarks/bench_recrawl.py --pages 2000 --changed 0.1
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("CRAWLEE_PERSIST_STORAGE", "false")
+
+from bench_crawler import load_crawler_module  # noqa: E402
+from crawlee.storages import RequestQueue  # noqa: E402
+from crawl_state import CrawlState  # noqa: E402
+from static_site_server import start_server  # noqa: E402
+
+
+async def crawl(website_crawler, base_url, state, args):
+    crawler, _ = website_crawler.build_production_crawler(
+        [base_url + "/"],
+        max_concurrency=args.max_concurrency,
+        per_domain_concurrency=args.max_concurrency,
+        extractor=args.extractor,
+        state=state,
+    )
+    started = time.perf_counter()
+    stats = await crawler.run([base_url + "/"])
+    elapsed = time.perf_counter() - started
+    # both runs share the process, drop the handled requests so the second run starts from scratch
+    await (await RequestQueue.open()).drop()
+    return stats.requests_finished, elapsed
+
+
+async def run(args):
+    website_crawler = load_crawler_module()
+    revisions = {}
+    server, base_url = start_server(args.pages, revisions=revisions, validators=not args.no_validators)
+    with tempfile.TemporaryDirectory() as folder:
+        state_path = os.path.join(folder, "crawl_state.db")
+
+        state = CrawlState(state_path)
+        pages, elapsed = await crawl(website_crawler, base_url, state, args)
+        state.close()
+        print(f"full crawl:        {pages} pages in {elapsed:.2f}s")
+
+        # the handler class reads this dict, so changed pages are served with new content from now on
+        step = max(1, round(1 / args.changed)) if args.changed else 0
+        if step:
+            revisions.update({index: 1 for index in range(0, args.pages, step)})
+
+        state = CrawlState(state_path)
+        pages, elapsed = await crawl(website_crawler, base_url, state, args)
+        state.close()
+        print(f"incremental crawl: {pages} pages in {elapsed:.2f}s ({len(revisions)} pages changed on the site)")
+        print(state.stats.summary())
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--changed", type=float, default=0.1, help="fraction of pages changed before the second crawl")
+    parser.add_argument("--max-concurrency", type=int, default=50)
+    parser.add_argument("--extractor", default="lxml")
+    parser.add_argument("--no-validators", action="store_true", help="serve pages without ETag/Last-Modified")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Image Renditions Benchmark:
+Measures how long the social media renditions (image_renditions.py) of a batch of DALL-E sized images take:
+rendered one image after another in this process, by the process pool for a range of worker counts, and
+again once they are cached by source hash. The fixture images are noisy gradients in the three DALL-E sizes,
+which compress about as badly as generated pictures.
+
+Usage:
+    python benchmarks/bench_renditions.py --images 12 --workers 1 2 4
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_renditions import RENDITIONS, RenditionStore, render_renditions, source_hash  # noqa: E402
+
+SIZES = [(1024, 1024), (1024, 1792), (1792, 1024)]
+
+
+def make_images(folder, count):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        width, height = SIZES[i % len(SIZES)]
+        gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None] * rng.random(3, dtype=np.float32)
+        noise = rng.normal(0, 24, (height, width, 3)).astype(np.float32)
+        pixels = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+        path = os.path.join(folder, f"image_{i}.png")
+        Image.fromarray(pixels).save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_images(folder, args.images)
+        all_specs = [spec for specs in RENDITIONS.values() for spec in specs]
+        print(f"{args.images} images, {len(all_specs)} renditions each, {os.cpu_count()} CPUs")
+
+        started = time.perf_counter()
+        for path in paths:
+            render_renditions(path, os.path.join(folder, "serial", source_hash(path)), all_specs)
+        serial = time.perf_counter() - started
+        print(f"{'serial':<12} {serial:>7.2f}s {args.images / serial * 60:>8.1f} images/minute")
+
+        for max_workers in args.workers:
+            store = RenditionStore(os.path.join(folder, f"pool-{max_workers}"), max_workers)
+            # start the worker processes before timing, like a running app after its first image
+            store._pool().submit(time.sleep, 0).result()
+            started = time.perf_counter()
+            for future in [store.submit(path) for path in paths]:
+                future.result()
+            elapsed = time.perf_counter() - started
+            print(f"{f'workers={max_workers}':<12} {elapsed:>7.2f}s {args.images / elapsed * 60:>8.1f} images/minute "
+                  f"({serial / elapsed:.1f}x serial)")
+
+            started = time.perf_counter()
+            cached = [store.submit(path) for path in paths]
+            print(f"{'  cached':<12} {time.perf_counter() - started:>7.2f}s ({sum(f is None for f in cached)}/{len(paths)} hits)")
+            store.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Retrieval Benchmark:
+Builds a page_retrieval index over a synthetic corpus of N chunks, then measures
+index build time, disk size and query latency for exact search and for the IVF coarse quantizer at several
+nprobe values. Queries are word samples of random chunks, so the hit rate (source chunk in the top k) and
+the IVF recall against exact search are reported too.
+
+Usage:
+    python benchmarks/bench_retrieval.py --chunks 1000000 --lists 1024
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from page_retrieval import RetrievalIndex, build_index  # noqa: E402
+
+VOCABULARY = 50_000
+TOPIC_WORDS = 100
+
+
+def synthetic_chunks(count, words_per_chunk, topics, seed=0):
+    # like pages of a real site, every chunk is about one topic: half of its words come from the topic's
+    # own vocabulary, the other half are Zipf-distributed common words
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i}" for i in range(VOCABULARY)])
+    topic_vocabularies = rng.integers(0, VOCABULARY, size=(topics, TOPIC_WORDS))
+    topic_part = words_per_chunk // 2
+    for start in range(0, count, 10_000):
+        size = min(10_000, count - start)
+        chunk_topics = rng.integers(0, topics, size=size)
+        topic_ids = topic_vocabularies[chunk_topics[:, None], rng.integers(0, TOPIC_WORDS, size=(size, topic_part))]
+        common_ids = (rng.zipf(1.3, size=(size, words_per_chunk - topic_part)) - 1) % VOCABULARY
+        for offset, row in enumerate(np.concatenate([topic_ids, common_ids], axis=1)):
+            yield {"url": f"https://example.com/page/{(start + offset) // 4}.html", "title": "",
+                   "text": " ".join(vocabulary[row])}
+
+
+def folder_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=60, help="words per chunk")
+    parser.add_argument("--topics", type=int, default=1000, help="distinct topics in the synthetic corpus")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimensions")
+    parser.add_argument("--lists", type=int, default=1024, help="IVF lists (0 to skip IVF)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        build_index(synthetic_chunks(args.chunks, args.words, args.topics), directory, dim=args.dim, lists=args.lists)
+        print(f"build: {args.chunks:,} chunks in {time.perf_counter() - started:.1f}s, "
+              f"{folder_size(directory) / (1024 * 1024):.0f} MB on disk")
+
+        index = RetrievalIndex(directory)
+        rng = np.random.default_rng(1)
+        targets = rng.choice(args.chunks, size=args.queries, replace=False)
+        queries = []
+        for target in targets:
+            words = index.chunks[int(target)]["text"].split()
+            queries.append(" ".join(rng.choice(words, size=min(8, len(words)), replace=False)))
+
+        def run(nprobe):
+            results = []
+            started = time.perf_counter()
+            for query in queries:
+                results.append(set(index.search_ids(query, args.k, nprobe)[0].tolist()))
+            latency = (time.perf_counter() - started) / len(queries) * 1000
+            hits = sum(int(target) in result for target, result in zip(targets, results)) / len(queries)
+            return results, latency, hits
+
+        exact, latency, hits = run(None)
+        print(f"exact:       {latency:7.1f} ms/query, hit rate@{args.k} {hits:.2f}")
+        for nprobe in (1, 4, 16, 64, 256):
+            if not args.lists or nprobe > args.lists:
+                break
+            results, latency, hits = run(nprobe)
+            recall = np.mean([len(a & b) / max(len(b), 1) for a, b in zip(results, exact)])
+            print(f"ivf nprobe={nprobe:<3}{latency:7.1f} ms/query, hit rate@{args.k} {hits:.2f}, recall vs exact {recall:.2f}")
+        index.chunks.close()
+
+
+if __name__ == "__main__":
+    main()
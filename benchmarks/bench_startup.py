@@ -0,0 +1,119 @@
+"""
+Streamlit Startup Benchmark:
+Measures the cold start and the per-rerun overhead of every Streamlit app in the repository. Each app runs
+headless through streamlit's AppTest in a fresh interpreter started with `-X importtime`: the first script
+run is the cold start (imports, clients, cached resources), the median of the following runs is the rerun
+overhead, and the import log names the heaviest modules the app pulled in on its first run. The OpenAI
+client is pointed at the local stand-in server, so no network access or API key is needed.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --apps ChatGPT.py Content-summarizer.py --reruns 10
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from standin_server import start_server  # noqa: E402
+
+APPS = [
+    "Anthropic-Post-Generator.py",
+    "ChatGPT.py",
+    "Claude-ChatBot.py",
+    "Content-summarizer.py",
+    "Stream-response-example.py",
+    "code-assistant.py",
+    "generate-images.py",
+    "generate-posts-for-socialmedia.py",
+    "stock-analysis-usingGPT.py",
+    "text-to-speech.py",
+]
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+RUNNER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+print("-- app start --", file=sys.stderr, flush=True)
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+started = time.perf_counter()
+app.run()
+cold = time.perf_counter() - started
+print("-- app end --", file=sys.stderr, flush=True)
+reruns = []
+for _ in range(int(sys.argv[2])):
+    started = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - started)
+reruns.sort()
+errors = [str(e.message) for e in app.exception]
+print(json.dumps({"cold": cold, "rerun": reruns[len(reruns) // 2] if reruns else None, "errors": errors}))
+"""
+
+
+def heaviest_imports(log, count):
+    """Top-level modules imported during the first app run, by cumulative import time."""
+    inside, modules = False, []
+    for line in log.splitlines():
+        if line.startswith("-- app start"):
+            inside = True
+        elif line.startswith("-- app end"):
+            break
+        elif inside:
+            match = IMPORT_LINE.match(line)
+            # the log is nested by indentation, one space per level below the top level
+            if match and len(match.group(3)) == 1:
+                modules.append((int(match.group(2)), match.group(4)))
+    modules.sort(reverse=True)
+    return modules[:count], sum(us for us, _ in modules)
+
+
+def measure(app, reruns, env):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUNNER, app, str(reruns)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode or not lines:
+        return None, completed.stderr.strip().splitlines()[-1:]
+    return json.loads(lines[-1]), heaviest_imports(completed.stderr, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--apps", nargs="*", default=APPS)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=0.0)
+    env = dict(os.environ, OPENAI_API_KEY="sk-standin", OPENAI_BASE_URL=base_url, ANTHROPIC_API_KEY="sk-standin")
+    results = {}
+    print(f"{'app':<36} {'cold start':>10} {'rerun':>9} {'app imports':>12}  heaviest imports")
+    for app in args.apps:
+        result, imports = measure(app, args.reruns, env)
+        if result is None:
+            print(f"{app:<36} failed: {' '.join(imports)}")
+            continue
+        heaviest, total = imports
+        names = ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in heaviest)
+        rerun = f"{result['rerun'] * 1000:7.1f}ms" if result["rerun"] is not None else "-"
+        print(f"{app:<36} {result['cold']:9.2f}s {rerun:>9} {total / 1000:10.0f}ms  {names}")
+        if result["errors"]:
+            print(f"{'':<36} app error: {result['errors'][0][:100]}")
+        results[app] = dict(result, import_ms=total / 1000, heaviest=[[name, us / 1000] for us, name in heaviest])
+    server.shutdown()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Stock Prompt Benchmark:
+Compares the prompt the stock analysis app used to send (the whole weekly price table) with the compact
+summary produced by stock_analytics, in prompt tokens, and times the vectorized statistics for N tickers.
+
+Usage:
+    python benchmarks/bench_stock_prompt.py --tickers 50 --years 3
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import tiktoken
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_analytics import compute_statistics, format_summary  # noqa: E402
+from bench_market_data import synthetic_frames  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    end = pd.Timestamp("2024-09-01")
+    start = end - pd.DateOffset(years=args.years)
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    # every 5th business day, like the app's 5d interval
+    market_data = {ticker: frame.iloc[::5] for ticker, frame in synthetic_frames(tickers, start, end).items()}
+
+    started = time.perf_counter()
+    statistics = compute_statistics(market_data)
+    elapsed = time.perf_counter() - started
+    print(f"statistics for {len(statistics)} tickers: {elapsed * 1000:.1f} ms")
+
+    encoding = tiktoken.encoding_for_model("gpt-4")
+    ticker = tickers[0]
+    table_tokens = len(encoding.encode(market_data[ticker].to_string()))
+    summary_tokens = len(encoding.encode(format_summary(ticker, statistics[ticker])))
+    print(f"prompt data tokens per ticker: table={table_tokens} summary={summary_tokens} "
+          f"({table_tokens / summary_tokens:.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Batch Summarization Benchmark:
+Measures documents per minute of the batch summarization queue (summary_batch.run_summary_batch) against the
+local stand-in server for a range of worker counts. Each job does what the batch mode of Content-summarizer.py
+does per document: text extraction of a synthetic PDF and a chat completion with the summary prompt. The time
+to write the bulk DOCX and PPTX archive is reported once at the end.
+
+Usage:
+    python benchmarks/bench_summary_batch.py --documents 24 --pages 10 --latency 2.0 --workers 1 4 8 16
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from openai import OpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from microbench import make_pdf  # noqa: E402
+from standin_server import start_server  # noqa: E402
+from summary_batch import SummaryBatchStats, bulk_outputs, run_summary_batch, summarize_document  # noqa: E402
+
+
+def make_summarize_text(client):
+    def summarize_text(text, model, prompt):
+        response = client.chat.completions.create(
+            model=model, messages=[{"role": "system", "content": prompt}, {"role": "user", "content": text}],
+        )
+        return response.choices[0].message.content
+    return summarize_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=24)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, failure_rate=args.failure_rate)
+    # retries are handled by the batch queue, not the client
+    summarize_text = make_summarize_text(OpenAI(api_key="stand-in", base_url=base_url, max_retries=0))
+    pdf = make_pdf(args.pages)
+
+    summaries = []
+    for max_workers in args.workers:
+        documents = [(f"report-{i}", io.BytesIO(pdf)) for i in range(args.documents)]
+        stats = SummaryBatchStats(len(documents))
+        summaries = []
+        batch = run_summary_batch(documents, lambda file: summarize_document(summarize_text, file, "gpt-4o", args.pages),
+                                  max_workers, retries=2, backoff=0.1)
+        for name, result, error in batch:
+            stats.record(result, error)
+            if error is None:
+                summaries.append((name, result["summary"]))
+        print(f"workers={max_workers:<3} {stats.summary()}")
+    server.shutdown()
+
+    started = time.perf_counter()
+    archive = bulk_outputs(summaries, ["DOCX", "PPTX"])
+    print(f"bulk DOCX+PPTX output for {len(summaries)} documents: {time.perf_counter() - started:.2f}s, "
+          f"{len(archive) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Microbenchmark Suite:
+Times the local work the apps do between model calls, on fixed synthetic fixtures, and compares the results
+with a stored baseline so a change that makes one of these code paths slower shows up as a regression.
+
+Cases:
+- pdf_extract: text of a 20-page PDF (document_summary.extract_pdf_text, Content-Summarizer).
+- prompt_stock / prompt_code / prompt_post: prompt building for stock analysis, code conversion and posts.
+- token_count / code_preprocess: tiktoken counting and Code-Assistant preprocessing (skipped when the
+  tiktoken encoding cannot be loaded, e.g. offline without a cache).
+- ocr_prepare: decode and re-encode of an uploaded image to the temp file tesseract reads (pytesseract).
+- post_store_load / post_store_append: the JSON post store of Anthropic-Post-Generator with 1000 posts.
+- stream_render: word-by-word streaming of a response as SSE events (api_gateway).
+- crawl_extract_bs4 / _lxml / _selectolax: page_extract backends on fixture pages.
+- stock_statistics: stock_analytics.compute_statistics for 50 tickers over 3 years.
+- semantic_cache_lookup: a reworded query against a full response cache of 1000 answers (ChatGPT).
+
+Every case is warmed up, then run in loops of at least --min-time seconds, --repeat times. The median loop is
+compared with the baseline median, within a noise band of --threshold or the spread of the loops (fastest to
+slowest, relative to the median) of either run, whichever is larger. A case outside the band is measured
+again --confirm times and only counts as a regression when every measurement is outside the band. The
+baseline records the Python version and platform it was measured on; compare on the same machine.
+
+Usage:
+    python benchmarks/microbench.py                          # run and compare with the baseline
+    python benchmarks/microbench.py --cases pdf_extract prompt_stock
+    python benchmarks/microbench.py --save-baseline          # store the current results as the baseline
+
+The exit status is 1 when a case is a confirmed regression.
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microbench_baseline.json")
+WORDS = (
+    "market growth revenue cloud python model data stream summary analysis quarter product launch "
+    "customer energy design network policy travel portfolio volatility contract research release"
+).split()
+CASES = {}
+
+
+class Skip(Exception):
+    """Raised by a case setup when a dependency or fixture is not available here."""
+
+
+def case(name):
+    """Register setup() for a case. setup returns the zero-argument function that is timed."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def temp_dir():
+    """A temporary folder for case fixtures, removed when the suite exits."""
+    path = tempfile.mkdtemp(prefix="microbench-")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def sentences(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "." for _ in range(count)]
+
+
+def make_pdf(pages, lines_per_page=40):
+    """A minimal text PDF (Helvetica, one content stream per page), built without any PDF library."""
+    text = sentences(pages * lines_per_page)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = text[page * lines_per_page:(page + 1) * lines_per_page]
+        body = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = zlib.compress(body.encode("latin-1"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, content in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + content + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def python_source(functions=200, seed=0):
+    rng = random.Random(seed)
+    parts = ["import os\nimport sys\nfrom collections import defaultdict\n"]
+    for i in range(functions):
+        body = "\n".join(f"    # {rng.choice(WORDS)} {rng.choice(WORDS)}\n    value_{k} = {k} * {rng.randint(1, 9)}" for k in range(4))
+        parts.append(f"def function_{i}(argument):\n    \"\"\"{sentences(1, seed + i)[0]}\"\"\"\n{body}\n    return argument\n")
+    return "\n\n".join(parts)
+
+
+def stock_fixture(tickers=50, years=3):
+    import pandas as pd
+    from bench_market_data import synthetic_frames
+
+    end = pd.Timestamp("2024-09-01")
+    start = end - pd.DateOffset(years=years)
+    names = [f"T{i:03d}" for i in range(tickers)]
+    # every 5th business day, like the app's 5d interval
+    return {ticker: frame.iloc[::5] for ticker, frame in synthetic_frames(names, start, end).items()}
+
+
+@case("pdf_extract")
+def pdf_extract():
+    from document_summary import extract_pdf_text
+
+    data = make_pdf(20)
+    return lambda: extract_pdf_text(io.BytesIO(data), 20)
+
+
+@case("prompt_stock")
+def prompt_stock():
+    from stock_analytics import build_prompt, compute_statistics, format_summary
+
+    stats = compute_statistics(stock_fixture())
+    return lambda: [build_prompt(ticker, format_summary(ticker, values), "2021-09-01", "2024-09-01") for ticker, values in stats.items()]
+
+
+@case("prompt_code")
+def prompt_code():
+    from code_conversion import split_source, unit_prompt
+
+    source = python_source()
+
+    def build():
+        units, context = split_source(source)
+        return [unit_prompt(unit, index, len(units), context, "Python", "Java") for index, unit in enumerate(units)]
+    return build
+
+
+@case("prompt_post")
+def prompt_post():
+    from social_posts import PLATFORMS, build_post_prompt
+
+    topics = sentences(100)
+    return lambda: [build_post_prompt(PLATFORMS[i % len(PLATFORMS)], topic) for i, topic in enumerate(topics)]
+
+
+def _require_tiktoken():
+    try:
+        import tiktoken
+        tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        raise Skip(f"tiktoken encoding not available ({type(e).__name__})")
+
+
+@case("token_count")
+def token_count():
+    from code_preprocess import count_tokens
+
+    _require_tiktoken()
+    text = " ".join(sentences(1500))
+    return lambda: count_tokens(text)
+
+
+@case("code_preprocess")
+def code_preprocess():
+    from code_preprocess import preprocess
+
+    _require_tiktoken()
+    source = python_source()
+    return lambda: preprocess(source, "conversion", "fixture.py")
+
+
+@case("ocr_prepare")
+def ocr_prepare():
+    from PIL import Image, ImageDraw
+    from pytesseract.pytesseract import save
+
+    # a screenshot-like RGBA PNG of text, as users upload them
+    image = Image.new("RGBA", (1600, 1200), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for row, line in enumerate(sentences(60)):
+        draw.text((20, 20 + row * 19), line, fill=(20, 20, 20, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    data = buffer.getvalue()
+
+    def prepare():
+        # everything pytesseract does before it starts the tesseract process
+        with save(Image.open(io.BytesIO(data))) as (_, input_file):
+            return os.path.getsize(input_file)
+    return prepare
+
+
+def _post_store(directory, posts=1000):
+    from social_posts import append_post
+
+    path = os.path.join(directory, "posts.json")
+    for i, content in enumerate(sentences(posts)):
+        append_post(path, {"platform": "Twitter", "topic": f"topic {i}", "content": content, "timestamp": "2024-08-01T10:00:00"})
+    return path
+
+
+@case("post_store_load")
+def post_store_load():
+    from social_posts import load_posts
+
+    path = _post_store(temp_dir())
+    return lambda: load_posts(path)
+
+
+@case("post_store_append")
+def post_store_append():
+    from social_posts import append_post
+
+    directory = temp_dir()
+    template = _post_store(directory)
+    path = os.path.join(directory, "store.json")
+    post = {"platform": "Twitter", "topic": "new", "content": sentences(1)[0], "timestamp": "2024-08-02T10:00:00"}
+
+    def append():
+        # start from the same 1000 posts every time, so the store does not grow between loops
+        shutil.copyfile(template, path)
+        append_post(path, post)
+    return append
+
+
+@case("stream_render")
+def stream_render():
+    try:
+        from api_gateway import sse
+    except ImportError as e:
+        raise Skip(f"api_gateway dependencies missing ({e.name})")
+
+    response = " ".join(sentences(150))
+
+    def render():
+        return "".join(sse("delta", {"text": word + " "}) for word in response.split(" "))
+    return render
+
+
+def _crawl_case(backend):
+    def setup():
+        from page_extract import get_extractor
+        from static_site_server import render_page
+
+        try:
+            extract = get_extractor(backend)
+            pages = [(f"http://127.0.0.1/page/{i}.html", render_page(i, 500)) for i in range(50)]
+            extract(pages[0][1], pages[0][0])
+        except ImportError as e:
+            raise Skip(f"{backend} is not installed ({e.name})")
+        return lambda: [extract(html, url) for url, html in pages]
+    return setup
+
+
+for _backend in ("bs4", "lxml", "selectolax"):
+    case(f"crawl_extract_{_backend}")(_crawl_case(_backend))
+
+
+@case("stock_statistics")
+def stock_statistics():
+    from stock_analytics import compute_statistics
+
+    market_data = stock_fixture()
+    return lambda: compute_statistics(market_data)
+
+
+@case("semantic_cache_lookup")
+def semantic_cache_lookup():
+    from response_cache import SemanticCache
+
+    cache = SemanticCache(max_entries=1000)
+    for i, query in enumerate(sentences(1000, seed=1)):
+        cache.store(query, f"answer {i}", "gpt-4o|Friendly Chatbot")
+    query = "How do I " + sentences(1000, seed=1)[500].lower().rstrip(".") + "?"
+    return lambda: cache.lookup(query, "gpt-4o|Friendly Chatbot")
+
+
+def _loop(fn, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - started
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """Seconds per call: fastest and median of repeat loops, each loop running at least min_time, and the spread
+    of the loops relative to the median."""
+    fn()
+    number = 1
+    while (elapsed := _loop(fn, number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    times = [elapsed / number] + [_loop(fn, number) / number for _ in range(repeat - 1)]
+    median = statistics.median(times)
+    return {"min": min(times), "median": median, "spread": (max(times) - min(times)) / median, "loops": number}
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def noise_band(result, baseline, threshold):
+    """Relative change of the median that is still noise: threshold or the spread of either run."""
+    return max(threshold, result.get("spread", 0.0), baseline.get("spread", 0.0))
+
+
+def compare(result, baseline, threshold):
+    """(change, status) of a result's median against its baseline entry. status is "slower" outside the band."""
+    if baseline is None:
+        return None, "new"
+    change = result["median"] / baseline["median"] - 1
+    band = noise_band(result, baseline, threshold)
+    if change > band:
+        return change, "slower"
+    if change < -band:
+        return change, "faster"
+    return change, "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed loop")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.15, help="smallest slowdown of the median that is not noise")
+    parser.add_argument("--confirm", type=int, default=2, help="measurements that must repeat a slowdown")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print(f"note: baseline was measured on {baseline.get('environment')}, comparisons are indicative only")
+
+    results, regressions = {}, []
+    print(f"{'case':<24} {'min':>10} {'median':>10} {'baseline':>10} {'change':>8}  status")
+    for name in args.cases or CASES:
+        try:
+            fn = CASES[name]()
+        except Skip as e:
+            print(f"{name:<24} {'':>10} {'':>10} {'':>10} {'':>8}  skipped: {e}")
+            continue
+        result = measure(fn, args.repeat, args.min_time)
+        previous = baseline.get("cases", {}).get(name)
+        change, status = compare(result, previous, args.threshold)
+        for _ in range(args.confirm if status == "slower" else 0):
+            # a single slow run is often noise, the slowdown has to show up in every new measurement
+            result = measure(fn, args.repeat, args.min_time)
+            change, status = compare(result, previous, args.threshold)
+            if status != "slower":
+                status = "noise"
+                break
+        else:
+            if status == "slower":
+                status = "REGRESSION"
+                regressions.append(name)
+        results[name] = result
+        print(f"{name:<24} {format_seconds(result['min']):>10} {format_seconds(result['median']):>10} "
+              f"{format_seconds(previous['median']) if previous else '-':>10} "
+              f"{f'{change:+.0%}' if change is not None else '-':>8}  {status}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "cases": results}, f, indent=2)
+    if args.save_baseline:
+        # cases that were not run this time keep their stored baseline
+        cases = {**baseline.get("cases", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "cases": dict(sorted(cases.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
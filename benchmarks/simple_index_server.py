@@ -0,0 +1,116 @@
+"""
+Simple Index Stand-in Server:
+Serves a synthetic PEP 503 simple package index, so the library version checker can be measured without
+network access. Package i is called "package-i" and has a handful of releases (wheels and sdists, plus a
+pre-release that must be ignored); every request sleeps for a configurable latency to imitate a real index.
+It can also write the matching requirements file and an offline wheelhouse folder of empty files.
+
+Usage:
+    python benchmarks/simple_index_server.py --packages 200 --port 8767 --latency 0.2
+    python Get-latest-version-of-libraries.py --index-url http://127.0.0.1:8767/simple --requirements bench-requirements.txt
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def package_versions(index):
+    """Releases of package index, oldest first. The last one is a pre-release."""
+    major = 1 + index % 5
+    return [f"{major}.{minor}.{patch}" for minor in range(3) for patch in range(2)] + [f"{major + 1}.0.0rc1"]
+
+
+def latest_release(index):
+    return package_versions(index)[-2]
+
+
+def package_files(index):
+    name = f"package_{index}"
+    files = []
+    for version in package_versions(index):
+        files.append(f"{name}-{version}-py3-none-any.whl")
+        files.append(f"{name}-{version}.tar.gz")
+    return files
+
+
+def write_requirements(path, packages):
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(packages):
+            f.write(f"package-{index}=={package_versions(index)[0]}\n")
+
+
+def write_wheelhouse(directory, packages):
+    os.makedirs(directory, exist_ok=True)
+    for index in range(packages):
+        for filename in package_files(index):
+            open(os.path.join(directory, filename), "wb").close()
+
+
+class SimpleIndexHandler(BaseHTTPRequestHandler):
+    packages = 200
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["simple"]:
+            links = "".join(f'<a href="/simple/package-{i}/">package-{i}</a>\n' for i in range(self.packages))
+            self._send(200, f"<!DOCTYPE html><html><body>\n{links}</body></html>")
+            return
+        if len(parts) == 2 and parts[0] == "simple" and parts[1].startswith("package-"):
+            try:
+                index = int(parts[1][len("package-"):])
+            except ValueError:
+                index = -1
+            if 0 <= index < self.packages:
+                links = "".join(
+                    f'<a href="/files/{filename}#sha256={index:064x}">{filename}</a><br/>\n'
+                    for filename in package_files(index)
+                )
+                self._send(200, f"<!DOCTYPE html><html><body>\n<h1>Links for {parts[1]}</h1>\n{links}</body></html>")
+                return
+        self._send(404, "not found")
+
+
+def start_server(packages=200, port=0, latency=0.0):
+    """Start the stand-in index in a daemon thread. Returns (server, simple_index_url)."""
+    handler = type("ConfiguredSimpleIndexHandler", (SimpleIndexHandler,), {"packages": packages, "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/simple"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic PEP 503 simple index")
+    parser.add_argument("--packages", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to sleep per request")
+    parser.add_argument("--requirements", default="bench-requirements.txt", help="requirements file to write")
+    parser.add_argument("--wheelhouse", help="also write an offline wheelhouse folder")
+    args = parser.parse_args()
+    write_requirements(args.requirements, args.packages)
+    if args.wheelhouse:
+        write_wheelhouse(args.wheelhouse, args.packages)
+    server, index_url = start_server(args.packages, args.port, args.latency)
+    print(f"Simple index with {args.packages} packages on {index_url}/ (requirements in {args.requirements})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,165 @@
+"""
+Stand-in OpenAI Server:
+A small local HTTP server that mimics the OpenAI endpoints used by the apps in this repository, so
+throughput can be measured without network access or API costs. Responses are canned and every call
+sleeps for a configurable latency to imitate the real service.
+
+Endpoints:
+- POST /v1/images/generations : returns a URL to a generated (placeholder) PNG image.
+- POST /v1/chat/completions   : returns a canned answer, streamed as server-sent events with "stream": true.
+- POST /v1/audio/speech       : returns a few KB of placeholder audio bytes.
+- GET  /images/<name>.png     : serves the placeholder PNG image.
+
+Usage:
+    python benchmarks/standin_server.py --port 8765 --latency 2.0
+    then point the OpenAI client at http://127.0.0.1:8765/v1
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import json
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def placeholder_png(width=64, height=64):
+    """Build a small solid colour PNG without any imaging library."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x40\x80\xc0" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+CANNED_ANSWER = (
+    "This is a canned answer from the stand-in server. It is long enough to arrive in several streamed "
+    "chunks, so clients can measure the time to the first token as well as the total latency."
+)
+
+
+def completion(payload, content):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+        "model": payload.get("model", "stand-in"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def completion_chunk(payload, content, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-stand-in", "object": "chat.completion.chunk", "created": int(time.time()),
+        "model": payload.get("model", "stand-in"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    failure_rate = 0.0
+    png = placeholder_png()
+    _counter = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _should_fail(self):
+        # deterministic failures, every Nth request returns a 500 so retry paths can be exercised
+        if not self.failure_rate:
+            return False
+        with StandInHandler._lock:
+            StandInHandler._counter += 1
+            return StandInHandler._counter % round(1 / self.failure_rate) == 0
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, payload):
+        # the canned answer word by word, then the [DONE] marker. The connection is closed to end the body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        events = [completion_chunk(payload, word + " ") for word in CANNED_ANSWER.split(" ")]
+        events.append(completion_chunk(payload, None, "stop"))
+        for event in events:
+            self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+        if self._should_fail():
+            self._send_json(500, {"error": {"message": "stand-in failure", "type": "server_error"}})
+            return
+        if self.path.endswith("/images/generations"):
+            host, port = self.server.server_address[:2]
+            url = f"http://{host}:{port}/images/{uuid.uuid4().hex}.png"
+            self._send_json(200, {"created": int(time.time()), "data": [{"url": url, "revised_prompt": payload.get("prompt")}]})
+        elif self.path.endswith("/chat/completions") and payload.get("stream"):
+            self._send_stream(payload)
+        elif self.path.endswith("/chat/completions"):
+            self._send_json(200, completion(payload, CANNED_ANSWER))
+        elif self.path.endswith("/audio/speech"):
+            body = b"\xff\xfb" + payload.get("input", "").encode("utf-8")[:64].ljust(4094, b"\x00")
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": {"message": f"unknown endpoint {self.path}"}})
+
+    def do_GET(self):
+        if self.path.startswith("/images/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(self.png)))
+            self.end_headers()
+            self.wfile.write(self.png)
+        elif self.path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": []})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+
+def start_server(port=0, latency=0.0, failure_rate=0.0):
+    """Start the stand-in server in a daemon thread. Returns (server, base_url)."""
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {"latency": latency, "failure_rate": failure_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds to sleep per API call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of API calls that fail")
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, args.latency, args.failure_rate)
+    print(f"Stand-in OpenAI server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,125 @@
+"""
+Static Site Fixture Server:
+Serves a deterministic synthetic website for crawler benchmarks. Page i links to a handful of other pages
+(chosen by a fixed formula), carries a title, headings, navigation/footer boilerplate and a few paragraphs,
+and /robots.txt disallows the /private/ section. Pages are generated on the fly, so sites of any size cost
+no disk space. Pages carry an ETag and Last-Modified and answer conditional requests with 304; bumping the
+revision of some pages simulates a site that changed between two crawls.
+
+Usage:
+    python benchmarks/static_site_server.py --pages 10000 --port 8766
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROBOTS_TXT = b"User-agent: *\nDisallow: /private/\n"
+PARAGRAPH = (
+    "Injection molding is a manufacturing process for producing parts by injecting molten material into a mould. "
+    "It can be performed with a host of materials mainly including metals, glasses, elastomers and polymers. "
+)
+
+
+def render_page(index, pages, links_per_page=5, revision=0):
+    links = [(index * 7 + k * 13 + 1) % pages for k in range(links_per_page)]
+    anchors = "".join(f'<li><a href="/page/{link}.html">Page {link}</a></li>' for link in links)
+    return f"""<!DOCTYPE html>
+<html>
+<head><title>Fixture page {index}</title><script>var tracking = {index};</script><style>body {{ margin: 0; }}</style></head>
+<body>
+  <nav><ul><li><a href="/">Home</a></li><li><a href="/private/admin.html">Admin</a></li><li><a href="#top">Top</a></li></ul></nav>
+  <header><h1>Fixture page {index}</h1></header>
+  <main>
+    <h2>Section A of page {index}{f" (revision {revision})" if revision else ""}</h2>
+    <p>{PARAGRAPH * 3}</p>
+    <h3>
+        Details {index}
+    </h3>
+    <p>{PARAGRAPH * 2}</p>
+    <ul>{anchors}</ul>
+  </main>
+  <footer><p>Copyright fixture site. All rights reserved.</p><a href="/page/0.html">First page</a></footer>
+</body>
+</html>""".encode("utf-8")
+
+
+class StaticSiteHandler(BaseHTTPRequestHandler):
+    pages = 1000
+    revisions = {}
+    validators = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", revision=0):
+        if self.validators and status == 200:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        self.send_response(status)
+        if self.validators and status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(1_700_000_000 + revision * 86400, usegmt=True))
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_page(self, index):
+        revision = self.revisions.get(index, 0)
+        self._send(200, render_page(index, self.pages, revision=revision), revision=revision)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/robots.txt":
+            self._send(200, ROBOTS_TXT, "text/plain")
+        elif path == "/":
+            self._send_page(0)
+        elif path.startswith("/page/") and path.endswith(".html"):
+            try:
+                index = int(path[len("/page/"):-len(".html")])
+            except ValueError:
+                index = -1
+            if 0 <= index < self.pages:
+                self._send_page(index)
+            else:
+                self._send(404, b"not found", "text/plain")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+
+def start_server(pages=1000, port=0, handler=StaticSiteHandler, revisions=None, validators=True):
+    """Start the fixture site in a daemon thread. Returns (server, base_url).
+
+    revisions maps page index to a revision number (changed content), validators=False drops ETag/Last-Modified.
+    """
+    configured = type(
+        "ConfiguredStaticSiteHandler",
+        (handler,),
+        {"pages": pages, "revisions": revisions if revisions is not None else {}, "validators": validators},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), configured)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic static website for crawler benchmarks")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    server, base_url = start_server(args.pages, args.port)
+    print(f"Fixture site with {args.pages} pages on {base_url}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -6,7 +6,14 @@
 # parag.jn@gmail.com
 # August 2024
 
+import functools
 import streamlit as st
+import time
+from code_conversion import TruncatedResponse, complete, convert_units, split_source, stitch, strip_code_fence, unit_prompt
+from mermaid_flow import python_call_graph, python_flowchart, same_structure
+from code_preprocess import preprocess, shrink
+from code_batch import FileBatchStats, ResultArchive, ResultCache, read_uploaded_files, run_file_batch
+from app_profiling import stage, start_rerun
 
 # Streamlit application setup
 st.set_page_config(
@@ -21,17 +28,18 @@ st.set_page_config(
 
 # system variables
 MODEL = "gpt-4o-2024-08-06"
+CONVERSION_WORKERS = 4
+CODE_HIGHLIGHTING = {'Python': 'python', 'Java': 'java', 'SQL': 'sql', 'Node.js': 'javascript'}
+CODE_EXTENSIONS = {'Python': '.py', 'Java': '.java', 'SQL': '.sql', 'Node.js': '.js'}
+BATCH_WORKERS = 6
 
 # open ai connector
-from openai_client import OpenAIClient
-# Initialize OpenAI Client
-openai_client_obj = OpenAIClient()
-client = openai_client_obj.get_client()
+from openai_client import get_shared_client
 
 def run_LLM(prompt,role="You are a helpful assistant"):
-    response = client.chat.completions.create(
-    model=MODEL,
-    messages=[
+    # the client is created on the first request, not when the page loads
+    create = functools.partial(get_shared_client().chat.completions.create, model=MODEL, n=1)
+    messages = [
         {
             "role": "system", 
             "content": role
@@ -40,106 +48,243 @@ def run_LLM(prompt,role="You are a helpful assistant"):
             "role": "user", 
             "content": prompt
         }
-    ],
-    max_tokens=2500,
-    n=1,
-)
-    return response.choices[0].message
-
-
-# Set the title of the application
-st.title("A Coding Assitant")
-st.write("---")
-
-# Create a sidebar with a title
-st.sidebar.title("Select Option")
-st.sidebar.write("---")
-# Add radio buttons to the sidebar
-option = st.sidebar.radio(label="Select Option",options= ['None', 'DB Generator', 'Code Assistant'],label_visibility="hidden")
-
-# Logic for DB Generator
-if option == 'DB Generator':
-    col1,col2 = st.columns([3,10],gap="small",vertical_alignment="top")
-    with col1:
-        db_name = st.text_input(label="Provide with database name",value="",max_chars=50)
-    with col2:
-        entities = st.text_area(label="Provide with entities seperated by commas",value="", height=150,max_chars=400)
-    # Submit button
-    if st.button('Submit'):
-        st.warning("This feature will be added soon.. ")
-
-# Logic for Code Converter
-elif option == 'Code Assistant':
-    # File upload box that accepts only text files
-    uploaded_file = st.file_uploader(label="Upload the code in .txt file format...", type="txt")
-    # give more options
-    col3, col4, col5  = st.columns([3,3,10],gap="small",vertical_alignment="bottom")
-    with col3:
-        code_target = st.radio("What you need to do with code file?",options=['Display On Page','Generate Documentation','Generate Flow Diagram','Convert Code'])
-        if code_target == "Convert Code":
-            target_options = ['Python','Java','SQL','Node.js']
-            with col4:
-                target_code_language = st.selectbox("Select the Target Platform",target_options)
-    # Submit button
-    if st.button('Submit'):
-        if uploaded_file is not None:
-            file_content = uploaded_file.read().decode("utf-8")
-            if code_target == "Display On Page":
-                st.code(file_content)
-            elif code_target == "Generate Documentation":
-                role = "You are an expert in generating technical design documents"
-                prompt = f"""You have been provided with the code. 
-                        These are your tasks
-                        First: using the syntax, identify the code type - weather its python, script, SQL or something else
-                        Second: Generate a technical design document ensuring all important processes are documented in detail. 
-                        If the syntax identified is SQL then give a small description of each entity
-                        If the syntax identified is programming language like python, java, node.js, etc then give a small description of the program and a small description of each identified function. 
-                        
-                        Display the results as : 
-                        Identified Code is :
-                        Technical Documentation : 
-                        
-                        Ensure that document is properly indented and bulletted for better readibility and usability
-                        
-                        The code given is : {file_content}"""
-                model_response = run_LLM(prompt,role)
-                if model_response:
-                    st.markdown(model_response.content,unsafe_allow_html=True)
-            # lets generate a mermaid script first
-            elif code_target == "Generate Flow Diagram":
-                role = "You are an expert in generating mermaid script"
-                prompt = f"""You have been provided with the code. 
-                        These are your tasks
-                        First using the syntax, identify the code type - weather its python, script, SQL or something else
-                        Second, generate a mermid script to build the process flow by analyzing the code
-                        Display the results as : 
-                        Identified Code is :
-                        Mermaid Script to generate flow diagram is : 
-                        Ensure that there are no syntax errors in the generated script
-                        
-                        The code given is : {file_content}"""
-                model_response = run_LLM(prompt,role)
-                if model_response:
-                    st.markdown(model_response.content,unsafe_allow_html=True)
-                    st.markdown("Use the mermaid script can be copied to open-source tools like draw.io to generate the diagram.")
-            elif code_target == "Convert Code":
-                role = "You are an expert programmer"
-                prompt = f"""You have been provided with the code. 
-                        These are your tasks
-                        First using the syntax, identify the code type - weather its python, script, SQL or something else
-                        Convert the code in the target language {target_code_language}. If the source and target programming language is same, just display the code without any modifications
-                        If the conversion is not possible, display message that between identified source code language and target language, conversion is not possible. 
-                        Display the results as : 
-                        Identified Code is :
-                        Target Conversion is : {target_code_language}
-                        Converted Code is : 
-                        Where possible, add comments or helpful hints for easier understanding. 
-                        Ensure that there are no syntax errors
-                        The code given is : {file_content}
-                    """
-                model_response = run_LLM(prompt,role)
-                if model_response:
-                    st.markdown(model_response.content,unsafe_allow_html=True)
+    ]
+    # a response cut off at the token limit is retried with a larger one, then TruncatedResponse is raised
+    with stage("API call"):
+        return complete(create, messages)
+
+# documents and diagrams are still useful when cut off, they are shown with a note
+def run_LLM_partial(prompt,role):
+    try:
+        return run_LLM(prompt,role)
+    except TruncatedResponse as e:
+        return e.partial + "\n\n*(The response was cut off at the token limit.)*"
+
+# the language is detected locally, the model is only asked to identify it when detection failed
+def language_instruction(language):
+    if language == "Unknown":
+        return "First: using the syntax, identify the code type - weather its python, script, SQL or something else"
+    return f"The code is written in {language}."
+
+def generate_documentation(file_content, filename=None):
+    with stage("prompt build"):
+        prepared = preprocess(file_content, "documentation", filename)
+    role = "You are an expert in generating technical design documents"
+    prompt = f"""You have been provided with the code. 
+            These are your tasks
+            {language_instruction(prepared.language)}
+            Generate a technical design document ensuring all important processes are documented in detail. 
+            If the code is SQL then give a small description of each entity
+            If the code is a programming language like python, java, node.js, etc then give a small description of the program and a small description of each identified function. 
+            
+            Display the results as : 
+            Technical Documentation : 
+            
+            Ensure that document is properly indented and bulletted for better readibility and usability
+            
+            The code given is : {prepared.text}"""
+    return f"Identified Code is : {prepared.language}\n\n" + run_LLM_partial(prompt,role), prepared
+
+def generate_flow_diagram(file_content, polish_labels=False, filename=None):
+    with stage("prompt build"):
+        prepared = preprocess(file_content, "flow_diagram", filename)
+    # Python sources get a deterministic diagram from the ast, the model is only used for other languages
+    try:
+        if prepared.language != "Python":
+            raise SyntaxError(prepared.language)
+        flowchart = python_flowchart(file_content)
+        call_graph = python_call_graph(file_content)
+    except SyntaxError:
+        return generate_flow_diagram_with_llm(prepared), prepared
+    if polish_labels:
+        flowchart = polish_flowchart_labels(flowchart)
+    return f"""Identified Code is : Python
+
+Mermaid Script to generate flow diagram is :
+```mermaid
+{flowchart}```
+
+Mermaid Script to generate call graph is :
+```mermaid
+{call_graph}```""", prepared
+
+def polish_flowchart_labels(flowchart):
+    role = "You are an expert in generating mermaid script"
+    prompt = f"""Rewrite only the text labels of this mermaid flowchart in short, plain natural language.
+            Do not add, remove or rename nodes, subgraphs or edges and keep the label quoting as it is.
+            Reply with the mermaid script only.
+            
+            The mermaid script is : {flowchart}"""
+    try:
+        polished = strip_code_fence(run_LLM(prompt,role)) + "\n"
+    except TruncatedResponse:
+        return flowchart
+    # keep the local script if the model changed the structure
+    return polished if same_structure(flowchart, polished) else flowchart
+
+def generate_flow_diagram_with_llm(prepared):
+    role = "You are an expert in generating mermaid script"
+    prompt = f"""You have been provided with the code. 
+            These are your tasks
+            {language_instruction(prepared.language)}
+            Generate a mermid script to build the process flow by analyzing the code
+            Display the results as : 
+            Mermaid Script to generate flow diagram is : 
+            Ensure that there are no syntax errors in the generated script
+            
+            The code given is : {prepared.text}"""
+    return f"Identified Code is : {prepared.language}\n\n" + run_LLM_partial(prompt,role)
+
+# convert a large file unit by unit in parallel, each unit sees the shared imports and signatures
+def convert_code(file_content, target_code_language, max_workers=CONVERSION_WORKERS, filename=None):
+    with stage("prompt build"):
+        prepared = preprocess(file_content, "conversion", filename)
+    role = "You are an expert programmer"
+    # split the original source, the splitter relies on the blank lines that preprocessing removes
+    units, context = split_source(file_content)
+
+    def convert(index, unit):
+        unit = shrink(unit, prepared.language, "conversion")
+        prompt = unit_prompt(unit, index, len(units), context, prepared.language, target_code_language)
+        try:
+            return strip_code_fence(run_LLM(prompt, role))
+        except TruncatedResponse as e:
+            # half a unit would not compile, the part is reported instead of stitched
+            raise TruncatedResponse(f"Part {index + 1} of {len(units)}: {e}", e.partial) from e
+
+    return stitch(convert_units(units, convert, max_workers)), len(units), prepared
+
+
+def show_token_savings(prepared):
+    st.caption(f"Detected language: {prepared.language} | Code tokens: {prepared.tokens_before} -> {prepared.tokens_after} "
+               f"({prepared.tokens_saved} saved by preprocessing)")
+
+# run the selected task over every uploaded file and collect the results in a zip archive
+def run_code_batch(files, code_target, target_code_language=None, max_workers=BATCH_WORKERS):
+    if code_target == "Generate Documentation":
+        process, suffix = (lambda name, text: generate_documentation(text, name)[0]), "-documentation.md"
+    elif code_target == "Generate Flow Diagram":
+        process, suffix = (lambda name, text: generate_flow_diagram(text, filename=name)[0]), "-flow-diagram.md"
+    else:
+        # each file already converts its units in parallel, so keep the per-file conversion sequential
+        process = lambda name, text: convert_code(text, target_code_language, max_workers=1, filename=name)[0]
+        suffix = CODE_EXTENSIONS[target_code_language]
+
+    stats = FileBatchStats(len(files))
+    archive = ResultArchive()
+    progress = st.progress(0.0, text=f"0/{len(files)} files")
+    failures = []
+    for name, result, error, cached in run_file_batch(files, code_target, target_code_language, process, get_result_cache(), max_workers):
+        stats.record(error, cached)
+        if error is None:
+            archive.add(name + suffix, result)
         else:
-            st.warning("Please upload the code in .txt file format ... ")
-            st.stop()
+            failures.append(f"{name}: {error}")
+        progress.progress(stats.done / stats.total, text=f"{stats.done}/{stats.total} files - {name}")
+    st.success(stats.summary())
+    for failure in failures:
+        st.error(failure)
+    st.download_button("Download results (.zip)", data=archive.getvalue(), file_name="code-assistant-results.zip", mime="application/zip")
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+
+# the rerun is timed until the script ends, also when st.stop() ends it early
+with start_rerun("code-assistant"):
+    # Set the title of the application
+    st.title("A Coding Assitant")
+    st.write("---")
+
+    # Create a sidebar with a title
+    st.sidebar.title("Select Option")
+    st.sidebar.write("---")
+    # Add radio buttons to the sidebar
+    option = st.sidebar.radio(label="Select Option",options= ['None', 'DB Generator', 'Code Assistant', 'Batch Code Assistant'],label_visibility="hidden")
+
+    # Logic for DB Generator
+    if option == 'DB Generator':
+        col1,col2 = st.columns([3,10],gap="small",vertical_alignment="top")
+        with col1:
+            db_name = st.text_input(label="Provide with database name",value="",max_chars=50)
+        with col2:
+            entities = st.text_area(label="Provide with entities seperated by commas",value="", height=150,max_chars=400)
+        # Submit button
+        if st.button('Submit'):
+            st.warning("This feature will be added soon.. ")
+
+    # Logic for Code Converter
+    elif option == 'Code Assistant':
+        # File upload box that accepts only text files
+        uploaded_file = st.file_uploader(label="Upload the code in .txt file format...", type="txt")
+        # give more options
+        col3, col4, col5  = st.columns([3,3,10],gap="small",vertical_alignment="bottom")
+        with col3:
+            code_target = st.radio("What you need to do with code file?",options=['Display On Page','Generate Documentation','Generate Flow Diagram','Convert Code'])
+            if code_target == "Convert Code":
+                target_options = ['Python','Java','SQL','Node.js']
+                with col4:
+                    target_code_language = st.selectbox("Select the Target Platform",target_options)
+            if code_target == "Generate Flow Diagram":
+                with col4:
+                    polish_labels = st.checkbox("Polish labels with GPT", value=False, help="Python diagrams are generated locally, this rewrites their labels in natural language")
+        # Submit button
+        if st.button('Submit'):
+            if uploaded_file is not None:
+                file_content = uploaded_file.read().decode("utf-8")
+                if code_target == "Display On Page":
+                    st.code(file_content)
+                elif code_target == "Generate Documentation":
+                    with st.spinner("Generating documentation ..."), stage("documentation"):
+                        documentation, prepared = generate_documentation(file_content)
+                    st.markdown(documentation,unsafe_allow_html=True)
+                    show_token_savings(prepared)
+                # lets generate a mermaid script first
+                elif code_target == "Generate Flow Diagram":
+                    with st.spinner("Generating flow diagram ..."), stage("flow diagram"):
+                        flow_diagram, prepared = generate_flow_diagram(file_content, polish_labels)
+                    st.markdown(flow_diagram,unsafe_allow_html=True)
+                    show_token_savings(prepared)
+                    st.markdown("Use the mermaid script can be copied to open-source tools like draw.io to generate the diagram.")
+                elif code_target == "Convert Code":
+                    with st.spinner("Converting code ..."), stage("conversion"):
+                        started = time.perf_counter()
+                        try:
+                            converted_code, unit_count, prepared = convert_code(file_content, target_code_language)
+                        except TruncatedResponse as e:
+                            st.error(f"{e}. Split the file into smaller files and convert them one by one.")
+                            st.stop()
+                        elapsed = time.perf_counter() - started
+                    st.markdown(f"**Identified Code is :** {prepared.language}")
+                    st.markdown(f"**Target Conversion is :** {target_code_language}")
+                    st.markdown("**Converted Code is :**")
+                    st.code(converted_code, language=CODE_HIGHLIGHTING.get(target_code_language))
+                    st.caption(f"Converted {unit_count} parts with {CONVERSION_WORKERS} parallel workers in {elapsed:.1f}s")
+                    show_token_savings(prepared)
+            else:
+                st.warning("Please upload the code in .txt file format ... ")
+                st.stop()
+
+    # Logic for batch mode over many files
+    elif option == 'Batch Code Assistant':
+        uploaded_files = st.file_uploader(label="Upload a .zip archive or several code files...", accept_multiple_files=True)
+        col6, col7, col8 = st.columns([3,3,10],gap="small",vertical_alignment="bottom")
+        with col6:
+            code_target = st.radio("What you need to do with the code files?",options=['Generate Documentation','Generate Flow Diagram','Convert Code'])
+        target_code_language = None
+        if code_target == "Convert Code":
+            with col7:
+                target_code_language = st.selectbox("Select the Target Platform",['Python','Java','SQL','Node.js'])
+        # Submit button
+        if st.button('Submit'):
+            if uploaded_files:
+                files = read_uploaded_files(uploaded_files)
+                if files:
+                    with stage("batch"):
+                        run_code_batch(files, code_target, target_code_language)
+                else:
+                    st.warning("No text files found in the upload ... ")
+            else:
+                st.warning("Please upload a .zip archive or code files ... ")
+                st.stop()
@@ -0,0 +1,152 @@
+"""
+Code Batch Overview:
+This module runs a code-assistant task (documentation, flow diagram or conversion) over many files at once.
+Files come from a zip archive or a multi-file upload, are processed by a bounded pool of worker threads and
+results are cached on disk by content hash, so re-running a repository only pays for files that changed.
+Results are written into an in-memory zip archive as they complete.
+
+Key Features:
+- Read files from zip archives and multi-file uploads (binary files are skipped).
+- Disk cache keyed by task, task option and file content hash.
+- Concurrent processing with results yielded in completion order.
+- Downloadable zip archive of the results and throughput/failure statistics.
+
+Dependencies:
+- os
+- io
+- hashlib
+- time
+- zipfile
+- concurrent.futures
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def read_uploaded_files(uploaded_files):
+    """Return [(name, text)] for uploaded files, expanding zip archives. Files that are not UTF-8 text are skipped."""
+    files = []
+    for uploaded_file in uploaded_files:
+        data = uploaded_file.read()
+        if uploaded_file.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                entries = [(info.filename, archive.read(info)) for info in archive.infolist() if not info.is_dir()]
+        else:
+            entries = [(uploaded_file.name, data)]
+        for name, content in entries:
+            try:
+                files.append((name, content.decode("utf-8")))
+            except UnicodeDecodeError:
+                continue
+    return files
+
+
+def make_result_key(task, option, content):
+    raw = "|".join([task, option or "", hashlib.sha256(content.encode("utf-8")).hexdigest()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """One text file per cached result, named by its key."""
+
+    def __init__(self, cache_dir="code_assistant_cache"):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, result):
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(result)
+        os.replace(tmp_path, self._path(key))
+
+
+def run_file_batch(files, task, option, process, cache=None, max_workers=4):
+    """
+    Run process(name, text) for every (name, text) in files with at most max_workers in flight.
+
+    Yields (name, result, error, cached) in completion order. Cached results are yielded first
+    without using a worker.
+    """
+    pending = []
+    for name, text in files:
+        key = make_result_key(task, option, text)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            yield name, cached, None, True
+        else:
+            pending.append((name, text, key))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process, name, text): (name, key) for name, text, key in pending}
+        for future in as_completed(futures):
+            name, key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                yield name, None, e, False
+                continue
+            if cache is not None:
+                cache.put(key, result)
+            yield name, result, None, False
+
+
+class ResultArchive:
+    """Zip archive built in memory as results arrive."""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._archive = zipfile.ZipFile(self._buffer, "w", zipfile.ZIP_DEFLATED)
+
+    def add(self, name, content):
+        self._archive.writestr(name, content)
+
+    def getvalue(self):
+        self._archive.close()
+        return self._buffer.getvalue()
+
+
+class FileBatchStats:
+    def __init__(self, total):
+        self.total = total
+        self.processed = 0
+        self.cached = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def record(self, error, cached):
+        if error is not None:
+            self.failed += 1
+        elif cached:
+            self.cached += 1
+        else:
+            self.processed += 1
+
+    @property
+    def done(self):
+        return self.processed + self.cached + self.failed
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        files_per_minute = self.done / elapsed * 60 if elapsed else 0.0
+        return (
+            f"{self.done}/{self.total} files in {elapsed:.1f}s ({files_per_minute:.1f} files/minute): "
+            f"{self.processed} processed, {self.cached} from cache, {self.failed} failed"
+        )
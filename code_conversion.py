@@ -0,0 +1,240 @@
+"""
+Code Conversion Overview:
+This module splits a source file into top-level units so that `code-assistant.py` can convert large files
+piece by piece instead of in one prompt that gets truncated. Units are converted in parallel, each with a
+shared context (imports and the signatures of every unit) so cross references stay consistent, and the
+converted pieces are stitched back together in the original order. A response that still hits the token
+limit is retried once with a larger limit and reported when it is cut off again.
+
+Key Features:
+- Python sources are split with `ast` (functions, classes and the statements between them).
+- Other languages use a heuristic splitter on top-level declarations and blank lines.
+- Units over the size budget (a large class) are split again at their members, then at blank lines.
+- Small neighbouring units are merged up to a size budget to keep the number of calls low.
+- Truncation check on finish_reason, with one retry at a larger max_tokens.
+- Parallel conversion with a bounded thread pool, results in source order.
+- The per-unit conversion prompt, shared by Code-Assistant and the API gateway.
+
+Dependencies:
+- ast
+- re
+- concurrent.futures
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import ast
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_UNIT_CHARS = 6000
+UNIT_MAX_TOKENS = 2500
+RETRY_MAX_TOKENS = 8000
+
+# lines that start a new top-level declaration in common languages
+DECLARATION = re.compile(
+    r"^(?:export\s+|public\s+|private\s+|protected\s+|static\s+|async\s+|abstract\s+|final\s+)*"
+    r"(?:def|class|function|interface|enum|struct|func|fn|impl|module|sub|procedure|create|alter|declare)\b",
+    re.IGNORECASE,
+)
+CODE_FENCE = re.compile(r"^```[\w.+-]*\s*\n(.*?)\n```\s*$", re.DOTALL)
+
+
+def _python_units(source):
+    """Split Python source at top-level nodes. Returns (units, signatures, imports)."""
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    starts, signatures, imports = [], [], []
+    previous_simple = False
+    for node in tree.body:
+        is_definition = isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(ast.get_source_segment(source, node))
+        if is_definition:
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            starts.append(start)
+            header = lines[node.lineno - 1].strip()
+            signatures.append(header)
+            previous_simple = False
+        elif not previous_simple:
+            # consecutive module-level statements stay together in one unit
+            starts.append(node.lineno)
+            previous_simple = True
+    if not starts:
+        return [source], signatures, imports
+    starts[0] = 1  # leading comments and docstrings belong to the first unit
+    bounds = starts + [len(lines) + 1]
+    units = ["".join(lines[bounds[i] - 1:bounds[i + 1] - 1]) for i in range(len(starts))]
+    return units, signatures, imports
+
+
+def _heuristic_units(source):
+    """Split non-Python source where a top-level declaration follows a blank line."""
+    lines = source.splitlines(keepends=True)
+    units, current, signatures, imports = [], [], [], []
+    previous_blank = True
+    for line in lines:
+        stripped = line.strip()
+        if re.match(r"^(import|from|using|#include|require|package)\b", stripped):
+            imports.append(stripped)
+        top_level = line[:1] not in (" ", "\t", "")
+        if top_level and previous_blank and DECLARATION.match(stripped) and current:
+            units.append("".join(current))
+            current = []
+        if top_level and DECLARATION.match(stripped):
+            signatures.append(stripped)
+        current.append(line)
+        previous_blank = not stripped
+    if current:
+        units.append("".join(current))
+    return units, signatures, imports
+
+
+def _cut(unit, starts):
+    """Split unit before the given 1-based line numbers."""
+    lines = unit.splitlines(keepends=True)
+    bounds = [1] + sorted({start for start in starts if 1 < start <= len(lines)}) + [len(lines) + 1]
+    return ["".join(lines[start - 1:end - 1]) for start, end in zip(bounds, bounds[1:])]
+
+
+def _python_member_starts(unit):
+    """Lines where the methods and nested classes of the classes in a Python unit start, with their comments."""
+    tree = ast.parse(unit)
+    lines = unit.splitlines()
+    starts = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for member in node.body:
+            if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([member.lineno] + [d.lineno for d in member.decorator_list])
+                while start > 1 and lines[start - 2].strip().startswith("#"):
+                    start -= 1
+                starts.append(start)
+    return starts
+
+
+def _heuristic_member_starts(unit):
+    """Lines at the first indentation level of a unit that follow a blank line (methods, fields, inner types)."""
+    lines = unit.splitlines()
+    indents = [len(line) - len(line.lstrip()) for line in lines if line.strip()]
+    member_indent = min([indent for indent in indents if indent > 0], default=0)
+    starts = []
+    for number in range(2, len(lines) + 1):
+        line = lines[number - 1]
+        if (member_indent and not lines[number - 2].strip() and line.strip()
+                and len(line) - len(line.lstrip()) == member_indent and line.strip()[0] not in "})]"):
+            starts.append(number)
+    return starts
+
+
+def _split_oversized(unit, max_chars, python):
+    """Split a unit over max_chars at its members, then at blank lines, then at any line."""
+    if len(unit) <= max_chars:
+        return [unit]
+    try:
+        starts = _python_member_starts(unit) if python else _heuristic_member_starts(unit)
+    except SyntaxError:
+        starts = _heuristic_member_starts(unit)
+    pieces = []
+    for piece in _merge_small_units(_cut(unit, starts), max_chars):
+        if len(piece) > max_chars:
+            lines = piece.splitlines()
+            blank = [number for number in range(2, len(lines) + 1) if not lines[number - 2].strip()]
+            for block in _merge_small_units(_cut(piece, blank), max_chars):
+                # a single block over the budget is cut at line boundaries
+                pieces.extend([block] if len(block) <= max_chars
+                              else _merge_small_units(block.splitlines(keepends=True), max_chars))
+        else:
+            pieces.append(piece)
+    return pieces
+
+
+def _merge_small_units(units, max_chars):
+    merged = []
+    for unit in units:
+        if merged and len(merged[-1]) + len(unit) <= max_chars:
+            merged[-1] += unit
+        else:
+            merged.append(unit)
+    return merged
+
+
+def split_source(source, max_chars=MAX_UNIT_CHARS):
+    """
+    Split source into conversion units.
+
+    Returns (units, context) where context is a short text with the imports and top-level signatures.
+    Falls back to the heuristic splitter when the source is not valid Python. Units over max_chars are
+    split again, so a large class becomes several units of its methods.
+    """
+    try:
+        units, signatures, imports = _python_units(source)
+        python = True
+    except SyntaxError:
+        units, signatures, imports = _heuristic_units(source)
+        python = False
+    units = [piece for unit in units for piece in _split_oversized(unit, max_chars, python)]
+    units = _merge_small_units(units, max_chars)
+    context = "Imports:\n" + "\n".join(imports or ["(none)"])
+    context += "\nTop-level declarations:\n" + "\n".join(signatures or ["(none)"])
+    return units, context
+
+
+def unit_prompt(unit, index, total, context, source_language, target_language):
+    """The prompt that converts one unit. source_language is the detected language or "Unknown"."""
+    if source_language == "Unknown":
+        source_language = "Using the syntax, identify the source language."
+    else:
+        source_language = f"The source language is {source_language}."
+    return f"""You are converting a large source file to {target_language} one part at a time.
+                {source_language} This is part {index + 1} of {total}.
+                Shared context of the whole file (for reference only, do not convert it):
+                {context}
+                Convert only the part below to {target_language}. If the source and target programming language is same, return the part without any modifications.
+                A part can be a fragment of a larger declaration, such as some of the methods of a large class: convert only the fragment, do not repeat the enclosing declaration and only close it where the part ends it (or at the end of the last part).
+                Keep names consistent with the shared context. Where possible, add comments or helpful hints for easier understanding.
+                Ensure that there are no syntax errors. Reply with the converted code only, in a single code block.
+                The part to convert is : {unit}
+            """
+
+
+def strip_code_fence(text):
+    """Remove a surrounding markdown code fence from a model response, if there is one."""
+    match = CODE_FENCE.match(text.strip())
+    return match.group(1) if match else text.strip()
+
+
+class TruncatedResponse(Exception):
+    """The model stopped at the token limit, even after the retry. partial is the text it returned."""
+
+    def __init__(self, message, partial):
+        super().__init__(message)
+        self.partial = partial
+
+
+def complete(create, messages, max_tokens=UNIT_MAX_TOKENS, retry_max_tokens=RETRY_MAX_TOKENS):
+    """
+    Return the reply of create(messages=..., max_tokens=...), a chat completions call with the model and n set.
+
+    A reply cut off at max_tokens (finish_reason "length") is requested again with retry_max_tokens, and
+    TruncatedResponse is raised when that one is cut off as well.
+    """
+    choice = create(messages=messages, max_tokens=max_tokens).choices[0]
+    if choice.finish_reason == "length" and retry_max_tokens > max_tokens:
+        choice = create(messages=messages, max_tokens=retry_max_tokens).choices[0]
+        max_tokens = retry_max_tokens
+    if choice.finish_reason == "length":
+        raise TruncatedResponse(f"The response was cut off at the limit of {max_tokens} tokens", choice.message.content)
+    return choice.message.content
+
+
+def convert_units(units, convert, max_workers=4):
+    """Run convert(index, unit) for every unit in parallel. Returns the results in source order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(convert, range(len(units)), units))
+
+
+def stitch(parts):
+    return "\n\n".join(part.strip("\n") for part in parts if part.strip()) + "\n"
@@ -0,0 +1,205 @@
+"""
+Code Preprocessing Overview:
+This module prepares uploaded source code before it is sent to the model by `code-assistant.py`. The
+language is detected locally (file extension, then simple syntax heuristics, then the Pygments lexer
+guesser when it is installed) so prompts no longer ask the model to identify it, and non-semantic content is
+removed according to a per-task policy to save prompt tokens.
+
+Key Features:
+- Local language detection.
+- Comment stripping that respects string literals (Python via tokenize, C-style and SQL via regex).
+- Blank-line collapsing, trailing-whitespace removal and indentation compression, leaving the lines
+  inside multi-line string literals untouched.
+- Per-task policies, e.g. documentation keeps the comments.
+- Token counts before and after preprocessing (tiktoken when installed, otherwise an estimate).
+
+Dependencies:
+- ast
+- io
+- math
+- re
+- tokenize
+- pygments (optional)
+- tiktoken (optional)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import ast
+import io
+import math
+import re
+import tokenize
+from dataclasses import dataclass
+
+EXTENSIONS = {
+    ".py": "Python", ".java": "Java", ".js": "JavaScript", ".ts": "TypeScript", ".sql": "SQL",
+    ".c": "C", ".h": "C", ".cpp": "C++", ".cs": "C#", ".go": "Go", ".rs": "Rust", ".kt": "Kotlin",
+    ".php": "PHP", ".rb": "Ruby", ".sh": "Shell", ".swift": "Swift", ".scala": "Scala",
+}
+C_STYLE = {"Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "Kotlin", "PHP", "Swift", "Scala"}
+
+# keyword heuristics used when the extension does not decide, checked in order. SQL comes last and needs a
+# statement shape, words like update( or delete obj.key also start lines of Java and JavaScript
+SIGNATURES = [
+    ("Java", re.compile(r"\b(public|private|protected)\s+(static\s+)?(class|void|int|String)\b")),
+    ("C#", re.compile(r"\busing\s+System\b|\bnamespace\s+\w+")),
+    ("Go", re.compile(r"^\s*package\s+\w+\s*$|\bfunc\s+\w+\(", re.MULTILINE)),
+    ("JavaScript", re.compile(r"\b(const|let|var)\s+\w+\s*=|\bfunction\s+\w+\s*\(|=>|require\(")),
+    ("C++", re.compile(r"#include\s*<|\bstd::")),
+    ("SQL", re.compile(
+        r"^\s*(select\b[\s\S]*?\bfrom\b|insert\s+into\b|update\s+[\w.\[\]\"`]+\s+set\b|delete\s+from\b"
+        r"|(create|alter|drop)\s+(or\s+replace\s+)?(table|view|index|procedure|function|trigger|schema|database)\b)",
+        re.IGNORECASE | re.MULTILINE,
+    )),
+]
+
+POLICIES = {
+    "documentation": {"strip_comments": False, "compress_indent": False},
+    "flow_diagram": {"strip_comments": True, "compress_indent": True},
+    "conversion": {"strip_comments": False, "compress_indent": True},
+}
+
+C_COMMENTS = re.compile(
+    r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)|(/\*.*?\*/|//[^\n]*)", re.DOTALL
+)
+SQL_COMMENTS = re.compile(r"('(?:''|[^'])*')|(/\*.*?\*/|--[^\n]*)", re.DOTALL)
+
+
+@dataclass
+class PreprocessResult:
+    text: str
+    language: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+
+def count_tokens(text):
+    try:
+        import tiktoken
+    except ImportError:
+        return math.ceil(len(text) / 4)
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def detect_language(source, filename=None):
+    """Best guess of the source language name, or 'Unknown'."""
+    if filename:
+        for extension, language in EXTENSIONS.items():
+            if filename.lower().endswith(extension):
+                return language
+    try:
+        ast.parse(source)
+        if re.search(r"^\s*(def|class|import|from)\s", source, re.MULTILINE):
+            return "Python"
+    except SyntaxError:
+        pass
+    for language, pattern in SIGNATURES:
+        if pattern.search(source):
+            return language
+    try:
+        from pygments.lexers import guess_lexer
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return "Unknown"
+    try:
+        name = guess_lexer(source).name
+    except ClassNotFound:
+        return "Unknown"
+    return name if name not in ("Text only", "Text") else "Unknown"
+
+
+def strip_comments(source, language):
+    if language == "Python":
+        try:
+            return _strip_python_comments(source)
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            return source
+    if language in C_STYLE:
+        return C_COMMENTS.sub(lambda m: m.group(1) or "", source)
+    if language == "SQL":
+        return SQL_COMMENTS.sub(lambda m: m.group(1) or "", source)
+    return source
+
+
+def _strip_python_comments(source):
+    lines = source.splitlines(keepends=True)
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type == tokenize.COMMENT:
+            row, col = token.start
+            line = lines[row - 1]
+            lines[row - 1] = line[:col].rstrip() + ("\n" if line.endswith("\n") else "")
+    return "".join(lines)
+
+
+def literal_lines(source, language):
+    """
+    Indexes (0 based) of the lines that start inside a multi-line string literal. Their whitespace is part
+    of the program and must not be changed. None when the source cannot be parsed, nothing is safe then.
+    """
+    protected = set()
+    if language == "Python":
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes))):
+                protected.update(range(node.lineno, node.end_lineno))
+        return protected
+    pattern = C_COMMENTS if language in C_STYLE else SQL_COMMENTS if language == "SQL" else None
+    if pattern is not None:
+        for match in pattern.finditer(source):
+            if match.group(1) and "\n" in match.group(1):
+                first = source.count("\n", 0, match.start(1))
+                protected.update(range(first + 1, first + match.group(1).count("\n") + 1))
+    return protected
+
+
+def compress_indent(source, protected=frozenset()):
+    """Re-indent with one space per level, using the smallest indentation step found in the source."""
+    lines = source.splitlines()
+    code = [i for i, line in enumerate(lines) if i not in protected]
+    for i in code:
+        lines[i] = lines[i].expandtabs(4)
+    step = 0
+    for i in code:
+        if lines[i].strip():
+            step = math.gcd(step, len(lines[i]) - len(lines[i].lstrip(" ")))
+    if step <= 1:
+        return "\n".join(lines)
+    for i in code:
+        lines[i] = " " * ((len(lines[i]) - len(lines[i].lstrip(" "))) // step) + lines[i].lstrip(" ")
+    return "\n".join(lines)
+
+
+def collapse_blank_lines(source, protected=frozenset()):
+    lines = [line if i in protected else line.rstrip() for i, line in enumerate(source.splitlines())]
+    return "\n".join(line for i, line in enumerate(lines) if line or i in protected) + "\n"
+
+
+def shrink(source, language, mode):
+    """Remove non-semantic content from source according to the policy for mode. Text inside strings is kept."""
+    policy = POLICIES[mode]
+    text = source
+    if policy["strip_comments"]:
+        text = strip_comments(text, language)
+    protected = literal_lines(text, language)
+    if protected is None:
+        # unparsable Python: indentation and blank lines may be significant in ways we cannot see
+        return text
+    if policy["compress_indent"]:
+        text = compress_indent(text, protected)
+    return collapse_blank_lines(text, protected)
+
+
+def preprocess(source, mode, filename=None):
+    """Detect the language and shrink source according to the policy for mode."""
+    language = detect_language(source, filename)
+    text = shrink(source, language, mode)
+    return PreprocessResult(text, language, count_tokens(source), count_tokens(text))
@@ -0,0 +1,262 @@
+"""
+Crawl Dataset Overview:
+This module stores crawl records in a few large compressed shard files instead of one pretty-printed JSON
+file per page. Records are written as JSON lines and compressed in blocks of a fixed number of records
+(zstd when the `zstandard` package is installed, zlib otherwise), so any record can be read back by
+decompressing only its block. Every shard has a binary offset index of its blocks, and the reader memory-maps
+shards and indexes, so iterating or looking up records never loads the whole dataset.
+
+Layout of a dataset folder:
+- manifest.json: codec, block size and the record count of every shard.
+- shard-00000.jsonl.zst (or .jsonl.zz): concatenated compressed blocks.
+- shard-00000.idx: uint64 pairs (offset, length) per block.
+
+Usage:
+    python crawl_dataset.py export storage/datasets/default crawl_dataset
+    python crawl_dataset.py info crawl_dataset
+    python crawl_dataset.py get crawl_dataset 42
+
+Dependencies:
+- array
+- bisect
+- json
+- mmap
+- os
+- zlib
+- zstandard (optional)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import zlib
+from array import array
+
+MANIFEST = "manifest.json"
+RECORDS_PER_BLOCK = 64
+RECORDS_PER_SHARD = 100_000
+
+
+def _codec(name, level=3):
+    """Return (compress, decompress, extension) for a codec name."""
+    if name == "zstd":
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=level)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress, ".jsonl.zst"
+    if name == "zlib":
+        return (lambda data: zlib.compress(data, level)), zlib.decompress, ".jsonl.zz"
+    raise ValueError(f"Unknown codec '{name}'")
+
+
+def default_codec():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "zlib"
+    return "zstd"
+
+
+def _load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ShardWriter:
+    """Appends records to a sharded dataset folder. Use as a context manager or call close()."""
+
+    def __init__(self, directory, codec=None, records_per_block=RECORDS_PER_BLOCK,
+                 records_per_shard=RECORDS_PER_SHARD, level=3):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        manifest = _load_manifest(directory)
+        if manifest:
+            # appending keeps the settings the dataset was created with
+            codec, records_per_block = manifest["codec"], manifest["records_per_block"]
+            self.shards = manifest["shards"]
+        else:
+            codec = codec or default_codec()
+            self.shards = []
+        self.codec = codec
+        self.records_per_block = records_per_block
+        self.records_per_shard = max(records_per_shard - records_per_shard % records_per_block, records_per_block)
+        self._compress, _, self.extension = _codec(codec, level)
+        self._block = []
+        self._data = None
+        self._offsets = None
+        self._shard_records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_shard(self):
+        name = f"shard-{len(self.shards):05d}"
+        self.shards.append({"name": name, "records": 0})
+        self._data = open(os.path.join(self.directory, name + self.extension), "wb")
+        self._offsets = array("Q")
+        self._shard_records = 0
+
+    def _flush_block(self):
+        if not self._block:
+            return
+        if self._data is None:
+            self._open_shard()
+        payload = self._compress(b"".join(self._block))
+        self._offsets.extend((self._data.tell(), len(payload)))
+        self._data.write(payload)
+        self._shard_records += len(self._block)
+        self.shards[-1]["records"] = self._shard_records
+        self._block = []
+        if self._shard_records >= self.records_per_shard:
+            self._close_shard()
+
+    def _close_shard(self):
+        if self._data is None:
+            return
+        self._data.close()
+        with open(os.path.join(self.directory, self.shards[-1]["name"] + ".idx"), "wb") as f:
+            self._offsets.tofile(f)
+        self._data = None
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "codec": self.codec,
+            "records_per_block": self.records_per_block,
+            "shards": self.shards,
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def write(self, record):
+        self._block.append(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        if len(self._block) >= self.records_per_block:
+            self._flush_block()
+
+    def close(self):
+        self._flush_block()
+        self._close_shard()
+
+
+class ShardReader:
+    """Memory-mapped, random-access view of a sharded dataset folder."""
+
+    def __init__(self, directory):
+        manifest = _load_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No {MANIFEST} in {directory}")
+        self.directory = directory
+        self.records_per_block = manifest["records_per_block"]
+        _, self._decompress, extension = _codec(manifest["codec"])
+        self._shards = []
+        self._starts = []
+        total = 0
+        for shard in manifest["shards"]:
+            with open(os.path.join(directory, shard["name"] + extension), "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(os.path.join(directory, shard["name"] + ".idx"), "rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._shards.append((data, index, memoryview(index).cast("Q")))
+            self._starts.append(total)
+            total += shard["records"]
+        self._length = total
+        self._cached_block = (None, None)
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _block(self, shard_number, block_number):
+        if self._cached_block[0] == (shard_number, block_number):
+            return self._cached_block[1]
+        data, _, index = self._shards[shard_number]
+        offset, length = index[2 * block_number], index[2 * block_number + 1]
+        lines = self._decompress(data[offset:offset + length]).splitlines()
+        self._cached_block = ((shard_number, block_number), lines)
+        return lines
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("record index out of range")
+        shard_number = bisect.bisect_right(self._starts, position) - 1
+        block_number, line = divmod(position - self._starts[shard_number], self.records_per_block)
+        return json.loads(self._block(shard_number, block_number)[line])
+
+    def __iter__(self):
+        for shard_number, (_, _, index) in enumerate(self._shards):
+            for block_number in range(len(index) // 2):
+                for line in self._block(shard_number, block_number):
+                    yield json.loads(line)
+
+    def close(self):
+        self._cached_block = (None, None)
+        for data, index, offsets in self._shards:
+            offsets.release()
+            index.close()
+            data.close()
+        self._shards = []
+
+
+def export_json_folder(source_dir, directory, codec=None):
+    """Convert a crawlee dataset folder (one JSON file per record) into shards. Returns the record count."""
+    names = sorted(name for name in os.listdir(source_dir) if name.endswith(".json") and not name.startswith("__"))
+    with ShardWriter(directory, codec=codec) as writer:
+        for name in names:
+            with open(os.path.join(source_dir, name), "r", encoding="utf-8") as f:
+                writer.write(json.load(f))
+    return len(names)
+
+
+def folder_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed, sharded storage for crawl records")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="convert a crawlee JSON dataset folder into shards")
+    export.add_argument("source")
+    export.add_argument("destination")
+    export.add_argument("--codec", choices=["zstd", "zlib"])
+    info = commands.add_parser("info", help="record count and size of a sharded dataset")
+    info.add_argument("directory")
+    get = commands.add_parser("get", help="print one record")
+    get.add_argument("directory")
+    get.add_argument("position", type=int)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = export_json_folder(args.source, args.destination, args.codec)
+        print(f"Exported {count} records: {folder_bytes(args.source) / 1024:.0f} KB of JSON files -> "
+              f"{folder_bytes(args.destination) / 1024:.0f} KB of shards")
+    elif args.command == "info":
+        with ShardReader(args.directory) as reader:
+            print(f"{len(reader)} records in {len(reader._shards)} shards, {folder_bytes(args.directory) / 1024:.0f} KB")
+    else:
+        with ShardReader(args.directory) as reader:
+            print(json.dumps(reader[args.position], indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
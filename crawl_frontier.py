@@ -0,0 +1,188 @@
+"""
+Crawl Frontier Overview:
+This module holds the crawl policies for the production mode of `website-crawler.py`: which discovered links
+are enqueued, how seen URLs are remembered and how politely each domain is fetched. Seen URLs go into a
+Bloom filter sized up front, so deduplication takes a fixed 1.2 MB for 1M URLs at a 1% false positive rate
+instead of a set that grows with every URL. The production crawl is still not memory-bounded: crawlee's
+request queue (MemoryStorageClient) keeps every enqueued request in memory until the crawl ends, so memory
+grows with the frontier (benchmarks/bench_crawler.py reports the measured growth).
+
+Key Features:
+- URL normalization (fragments, default ports, host case, sorted query parameters).
+- Fixed-size Bloom filter of seen URLs.
+- Scope rules: allowed domains, include/exclude patterns and maximum link depth.
+- robots.txt rules, fetched once per host and cached.
+- HTTP client with per-domain concurrency limits and politeness delays for crawlee crawlers, optionally
+  sending conditional requests for pages known from a previous run (see crawl_state.py).
+
+Dependencies:
+- asyncio
+- hashlib
+- math
+- re
+- time
+- urllib
+- crawlee (for PoliteHttpClient)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import time
+from urllib import robotparser
+from urllib.parse import urlencode, urljoin, urlsplit, urlunsplit, parse_qsl
+
+from crawlee.http_clients import HttpxHttpClient
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SKIPPED_EXTENSIONS = re.compile(
+    r"\.(?:jpe?g|png|gif|webp|svg|ico|pdf|zip|gz|tar|mp3|mp4|avi|mov|woff2?|ttf|css|js|xml|json)$", re.IGNORECASE
+)
+
+
+def normalize_url(url, base=None):
+    """Absolute, canonical form of url (or None for non-http links)."""
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+class BloomFilter:
+    """Probabilistic set of strings with a fixed memory budget. May report false positives, never false negatives."""
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.size = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # double hashing: two 64 bit halves of one digest generate all k positions
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Add item. Returns True when it was not (probably) present before."""
+        added = False
+        for p in self._positions(item):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+
+class CrawlScope:
+    """Decides which discovered links belong to the crawl."""
+
+    def __init__(self, allowed_domains, include=None, exclude=None, max_depth=None):
+        self.allowed_domains = {domain.lower() for domain in allowed_domains}
+        self.include = [re.compile(pattern) for pattern in include or []]
+        self.exclude = [re.compile(pattern) for pattern in exclude or []]
+        self.max_depth = max_depth
+
+    def _domain_allowed(self, host):
+        return any(host == domain or host.endswith("." + domain) for domain in self.allowed_domains)
+
+    def allows(self, url, depth=0):
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        parts = urlsplit(url)
+        if not self._domain_allowed(parts.netloc.split(":")[0]):
+            return False
+        if SKIPPED_EXTENSIONS.search(parts.path):
+            return False
+        if self.include and not any(pattern.search(url) for pattern in self.include):
+            return False
+        return not any(pattern.search(url) for pattern in self.exclude)
+
+
+class RobotsRules:
+    """robots.txt rules per host, loaded once in a worker thread and cached."""
+
+    def __init__(self, user_agent="*"):
+        self.user_agent = user_agent
+        self._parsers = {}
+        self._locks = {}
+
+    def _load(self, robots_url):
+        parser = robotparser.RobotFileParser(robots_url)
+        try:
+            parser.read()
+        except Exception:
+            # unreachable robots.txt, allow everything
+            parser.parse([])
+        return parser
+
+    async def allowed(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            if origin not in self._parsers:
+                self._parsers[origin] = await asyncio.to_thread(self._load, origin + "/robots.txt")
+        return self._parsers[origin].can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        parts = urlsplit(url)
+        parser = self._parsers.get(f"{parts.scheme}://{parts.netloc}")
+        return parser.crawl_delay(self.user_agent) if parser else None
+
+
+class PoliteHttpClient(HttpxHttpClient):
+    """crawlee HTTP client that limits concurrent requests per domain and spaces them by a minimum delay.
+
+    With a CrawlState it also sends the validators stored for the URL and records the fetch time in the
+    request's user_data, so the request handler can tell what an unchanged page saved.
+    """
+
+    def __init__(self, per_domain_concurrency=2, delay=0.0, robots=None, state=None, **kwargs):
+        super().__init__(**kwargs)
+        self.per_domain_concurrency = per_domain_concurrency
+        self.delay = delay
+        self.robots = robots
+        self.state = state
+        self._semaphores = {}
+        self._next_slot = {}
+
+    async def crawl(self, request, **kwargs):
+        domain = urlsplit(request.url).netloc
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.per_domain_concurrency))
+        async with semaphore:
+            delay = self.delay
+            if self.robots is not None:
+                delay = max(delay, self.robots.crawl_delay(request.url) or 0)
+            if delay:
+                # reserve the next free slot for this domain, then wait for it
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(domain, now))
+                self._next_slot[domain] = slot + delay
+                await asyncio.sleep(slot - now)
+            if self.state is None:
+                return await super().crawl(request, **kwargs)
+            request.headers.update(self.state.conditional_headers(request.url))
+            started = time.perf_counter()
+            result = await super().crawl(request, **kwargs)
+            request.user_data['fetch_seconds'] = time.perf_counter() - started
+            return result
@@ -0,0 +1,161 @@
+"""
+Crawl State Overview:
+This module remembers what the production mode of `website-crawler.py` fetched in previous runs, so an
+incremental crawl only reprocesses pages that changed. Every page's HTTP validators (ETag, Last-Modified),
+a hash of its body, its size, the time it took and its links are kept in a small SQLite database. The next
+run sends conditional requests; a 304 answer or an identical body skips extraction and the dataset push,
+and the stored links keep the crawl going through unchanged pages.
+
+Key Features:
+- Per-URL validators, content hash and links from the previous run.
+- Conditional request headers (If-None-Match, If-Modified-Since).
+- Run report of pages skipped, bytes avoided and time saved.
+
+Dependencies:
+- hashlib
+- json
+- sqlite3
+- time
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+COMMIT_EVERY = 200
+
+
+def content_hash(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CrawlState:
+    """Per-URL results of previous crawls, stored in SQLite."""
+
+    def __init__(self, path="crawl_state.db"):
+        self.path = path
+        # the crawler handles requests on one event loop thread, so a single connection is enough
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                size INTEGER,
+                fetch_seconds REAL,
+                process_seconds REAL,
+                links TEXT,
+                crawled_at REAL
+            )"""
+        )
+        self._pending = 0
+        self.stats = RecrawlStats()
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, size, fetch_seconds, process_seconds, links "
+            "FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, digest, size, fetch_seconds, process_seconds, links = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": digest,
+            "size": size,
+            "fetch_seconds": fetch_seconds,
+            "process_seconds": process_seconds,
+            "links": json.loads(links),
+        }
+
+    def conditional_headers(self, url):
+        """Headers that let the server answer 304 Not Modified for an unchanged page."""
+        previous = self.get(url)
+        headers = {}
+        if previous is None:
+            return headers
+        if previous["etag"]:
+            headers["If-None-Match"] = previous["etag"]
+        if previous["last_modified"]:
+            headers["If-Modified-Since"] = previous["last_modified"]
+        return headers
+
+    def record(self, url, etag, last_modified, digest, size, fetch_seconds, process_seconds, links):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, digest, size, fetch_seconds, process_seconds, json.dumps(links), time.time()),
+        )
+        self._written()
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Mark an unchanged page as seen in this run, updating validators the server sent again."""
+        self.conn.execute(
+            "UPDATE pages SET crawled_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+            "WHERE url = ?",
+            (time.time(), etag, last_modified, url),
+        )
+        self._written()
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class RecrawlStats:
+    """What an incremental crawl fetched, skipped and saved compared with a full recrawl."""
+
+    def __init__(self):
+        self.new = 0
+        self.changed = 0
+        self.not_modified = 0
+        self.same_content = 0
+        self.bytes_avoided = 0
+        self.seconds_saved = 0.0
+
+    def record_fetched(self, previous):
+        if previous is None:
+            self.new += 1
+        else:
+            self.changed += 1
+
+    def record_not_modified(self, previous, fetch_seconds):
+        # the body was not sent and nothing was processed
+        self.not_modified += 1
+        self.bytes_avoided += previous["size"] or 0
+        saved = (previous["fetch_seconds"] or 0) + (previous["process_seconds"] or 0) - fetch_seconds
+        self.seconds_saved += max(saved, 0.0)
+
+    def record_same_content(self, previous):
+        # the body was downloaded again, but extraction and the dataset push were skipped
+        self.same_content += 1
+        self.seconds_saved += previous["process_seconds"] or 0
+
+    @property
+    def skipped(self):
+        return self.not_modified + self.same_content
+
+    def summary(self):
+        return (
+            f"{self.new} new, {self.changed} changed, {self.skipped} unchanged pages skipped "
+            f"({self.not_modified} not modified, {self.same_content} same content), "
+            f"{self.bytes_avoided / 1024:.0f} KB not downloaded, ~{self.seconds_saved:.1f}s of per-page fetch and processing time saved"
+        )
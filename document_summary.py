@@ -0,0 +1,62 @@
+"""
+Document Summary Overview:
+This module holds the document side of summarization: reading the text of the first pages of a PDF, the
+summarizer prompt and writing summaries to Word and PowerPoint files. It is shared by `Content-summarizer.py`
+and the HTTP API gateway, which pass the text to `OpenAIConnector.summarize_text`.
+
+Key Features:
+- Text of the first N pages of a PDF (file path, file object or upload).
+- The bulleted summary prompt used by every summarizer front end.
+- DOCX and PPTX output for one summary or many (one heading or slide per document).
+
+Dependencies:
+- PyPDF2 (imported when a PDF is read)
+- docx (imported when a DOCX is written)
+- pptx (imported when a PPTX is written)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+SUMMARY_PROMPT = "You are an expert summarizer. You need to summarize the document in a very concise manner highlighting key points in bulleted format"
+
+
+def extract_pdf_text(file, num_pages):
+    """Text of the first num_pages pages of a PDF. Raises ValueError when num_pages is not positive."""
+    if num_pages <= 0:
+        raise ValueError("Number of pages needs to be greater than 0")
+    from PyPDF2 import PdfReader
+
+    pdf = PdfReader(file)
+    text = ""
+    for page_num in range(min(num_pages, len(pdf.pages))):
+        text += pdf.pages[page_num].extract_text()
+    return text
+
+
+def write_docx(sections, target, title="Document Summary"):
+    """Write (heading, summary) sections to a DOCX at target (path or file object). A None heading adds no heading."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(title, 0)
+    for heading, summary in sections:
+        if heading:
+            doc.add_heading(heading, 1)
+        doc.add_paragraph(summary)
+    doc.save(target)
+    return target
+
+
+def write_pptx(sections, target, title="Document Summary"):
+    """Write (heading, summary) sections to a PPTX at target, one slide per section titled heading or title."""
+    from pptx import Presentation
+
+    pres = Presentation()
+    slide_layout = pres.slide_layouts[1]  # Title and Content layout
+    for heading, summary in sections:
+        slide = pres.slides.add_slide(slide_layout)
+        slide.shapes.title.text = heading or title
+        slide.placeholders[1].text = summary
+    pres.save(target)
+    return target
@@ -5,15 +5,24 @@
 ## August 2024
 
 import streamlit as st
-import requests
 import os
 import random
 import string
-from openai_client import OpenAIClient  # OpenAI connector class
+from openai_client import get_shared_client  # OpenAI connector
+from image_gallery import GalleryIndex, ThumbnailWorker  # gallery index and thumbnails
+from image_cache import GenerationCache, make_cache_key  # opt-in generation cache
+from image_batch import BatchStats, build_jobs, run_batch  # batch generation queue
+from image_renditions import RENDITIONS, RENDITIONS_FOLDER, RenditionStore  # social media renditions
+from app_profiling import stage, start_rerun  # opt-in rerun timing (APP_PROFILE=1)
+
+GALLERY_PAGE_SIZE = 12
+IMAGE_DIMENSIONS = ['1024x1024', '1024x1792','1792x1024']
+IMAGE_QUALITIES = ["standard","hd"]
+IMAGE_STYLES = ["vivid", "natural"]
 
 def initialize_client():
-    openai_client_obj = OpenAIClient()
-    return openai_client_obj.get_client()
+    # created once per process on first use, reruns reuse it
+    return get_shared_client()
 
 def generate_unique_filename():
     # Create a random alphanumeric string of 5 characters
@@ -39,9 +48,51 @@ def generate_image(client, prompt, image_dimension, quality, style):
         style=style
     )
 
+# gallery index and thumbnail worker are shared across reruns and sessions
+@st.cache_resource
+def get_gallery(images_dir):
+    gallery = GalleryIndex(images_dir)
+    worker = ThumbnailWorker(gallery)
+    # pick up images generated before the index existed
+    gallery.backfill()
+    for entry in gallery.page(0, gallery.count()):
+        worker.submit(entry["name"])
+    return gallery, worker
+
+@st.cache_resource
+def get_generation_cache(images_dir):
+    gallery, _ = get_gallery(images_dir)
+    return GenerationCache(gallery)
+
+# platform sizes are rendered in a process pool shared across reruns and sessions
+@st.cache_resource
+def get_renditions(images_dir):
+    return RenditionStore(os.path.join(images_dir, RENDITIONS_FOLDER))
+
+# generate, save and index one image. Serves it from the cache when one is given and a matching image exists
+def create_image(client, gallery, thumbnail_worker, prompt, image_dimension, quality, style, cache=None, force_new=False, renditions=None):
+    cache_key = make_cache_key(prompt, image_dimension, quality, style)
+    if cache is not None and not force_new:
+        cached_name = cache.lookup(cache_key)
+        if cached_name:
+            return cached_name, True
+
+    model_response = generate_image(client, prompt, image_dimension, quality, style)
+    generated_image_name = generate_unique_filename()
+    generated_image_filepath = gallery.image_path(generated_image_name)
+    save_image(model_response.data[0].url, generated_image_filepath)       # save the image
+    gallery.add(generated_image_name, prompt, image_dimension, quality, style)
+    thumbnail_worker.submit(generated_image_name)
+    if renditions is not None:
+        renditions.submit(generated_image_filepath)
+    if cache is not None:
+        cache.store(cache_key, generated_image_name)
+    return generated_image_name, False
+
 #save image for it to be displayed to page
 def save_image(image_url, image_path):
     """Save the generated image from URL to the specified path."""
+    import requests  # only needed once an image is generated
     generated_image = requests.get(image_url).content
     
     with open(image_path, "wb") as image_file:
@@ -53,58 +104,144 @@ def display_image(image_path, width):
     st.image(image_path, width=width)
     st.success(f"Image generated successfully. Hope you like it. Right-click and use Save As to save the image...")
 
+# run a batch of generations through the worker queue and render each image as it lands
+def generate_batch(client, images_dir, jobs, max_workers, retries, cache=None, force_new=False, renditions=None):
+    # resolve the cached resources here, the worker threads have no Streamlit script context
+    gallery, thumbnail_worker = get_gallery(images_dir)
+
+    def worker(job):
+        return create_image(
+            client, gallery, thumbnail_worker, job["prompt"], job["size"], job["quality"], job["style"], cache, force_new, renditions
+        )
+
+    stats = BatchStats(len(jobs))
+    progress = st.progress(0.0, text=f"0/{len(jobs)} images")
+    result_cols = st.columns(3)
+    for job, result, error, attempts in run_batch(jobs, worker, max_workers=max_workers, retries=retries):
+        stats.record(error, attempts)
+        with result_cols[(stats.done - 1) % 3]:
+            caption = f"{job['prompt'][:60]} ({job['size']}, {job['quality']}, {job['style']})"
+            if error is None:
+                st.image(gallery.image_path(result[0]), caption=caption, use_column_width=True)
+            else:
+                st.error(f"Failed after {attempts} attempts: {caption}: {error}")
+        progress.progress(stats.done / stats.total, text=f"{stats.done}/{stats.total} images")
+    st.success(stats.summary())
+
 def main():
-    # Initialize OpenAI Client
-    client = initialize_client()
+    # Streamlit app layout
+    st.set_page_config(page_title="DALL-E Image Generator", layout="wide")
 
     # Setting up images directory
     images_dir = setup_images_folder()
-
-    # Streamlit app layout
-    st.set_page_config(page_title="DALL-E Image Generator", layout="wide")
+    gallery, thumbnail_worker = get_gallery(images_dir)
 
     # Sidebar options
     st.sidebar.title("Image Settings")
-    image_dimension = st.sidebar.radio("Select Image Dimension", ['1024x1024', '1024x1792','1792x1024'])
-    quality = st.sidebar.radio("Select Quality", ["standard","hd"])
-    style = st.sidebar.radio("Select Style", ["vivid", "natural"])
+    mode = st.sidebar.radio("Mode", ["Single Image", "Batch"], horizontal=True)
+    if mode == "Single Image":
+        image_dimension = st.sidebar.radio("Select Image Dimension", IMAGE_DIMENSIONS)
+        quality = st.sidebar.radio("Select Quality", IMAGE_QUALITIES)
+        style = st.sidebar.radio("Select Style", IMAGE_STYLES)
+    else:
+        # every prompt is generated once per selected dimension/quality/style combination
+        image_dimensions = st.sidebar.multiselect("Image Dimensions", IMAGE_DIMENSIONS, default=IMAGE_DIMENSIONS[:1])
+        qualities = st.sidebar.multiselect("Quality", IMAGE_QUALITIES, default=IMAGE_QUALITIES[:1])
+        styles = st.sidebar.multiselect("Styles", IMAGE_STYLES, default=IMAGE_STYLES[:1])
+        max_workers = st.sidebar.slider("Parallel generations", 1, 8, 3)
+        retries = st.sidebar.slider("Retries per image", 0, 3, 2)
+    use_cache = st.sidebar.checkbox("Reuse identical generations (cache)", value=False)
+    force_new = st.sidebar.checkbox("Force new variation", value=False, disabled=not use_cache)
+    cache = get_generation_cache(images_dir) if use_cache else None
+    renditions = get_renditions(images_dir) if st.sidebar.checkbox("Create social media renditions", value=True) else None
 
     # Text input for prompt
     st.title("DALL-E Image Generator")
-    image_prompt = st.text_area("Enter the Image Prompt:", height=150)
+    if mode == "Single Image":
+        image_prompt = st.text_area("Enter the Image Prompt:", height=150)
+    else:
+        image_prompt = st.text_area("Enter the Image Prompts (one per line):", height=150)
 
     # Submit button
-    if st.button("Generate Image"):
+    if mode == "Single Image" and st.button("Generate Image"):
         if not image_prompt.strip():
             st.error("Prompt cannot be empty!")
         else:
             try:
                 with st.spinner("Generating image..."):
                     # Generate the image
-                    model_response = generate_image(client, image_prompt, image_dimension, quality, style)
-
-                    generated_image_name = generate_unique_filename()
-                    generated_image_filepath = os.path.join(images_dir, generated_image_name)
-                    generated_image_url = model_response.data[0].url
-                    save_image(generated_image_url, generated_image_filepath)       # save the image
+                    with stage("API call"):
+                        generated_image_name, from_cache = create_image(
+                            initialize_client(), gallery, thumbnail_worker, image_prompt, image_dimension, quality, style, cache, force_new, renditions
+                        )
+                    generated_image_filepath = gallery.image_path(generated_image_name)
+                    if from_cache:
+                        st.info("Served from the generation cache. Tick 'Force new variation' for a fresh image.")
                     image_width = int(image_dimension.split('x')[0])    # Display the generated image, use the orignal dimensions
                     display_image(generated_image_filepath, image_width)
 
             except Exception as e:
                 st.error(f"An error occurred: {e}")
+    elif mode == "Batch" and st.button("Generate Batch"):
+        prompts = [line.strip() for line in image_prompt.splitlines() if line.strip()]
+        jobs = build_jobs(prompts, image_dimensions, qualities, styles)
+        if not jobs:
+            st.error("Enter at least one prompt and select a dimension, quality and style!")
+        else:
+            with stage("API call"):
+                generate_batch(initialize_client(), images_dir, jobs, max_workers, retries, cache, force_new, renditions)
     st.write("---")
 
     with st.sidebar:
+        if cache is not None:
+            cache_stats = cache.stats()
+            st.caption(
+                f"Cache hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits) | "
+                f"Saved: {cache_stats['bytes_saved'] / (1024 * 1024):.1f} MB | "
+                f"Cached: {cache_stats['entries']} images"
+            )
         st.write("---")
-        #setup to display the existing images. 
-        image_files = os.listdir(images_dir)
-        image_files.insert(0,'None')    # hard coded None as first element in the list. 
-        selected_image = st.sidebar.selectbox("Select an Image to Display", image_files,)
-
-    if selected_image != 'None':
+        # page through the thumbnails from the gallery index, full images load only when opened
+        st.subheader("Gallery")
+        with stage("gallery"):
+            total_pages = max(1, -(-gallery.count() // GALLERY_PAGE_SIZE))
+            page_number = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+            entries = gallery.page(page_number - 1, GALLERY_PAGE_SIZE)
+        thumb_cols = st.columns(3)
+        for idx, entry in enumerate(entries):
+            with thumb_cols[idx % 3]:
+                thumbnail_path = gallery.thumbnail_path(entry["name"])
+                if os.path.exists(thumbnail_path):
+                    st.image(thumbnail_path, use_column_width=True)
+                else:
+                    st.caption("Thumbnail pending...")
+                if st.button("Open", key=f"open_{entry['name']}"):
+                    st.session_state.selected_image = entry["name"]
+        if st.session_state.get("selected_image") and st.button("Close Image"):
+            st.session_state.selected_image = None
+
+    selected_image = st.session_state.get("selected_image")
+    if selected_image and os.path.exists(gallery.image_path(selected_image)):
         # if an image is selected only then display
-        selected_image_path = os.path.join(images_dir, selected_image)
-        st.image(selected_image_path, caption=selected_image, use_column_width=True)
+        entry = gallery.get(selected_image) or {}
+        selected_image_path = gallery.image_path(selected_image)
+        caption = entry.get("prompt") or selected_image
+        st.image(selected_image_path, caption=caption, use_column_width=True)
+        if entry.get("size"):
+            st.caption(f"{entry['size']} | {entry['quality']} | {entry['style']} | {entry['created_at']}")
+        if renditions is not None:
+            # sized and compressed variants for posting, rendered now if the pool has not made them yet
+            platform = st.selectbox("Renditions for", list(RENDITIONS))
+            with stage("renditions"):
+                variants = renditions.variants(selected_image_path, platform)
+            variant_cols = st.columns(len(variants))
+            for col, (spec, path) in zip(variant_cols, variants):
+                with col:
+                    st.image(path, caption=f"{spec.name} {spec.width}x{spec.height} {spec.format} ({os.path.getsize(path) // 1024} KB)")
+                    with open(path, "rb") as f:
+                        st.download_button("Download", data=f.read(), file_name=f"{selected_image}-{spec.filename}",
+                                           mime=spec.media_type, key=f"rendition_{spec.filename}")
 
 if __name__ == "__main__":
-    main()
+    with start_rerun("generate-images"):
+        main()
@@ -24,16 +24,17 @@ Date: August 2024
 
 import os
 import streamlit as st
-from PIL import Image
-import pytesseract
 from openai_connector import OpenAIConnector
+from app_profiling import stage, start_rerun
 import io
 import time
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-# Initialize OpenAI Connector
-openai_connector = OpenAIConnector()
+# Initialize OpenAI Connector once per process, on the first post, instead of on every rerun
+@st.cache_resource
+def get_openai_connector():
+    return OpenAIConnector()
 
 # Setting page config
 st.set_page_config(
@@ -45,9 +46,16 @@ st.set_page_config(
 )
 
 def generate_post_from_image(file, model, prompt):
-    image = Image.open(file)
-    text = pytesseract.image_to_string(image)
-    return openai_connector.summarize_text(text, model, prompt)
+    # OCR libraries are only needed once an image is submitted
+    from PIL import Image
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    with stage("OCR"):
+        image = Image.open(file)
+        text = pytesseract.image_to_string(image)
+    with stage("API call"):
+        return get_openai_connector().summarize_text(text, model, prompt)
 
 # Streamlit UI
 st.title("Social Media Post Generator")
@@ -88,7 +96,8 @@ def main():
                     if st.session_state.user_prompt:
                         generated_post = generate_post_from_image(st.session_state.uploaded_file, model_type, st.session_state.user_prompt)
                         generated_post = generated_post.replace('$', 'USD')
-                        st.write_stream(stream_data(generated_post))
+                        with stage("render"):
+                            st.write_stream(stream_data(generated_post))
                     else:
                         st.warning("Please provide a description for the prompt.")
             except Exception as e:
@@ -97,4 +106,5 @@ def main():
             st.warning("Please upload an image file.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with start_rerun("generate-posts-for-socialmedia"):
+        main()
\ No newline at end of file
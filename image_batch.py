@@ -0,0 +1,101 @@
+"""
+Batch Generation Overview:
+This module runs a list of image generation jobs through a bounded pool of worker threads. Results are
+yielded in completion order so the caller (the Streamlit app) can render each image as soon as it lands,
+and failed jobs are retried with a short exponential backoff before being reported as failures.
+
+Key Features:
+- Build jobs from many prompts or from one prompt crossed with size/style variants.
+- Bounded concurrency with a ThreadPoolExecutor.
+- Per-job retries with exponential backoff.
+- Throughput statistics (images per minute).
+
+Dependencies:
+- time
+- itertools
+- concurrent.futures
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def build_jobs(prompts, sizes, qualities, styles):
+    """Cross every prompt with every size, quality and style. Returns a list of job dicts."""
+    return [
+        {"prompt": prompt, "size": size, "quality": quality, "style": style}
+        for prompt, size, quality, style in itertools.product(prompts, sizes, qualities, styles)
+    ]
+
+
+def _run_with_retries(worker, job, retries, backoff):
+    attempt = 0
+    while True:
+        try:
+            return worker(job), attempt
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+
+def run_batch(jobs, worker, max_workers=4, retries=2, backoff=1.0):
+    """
+    Run worker(job) for every job with at most max_workers in flight.
+
+    Yields (job, result, error, attempts) tuples in completion order. error is None on success,
+    otherwise the exception raised by the last attempt and result is None.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_with_retries, worker, job, retries, backoff): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result, retried = future.result()
+                yield job, result, None, retried + 1
+            except Exception as e:
+                yield job, None, e, retries + 1
+
+
+class BatchStats:
+    """Collects success/failure counts and throughput for one batch run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.started = time.perf_counter()
+
+    def record(self, error, attempts):
+        if error is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.retried += attempts - 1
+
+    @property
+    def done(self):
+        return self.completed + self.failed
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def images_per_minute(self):
+        return self.completed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.completed}/{self.total} images in {self.elapsed:.1f}s "
+            f"({self.images_per_minute:.1f} images/minute), {self.failed} failed, {self.retried} retries"
+        )
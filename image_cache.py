@@ -0,0 +1,117 @@
+"""
+Generation Cache Overview:
+This module provides an opt-in cache for DALL-E generations. Requests are keyed on the normalized prompt
+plus image dimension, quality and style, so repeating a request serves the stored image instead of paying
+for (and waiting on) a new generation. Cached images are ordinary gallery images: once the cache holds more
+than max_entries entries the least recently used ones are forgotten. The limit bounds the number of cache
+entries only, the images stay in the gallery and keep their disk space.
+
+Key Features:
+- Normalize prompts (case and whitespace) before hashing them with the image settings.
+- Keep cache entries and hit/miss statistics in the gallery SQLite index.
+- LRU eviction of cache entries (not of gallery images) beyond an entry budget of max_entries.
+- Report hit rate and bytes saved.
+
+Dependencies:
+- os
+- hashlib
+- time
+- image_gallery (gallery index the cached images belong to)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import os
+import time
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.lower().split())
+
+
+def make_cache_key(prompt, size, quality, style):
+    raw = "|".join([normalize_prompt(prompt), size, quality, style])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    def __init__(self, gallery, max_entries=500):
+        self.gallery = gallery
+        self.max_entries = max_entries
+        with self.gallery.connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS generation_cache (
+                    key TEXT PRIMARY KEY,
+                    name TEXT,
+                    bytes INTEGER,
+                    last_used REAL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS generation_cache_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    hits INTEGER,
+                    misses INTEGER,
+                    bytes_saved INTEGER
+                )"""
+            )
+            conn.execute("INSERT OR IGNORE INTO generation_cache_stats VALUES (0, 0, 0, 0)")
+
+    def lookup(self, key):
+        """Return the image name cached for key, or None. Updates the LRU order and statistics."""
+        with self.gallery.connect() as conn:
+            row = conn.execute("SELECT name, bytes FROM generation_cache WHERE key = ?", (key,)).fetchone()
+            if row and not os.path.exists(self.gallery.image_path(row[0])):
+                # image was deleted outside of the cache
+                conn.execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                conn.execute("UPDATE generation_cache_stats SET misses = misses + 1")
+                return None
+            conn.execute("UPDATE generation_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.execute(
+                "UPDATE generation_cache_stats SET hits = hits + 1, bytes_saved = bytes_saved + ?",
+                (row[1],),
+            )
+        return row[0]
+
+    def store(self, key, name):
+        """Cache the image name for key and evict old entries if the cache holds more than max_entries."""
+        size = os.path.getsize(self.gallery.image_path(name))
+        with self.gallery.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO generation_cache VALUES (?, ?, ?, ?)",
+                (key, name, size, time.time()),
+            )
+        self.evict()
+
+    def evict(self):
+        """Forget least recently used entries beyond max_entries. Returns the names of their images, which are left
+        in the gallery."""
+        with self.gallery.connect() as conn:
+            rows = conn.execute(
+                "SELECT key, name FROM generation_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+                (self.max_entries,),
+            ).fetchall()
+            conn.executemany("DELETE FROM generation_cache WHERE key = ?", [(key,) for key, _ in rows])
+        return [name for _, name in rows]
+
+    def stats(self):
+        with self.gallery.connect() as conn:
+            hits, misses, bytes_saved = conn.execute(
+                "SELECT hits, misses, bytes_saved FROM generation_cache_stats"
+            ).fetchone()
+            entries, cached_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM generation_cache"
+            ).fetchone()
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bytes_saved": bytes_saved,
+            "entries": entries,
+            "cached_bytes": cached_bytes,
+        }
@@ -0,0 +1,147 @@
+"""
+Gallery Index Overview:
+This module keeps a small SQLite index of the images produced by `generate-images.py` together with
+pre-generated WebP thumbnails. The Streamlit gallery reads from the index instead of listing the images
+folder on every rerun, and only loads the full resolution image when the user opens it.
+
+Key Features:
+- Record prompt, size, quality, style and timestamp for every generated image.
+- Register images that were generated before the index existed (unknown metadata).
+- Create WebP thumbnails in a background worker thread so the UI never waits for them.
+- Page through the index newest first.
+
+Dependencies:
+- os
+- sqlite3
+- threading
+- queue
+- PIL (Pillow)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from PIL import Image
+
+INDEX_FILENAME = "gallery.db"
+THUMBNAILS_FOLDER = "thumbnails"
+IMAGE_PREFIX = "image_generator_"
+THUMBNAIL_SIZE = (256, 256)
+
+
+class GalleryIndex:
+    def __init__(self, images_dir):
+        self.images_dir = images_dir
+        self.index_path = os.path.join(images_dir, INDEX_FILENAME)
+        self.thumbnails_dir = os.path.join(images_dir, THUMBNAILS_FOLDER)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS images (
+                    name TEXT PRIMARY KEY,
+                    prompt TEXT,
+                    size TEXT,
+                    quality TEXT,
+                    style TEXT,
+                    created_at TEXT
+                )"""
+            )
+
+    def connect(self):
+        """A new connection to the index database, also used by image_cache.py for its own tables."""
+        # a new connection per call keeps the index usable from the thumbnail worker thread
+        return sqlite3.connect(self.index_path)
+
+    def image_path(self, name):
+        return os.path.join(self.images_dir, name)
+
+    def thumbnail_path(self, name):
+        return os.path.join(self.thumbnails_dir, f"{name}.webp")
+
+    def add(self, name, prompt, size, quality, style, created_at=None):
+        """Record a generated image in the index."""
+        created_at = created_at or datetime.now().isoformat()
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                (name, prompt, size, quality, style, created_at),
+            )
+
+    def backfill(self):
+        """Register image files that are on disk but missing from the index. Returns the new names."""
+        with self.connect() as conn:
+            known = {row[0] for row in conn.execute("SELECT name FROM images")}
+            missing = [
+                name for name in os.listdir(self.images_dir)
+                if name.startswith(IMAGE_PREFIX) and name not in known
+            ]
+            for name in missing:
+                created_at = datetime.fromtimestamp(os.path.getmtime(self.image_path(name))).isoformat()
+                conn.execute(
+                    "INSERT INTO images VALUES (?, NULL, NULL, NULL, NULL, ?)",
+                    (name, created_at),
+                )
+        return missing
+
+    def count(self):
+        with self.connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def page(self, page_number, page_size=12):
+        """Return one page (0 based) of index entries as dicts, newest first."""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM images ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (page_size, page_number * page_size),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, name):
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM images WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+
+def create_thumbnail(image_path, thumbnail_path, size=THUMBNAIL_SIZE):
+    """Write a WebP thumbnail for the image at image_path."""
+    with Image.open(image_path) as image:
+        image.thumbnail(size)
+        image.save(thumbnail_path, "WEBP", quality=80)
+    return thumbnail_path
+
+
+class ThumbnailWorker:
+    """Background thread that creates missing thumbnails for names put on its queue."""
+
+    def __init__(self, gallery):
+        self.gallery = gallery
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, name):
+        self._queue.put(name)
+
+    def _run(self):
+        while True:
+            name = self._queue.get()
+            try:
+                thumbnail_path = self.gallery.thumbnail_path(name)
+                if not os.path.exists(thumbnail_path):
+                    create_thumbnail(self.gallery.image_path(name), thumbnail_path)
+            except Exception as e:
+                print(f"Failed to create thumbnail for {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every submitted thumbnail has been processed."""
+        self._queue.join()
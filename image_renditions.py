@@ -0,0 +1,178 @@
+"""
+Image Renditions Overview:
+This module turns an image from `generate-images.py` into the sizes and crops the social media platforms
+expect (Twitter, Instagram, Facebook, the platforms of the post generators). Every rendition is center
+cropped to its aspect ratio, resized and compressed as WebP or JPEG. Renditions are rendered in a process
+pool right after an image is generated, so the resizing and encoding neither blocks the Streamlit script
+nor competes with it for the GIL, and they are stored under the SHA-256 of the source image: a source that
+was rendered before, for example an image served from the generation cache, costs nothing.
+
+Key Features:
+- Platform rendition specs (name, size, format, quality), served per platform and variant.
+- Center crop and Lanczos resize with Pillow, WebP or JPEG output written atomically.
+- Process pool rendering in the background, with a synchronous fallback when a rendition is requested
+  before the pool has produced it.
+- Cache folder per source hash, file names that change with the spec so edited specs re-render.
+
+Dependencies:
+- hashlib
+- multiprocessing
+- os
+- threading
+- concurrent.futures
+- dataclasses
+- PIL (Pillow)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+RENDITIONS_FOLDER = "renditions"
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+MEDIA_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    platform: str
+    name: str
+    width: int
+    height: int
+    format: str = "JPEG"
+    quality: int = 85
+
+    @property
+    def filename(self):
+        return (f"{self.platform.lower()}-{self.name}-{self.width}x{self.height}"
+                f"-q{self.quality}.{EXTENSIONS[self.format]}")
+
+    @property
+    def media_type(self):
+        return MEDIA_TYPES[self.format]
+
+
+# the first rendition of a platform is its default
+RENDITIONS = {
+    "Twitter": [
+        Rendition("Twitter", "post", 1600, 900, "WEBP", 82),
+        Rendition("Twitter", "square", 1080, 1080, "WEBP", 82),
+    ],
+    "Instagram": [
+        Rendition("Instagram", "square", 1080, 1080),
+        Rendition("Instagram", "portrait", 1080, 1350),
+        Rendition("Instagram", "story", 1080, 1920),
+    ],
+    "Facebook": [
+        Rendition("Facebook", "post", 1200, 630),
+        Rendition("Facebook", "square", 1080, 1080),
+    ],
+}
+
+
+def source_hash(image_path):
+    """SHA-256 of the image file, the cache key of its renditions."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def render_renditions(image_path, output_dir, specs):
+    """Write the missing renditions of image_path to output_dir. Runs in the pool processes. Returns the paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, spec.filename) for spec in specs]
+    missing = [(spec, path) for spec, path in zip(specs, paths) if not os.path.exists(path)]
+    if missing:
+        with Image.open(image_path) as image:
+            image = image.convert("RGB")
+            for spec, path in missing:
+                rendition = ImageOps.fit(image, (spec.width, spec.height), Image.LANCZOS)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                rendition.save(tmp_path, spec.format, quality=spec.quality, optimize=spec.format == "JPEG")
+                os.replace(tmp_path, path)
+    return paths
+
+
+class RenditionStore:
+    """Renditions of the images in one folder, rendered by a process pool and cached by source hash."""
+
+    def __init__(self, renditions_dir, max_workers=None, renditions=RENDITIONS):
+        self.renditions_dir = renditions_dir
+        self.max_workers = max_workers or os.cpu_count()
+        self.renditions = renditions
+        self._executor = None
+        self._pending = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(renditions_dir, exist_ok=True)
+
+    def _pool(self):
+        # the worker processes are started on the first submit, not when the page loads. They are spawned:
+        # forking the threaded Streamlit or uvicorn process can copy a lock held by another thread and hang
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _source_dir(self, image_path):
+        stat = os.stat(image_path)
+        key = (image_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            self._hashes[key] = source_hash(image_path)
+        return os.path.join(self.renditions_dir, self._hashes[key])
+
+    def _specs(self, platforms=None):
+        return [spec for platform in (platforms or self.renditions) for spec in self.renditions[platform]]
+
+    def submit(self, image_path, platforms=None):
+        """Render the renditions of image_path in the background. Returns the future of their paths, or None when cached."""
+        output_dir = self._source_dir(image_path)
+        specs = [spec for spec in self._specs(platforms) if not os.path.exists(os.path.join(output_dir, spec.filename))]
+        if not specs:
+            return None
+        with self._lock:
+            future = self._pending.get(output_dir)
+            if future is not None and not future.done():
+                return future
+            future = self._pool().submit(render_renditions, image_path, output_dir, specs)
+            self._pending[output_dir] = future
+        # outside the lock, the callback runs right away when the job has already finished
+        future.add_done_callback(lambda f: self._forget(output_dir, f))
+        return future
+
+    def _forget(self, output_dir, future):
+        with self._lock:
+            if self._pending.get(output_dir) is future:
+                del self._pending[output_dir]
+
+    def variants(self, image_path, platform):
+        """(Rendition, path) of every rendition of a platform, waiting for or rendering the missing ones."""
+        output_dir = self._source_dir(image_path)
+        with self._lock:
+            future = self._pending.get(output_dir)
+        if future is not None:
+            future.exception()  # wait, a failed job is retried below
+        specs = self.renditions[platform]
+        # anything the pool has not produced (another process, a failed job) is rendered right here
+        return list(zip(specs, render_renditions(image_path, output_dir, specs)))
+
+    def rendition(self, image_path, platform, name=None):
+        """(Rendition, path) of one variant of a platform, the platform's default when name is None."""
+        for spec, path in self.variants(image_path, platform):
+            if name is None or spec.name == name:
+                return spec, path
+        raise KeyError(f"{platform} has no rendition named '{name}'")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,172 @@
+"""
+Market Data Overview:
+This module is the market-data layer for `stock-analysis-usingGPT.py`. All requested tickers are downloaded
+in one batched call and every ticker/interval is kept in a local Parquet cache. Later requests only download
+the date ranges the cache does not cover yet, so re-running an analysis is served from disk. Only ranges
+that returned data are recorded as covered, and 5 day bars, which yfinance counts from the start of each
+download, are downloaded again for the whole range instead of merged.
+
+Key Features:
+- One batched download for all tickers that miss the same date range.
+- Parquet file per ticker and interval, plus a coverage file recording which date range was fetched.
+- Pluggable data source: yfinance by default, FixtureSource for offline use and benchmarks.
+
+Dependencies:
+- os
+- json
+- pandas (with pyarrow for Parquet)
+- yfinance (only for YFinanceSource)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import json
+import os
+
+import pandas as pd
+
+# yfinance counts 5 day bars from the first day of each download, so bars of two downloads do not line up
+START_ANCHORED_INTERVALS = ("5d",)
+
+
+class YFinanceSource:
+    """Downloads OHLCV data for many tickers in a single yfinance call."""
+
+    def download(self, tickers, start, end, interval):
+        import yfinance as yf
+
+        data = yf.download(
+            tickers, start=start, end=end, interval=interval,
+            group_by="ticker", threads=True, progress=False,
+        )
+        return split_by_ticker(data, tickers)
+
+
+class FixtureSource:
+    """Serves OHLCV data from in-memory DataFrames, for offline use and benchmarks."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def download(self, tickers, start, end, interval):
+        self.calls.append((tuple(tickers), start, end, interval))
+        result = {}
+        for ticker in tickers:
+            frame = self.frames.get(ticker)
+            if frame is not None:
+                result[ticker] = frame[(frame.index >= start) & (frame.index < end)]
+        return result
+
+
+def split_by_ticker(data, tickers):
+    """Split a (possibly multi-level) yfinance frame into a dict of per-ticker frames."""
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {tickers[0]: data}
+    frames = {}
+    for ticker in tickers:
+        if ticker in data.columns.get_level_values(0):
+            frame = data[ticker].dropna(how="all")
+            if not frame.empty:
+                frames[ticker] = frame
+    return frames
+
+
+class MarketDataStore:
+    def __init__(self, cache_dir="market_data", source=None):
+        self.cache_dir = cache_dir
+        self.source = source or YFinanceSource()
+
+    def _interval_dir(self, interval):
+        path = os.path.join(self.cache_dir, interval)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _frame_path(self, ticker, interval):
+        return os.path.join(self._interval_dir(interval), f"{ticker}.parquet")
+
+    def _coverage_path(self, interval):
+        return os.path.join(self._interval_dir(interval), "coverage.json")
+
+    def _load_coverage(self, interval):
+        path = self._coverage_path(interval)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return {ticker: (pd.Timestamp(s), pd.Timestamp(e)) for ticker, (s, e) in json.load(f).items()}
+
+    def _save_coverage(self, interval, coverage):
+        with open(self._coverage_path(interval), "w") as f:
+            json.dump({ticker: [s.isoformat(), e.isoformat()] for ticker, (s, e) in coverage.items()}, f, indent=4)
+
+    def _load_frame(self, ticker, interval):
+        path = self._frame_path(ticker, interval)
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    @staticmethod
+    def missing_ranges(start, end, covered):
+        """Return the [start, end) ranges not inside the covered (start, end) range."""
+        if covered is None:
+            return [(start, end)]
+        covered_start, covered_end = covered
+        if end <= covered_start or start >= covered_end:
+            # disjoint, fetch the gap too so coverage stays one contiguous range
+            return [(min(start, covered_end), max(end, covered_start))]
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            ranges.append((covered_end, end))
+        return ranges
+
+    def get(self, tickers, start, end, interval="1d"):
+        """Return {ticker: DataFrame} for [start, end), downloading only what the cache is missing."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        coverage = self._load_coverage(interval)
+
+        # group tickers by missing range, so each range is one batched download
+        anchored = interval in START_ANCHORED_INTERVALS
+        pending = {}
+        for ticker in tickers:
+            covered = coverage.get(ticker)
+            missing = self.missing_ranges(start, end, covered)
+            if anchored and missing:
+                # the whole range is downloaded again and replaces the cached bars
+                missing = [(start, end) if covered is None else (min(start, covered[0]), max(end, covered[1]))]
+            for missing_range in missing:
+                pending.setdefault(missing_range, []).append(ticker)
+
+        for (range_start, range_end), range_tickers in pending.items():
+            downloaded = self.source.download(range_tickers, range_start, range_end, interval)
+            for ticker in range_tickers:
+                cached = self._load_frame(ticker, interval)
+                fresh = downloaded.get(ticker)
+                if fresh is None or fresh.empty:
+                    # an empty answer (unknown ticker, rate limit, outage) is not cached, the next call asks again
+                    continue
+                fresh = fresh.copy()
+                fresh.index = pd.to_datetime(fresh.index).tz_localize(None)
+                merged = fresh if cached is None or anchored else pd.concat([cached, fresh])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                merged.to_parquet(self._frame_path(ticker, interval))
+                # never mark days after today as covered, they have no data yet
+                covered_end = min(range_end, pd.Timestamp.today().normalize())
+                covered = coverage.get(ticker)
+                coverage[ticker] = (
+                    (range_start, covered_end) if covered is None
+                    else (min(covered[0], range_start), max(covered[1], covered_end))
+                )
+        if pending:
+            self._save_coverage(interval, coverage)
+
+        result = {}
+        for ticker in tickers:
+            frame = self._load_frame(ticker, interval)
+            if frame is not None:
+                result[ticker] = frame[(frame.index >= start) & (frame.index < end)]
+            else:
+                result[ticker] = pd.DataFrame()
+        return result
@@ -0,0 +1,233 @@
+"""
+Mermaid Flow Overview:
+This module generates Mermaid scripts for Python sources locally by walking the `ast`, so the code assistant
+does not need a model call (and never gets invalid syntax back) for Python flow diagrams. It produces a
+flowchart with one subgraph per function (branches, loops, try blocks, returns and calls) and a call graph
+of the functions defined in the file.
+
+Key Features:
+- Deterministic flowchart of every function, method and the module-level code.
+- Call graph between the functions defined in the source.
+- Labels are escaped and shortened so the output is always valid Mermaid.
+- Check that a rewritten script kept the same nodes and edges (for optional label polishing).
+
+Dependencies:
+- ast
+- re
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import ast
+import re
+
+MAX_LABEL_CHARS = 48
+EDGE = re.compile(r"^\s*(\w+)\s*-->")
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+
+
+def escape_label(text):
+    """Make text safe inside a quoted Mermaid label."""
+    text = " ".join(text.split())
+    if len(text) > MAX_LABEL_CHARS:
+        text = text[:MAX_LABEL_CHARS - 3] + "..."
+    return text.replace('"', "#quot;").replace("<", "#lt;").replace(">", "#gt;").replace("|", "#124;")
+
+
+def _describe(node):
+    """Short label for a simple statement."""
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+        return f"call {ast.unparse(node.value.func)}()"
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return f"def {node.name}()"
+    if isinstance(node, ast.ClassDef):
+        return f"class {node.name}"
+    return ast.unparse(node).splitlines()[0]
+
+
+class _FlowBuilder:
+    SHAPES = {
+        "process": '{id}["{label}"]',
+        "decision": '{id}{{"{label}"}}',
+        "terminal": '{id}(["{label}"])',
+    }
+
+    def __init__(self):
+        self.lines = []
+        self.count = 0
+        self.loops = []
+
+    def node(self, label, shape="process"):
+        self.count += 1
+        node_id = f"n{self.count}"
+        self.lines.append("        " + self.SHAPES[shape].format(id=node_id, label=escape_label(label)))
+        return node_id
+
+    def connect(self, preds, target):
+        for source, label in preds:
+            arrow = f"-->|{escape_label(label)}|" if label else "-->"
+            self.lines.append(f"        {source} {arrow} {target}")
+
+    def leave(self, node_id, kind, end, label=None):
+        """Connect a return/raise exit to end, or collect it for the enclosing finally block when end is a list."""
+        if isinstance(end, list):
+            end.append((node_id, kind))
+        else:
+            self.connect([(node_id, label)], end)
+
+    def block(self, statements, preds, end):
+        """Add the statements after preds. Returns the dangling exits as [(node_id, edge_label)]."""
+        simple = []
+
+        def flush(preds):
+            if not simple:
+                return preds
+            node_id = self.node("; ".join(_describe(s) for s in simple[:3]) + (" ..." if len(simple) > 3 else ""))
+            simple.clear()
+            self.connect(preds, node_id)
+            return [(node_id, None)]
+
+        for statement in statements:
+            if isinstance(statement, (ast.If, ast.Try, ast.With, ast.AsyncWith, ast.Return, ast.Raise,
+                                      ast.Break, ast.Continue) + LOOP_NODES) \
+                    or (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)):
+                preds = flush(preds)
+                preds = self.statement(statement, preds, end)
+            else:
+                simple.append(statement)
+        return flush(preds)
+
+    def statement(self, statement, preds, end):
+        if isinstance(statement, ast.If):
+            decision = self.node(f"if {ast.unparse(statement.test)}", "decision")
+            self.connect(preds, decision)
+            exits = self.block(statement.body, [(decision, "Yes")], end)
+            if statement.orelse:
+                return exits + self.block(statement.orelse, [(decision, "No")], end)
+            return exits + [(decision, "No")]
+        if isinstance(statement, LOOP_NODES):
+            if isinstance(statement, ast.While):
+                label = f"while {ast.unparse(statement.test)}"
+            else:
+                label = f"for {ast.unparse(statement.target)} in {ast.unparse(statement.iter)}"
+            loop = self.node(label, "decision")
+            self.connect(preds, loop)
+            self.loops.append((loop, []))
+            body_exits = self.block(statement.body, [(loop, "next")], end)
+            self.connect(body_exits, loop)
+            _, breaks = self.loops.pop()
+            exits = self.block(statement.orelse, [(loop, "done")], end) if statement.orelse else [(loop, "done")]
+            return exits + breaks
+        if isinstance(statement, (ast.Return, ast.Raise)):
+            node_id = self.node(_describe(statement), "terminal")
+            self.connect(preds, node_id)
+            self.leave(node_id, "return" if isinstance(statement, ast.Return) else "raise", end)
+            return []
+        if isinstance(statement, ast.Break):
+            if self.loops:
+                self.loops[-1][1].extend(preds)
+            return []
+        if isinstance(statement, ast.Continue):
+            if self.loops:
+                self.connect(preds, self.loops[-1][0])
+            return []
+        if isinstance(statement, ast.Try):
+            try_node = self.node("try")
+            self.connect(preds, try_node)
+            # with a finally block, returns and raises run it before leaving the function
+            inner_end = [] if statement.finalbody else end
+            exits = self.block(statement.body + statement.orelse, [(try_node, None)], inner_end)
+            for handler in statement.handlers:
+                label = f"except {ast.unparse(handler.type)}" if handler.type else "except"
+                exits += self.block(handler.body, [(try_node, label)], inner_end)
+            if not statement.finalbody:
+                return exits
+            finally_node = self.node("finally")
+            self.connect(exits + inner_end, finally_node)
+            final_exits = self.block(statement.finalbody, [(finally_node, None)], end)
+            if inner_end:
+                # the return/raise resumes after the finally block
+                kinds = "/".join(sorted({kind for _, kind in inner_end}))
+                for node_id, _ in final_exits:
+                    self.leave(node_id, kinds, end, kinds)
+            return final_exits if exits else []
+        if isinstance(statement, (ast.With, ast.AsyncWith)):
+            items = ", ".join(ast.unparse(item) for item in statement.items)
+            with_node = self.node(f"with {items}")
+            self.connect(preds, with_node)
+            return self.block(statement.body, [(with_node, None)], end)
+        node_id = self.node(_describe(statement))
+        self.connect(preds, node_id)
+        return [(node_id, None)]
+
+    def graph(self, name, statements, index):
+        if statements and isinstance(statements[0], ast.Expr) and isinstance(statements[0].value, ast.Constant):
+            statements = statements[1:]  # skip the docstring
+        self.lines.append(f'    subgraph g{index}["{escape_label(name)}"]')
+        start = self.node(f"start {name}", "terminal")
+        end_line = len(self.lines)
+        end = f"n{self.count + 1}"
+        self.count += 1
+        exits = self.block(statements, [(start, None)], end)
+        self.lines.insert(end_line, f'        {end}(["end {escape_label(name)}"])')
+        self.connect(exits, end)
+        self.lines.append("    end")
+
+
+def _functions(tree):
+    """Yield (qualified name, function node) for module functions and class methods."""
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node.name, node
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    yield f"{node.name}.{item.name}", item
+
+
+def python_flowchart(source):
+    """Return a Mermaid flowchart for the Python source. Raises SyntaxError for invalid Python."""
+    tree = ast.parse(source)
+    builder = _FlowBuilder()
+    index = 0
+    for name, function in _functions(tree):
+        builder.graph(name, function.body, index)
+        index += 1
+    module_code = [
+        node for node in tree.body
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Import, ast.ImportFrom))
+        and not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+    ]
+    if module_code:
+        builder.graph("module", module_code, index)
+    return "flowchart TD\n" + "\n".join(builder.lines) + "\n"
+
+
+def python_call_graph(source):
+    """Return a Mermaid call graph between the functions defined in the Python source."""
+    tree = ast.parse(source)
+    functions = dict(_functions(tree))
+    short_names = {name.split(".")[-1]: name for name in functions}
+    ids = {name: f"f{i}" for i, name in enumerate(functions)}
+    lines = [f'    {ids[name]}["{escape_label(name)}()"]' for name in functions]
+    for name, function in functions.items():
+        called = set()
+        for node in ast.walk(function):
+            if isinstance(node, ast.Call):
+                func = node.func
+                callee = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+                if callee in short_names and short_names[callee] not in called:
+                    called.add(short_names[callee])
+                    lines.append(f"    {ids[name]} --> {ids[short_names[callee]]}")
+    return "flowchart LR\n" + "\n".join(lines) + "\n"
+
+
+def same_structure(original, rewritten):
+    """True when rewritten has the same edges (by node id) as original, i.e. only labels changed."""
+    def edges(script):
+        return sorted(
+            re.sub(r"\|[^|]*\||\[.*?\]|\{.*?\}|\(\[.*?\]\)", "", line).split()
+            for line in script.splitlines() if EDGE.match(line)
+        )
+    return edges(original) == edges(rewritten)
@@ -3,8 +3,11 @@
 # requires openai version 1.39 or higher
 
 import os
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
+
+_shared_client = None
+_shared_lock = threading.Lock()
 
 class OpenAIClient:
     def __init__(self):
@@ -21,7 +24,8 @@ class OpenAIClient:
             if not self.api_key:
                 raise ValueError("API key is not set. Please check your environment variables.")
             
-            # Set the OpenAI client
+            # Set the OpenAI client (the openai package is imported on first use, it is slow to import)
+            from openai import OpenAI
             self.openai_client = OpenAI(api_key=self.api_key)
             self.validate_key()
         except ValueError as e:
@@ -36,3 +40,12 @@ class OpenAIClient:
 
     def get_client(self):
         return self.openai_client
+
+def get_shared_client():
+    # one validated client per process, created on first use. Safe to call from worker threads,
+    # so apps do not pay for the import and the key check on startup or on every Streamlit rerun
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = OpenAIClient().get_client()
+    return _shared_client
@@ -10,6 +10,8 @@ Key Features:
 - Validate the API key with OpenAI.
 - Generate text summaries using specified OpenAI models.
 - Raise custom exceptions for invalid API keys.
+- The openai package is imported when the first connector is created, so apps can read `model_choices`
+  and paint their UI without paying for the import.
 
 Dependencies:
 - os
@@ -22,7 +24,6 @@ Date: August 2024
 """
 
 import os
-import openai
 from dotenv import load_dotenv
 from openai_exceptions import InvalidAPIKeyError
 
@@ -30,6 +31,8 @@ class OpenAIConnector:
     model_choices = ['none', 'gpt-4', 'gpt-4o', 'gpt-4-turbo', 'gpt-4o-mini', 'gpt-3.5-turbo']
 
     def __init__(self, api_key_env_var='api_key'):
+        import openai
+
         load_dotenv()
         api_key = os.getenv(api_key_env_var)
         if api_key is None:
@@ -42,6 +45,8 @@ class OpenAIConnector:
             raise InvalidAPIKeyError()
 
     def _is_valid_api_key(self):
+        import openai
+
         try:
             openai.Model.list()  # Make a simple API call to check for a valid API key
             return True
@@ -51,6 +56,8 @@ class OpenAIConnector:
     def summarize_text(self, text, model="none", prompt="You are a helpful assistant."):
         if model == "none":
             raise ValueError("Select a model to continue ...")
+        import openai
+
         
         response = openai.ChatCompletion.create(
             model=model,
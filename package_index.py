@@ -0,0 +1,319 @@
+"""
+Package Index Overview:
+This module resolves the latest released version of many Python packages at once for
+`Get-latest-version-of-libraries.py`. Requirements are read from any requirements file, the index is
+queried by a bounded pool of worker threads, and every index response is cached on disk with a time to
+live, so a rerun within the TTL does not touch the network at all.
+
+Sources:
+- PyPI JSON API (default).
+- Any PEP 503 simple index, e.g. a local mirror or the stand-in in benchmarks/simple_index_server.py.
+- A wheelhouse folder of wheels and sdists, for offline use.
+
+Key Features:
+- Requirements file parsing (comments, options, extras, environment markers and version specifiers).
+- Concurrent lookups with a bounded thread pool and per-package error reporting.
+- Disk cache of index responses with a TTL.
+- Pre-releases and yanked files are ignored.
+
+Dependencies:
+- concurrent.futures
+- hashlib
+- html.parser
+- json
+- os
+- re
+- tempfile
+- threading
+- time
+- urllib
+- packaging (optional, for PEP 440 version ordering and pre-release detection)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import unquote, urljoin, urlsplit
+
+PYPI_JSON_URL = "https://pypi.org/pypi"
+REQUEST_TIMEOUT = 15
+REQUIREMENT = re.compile(
+    r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[(?P<extras>[^\]]*)\])?\s*(?P<specifier>[^;#]*?)\s*(?:;(?P<marker>[^#]*))?\s*(?:#.*)?$"
+)
+ARCHIVE_SUFFIXES = (".whl", ".tar.gz", ".zip", ".tar.bz2", ".tgz")
+# fallback without packaging: a pre-release segment right after a number of the public version
+PRERELEASE = re.compile(r"\d[._-]?(a|b|c|rc|alpha|beta|pre|preview|dev)\d*", re.IGNORECASE)
+
+
+def canonical_name(name):
+    """PEP 503 normalized project name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+@dataclass
+class Requirement:
+    name: str
+    specifier: str
+    extras: str
+    marker: str
+    line: str
+
+    @property
+    def pinned_version(self):
+        if self.specifier.startswith("==") and "," not in self.specifier:
+            return self.specifier[2:].strip()
+        return None
+
+    def with_version(self, version):
+        """The requirement line pinned to version, keeping extras and markers."""
+        extras = f"[{self.extras}]" if self.extras else ""
+        marker = f"; {self.marker}" if self.marker else ""
+        return f"{self.name}{extras}=={version}{marker}"
+
+
+def parse_requirements(lines):
+    """Parse requirement lines. Options (-r, -e, --index-url, ...), URLs and blank lines are skipped."""
+    requirements = []
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith(("#", "-")) or "://" in line.split("#")[0].split(";")[0]:
+            continue
+        match = REQUIREMENT.match(line)
+        if match:
+            requirements.append(Requirement(
+                name=match.group("name"),
+                specifier=(match.group("specifier") or "").replace(" ", ""),
+                extras=(match.group("extras") or "").strip(),
+                marker=(match.group("marker") or "").strip(),
+                line=line,
+            ))
+    return requirements
+
+
+def read_requirements(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_requirements(f)
+
+
+def version_key(version):
+    try:
+        from packaging.version import InvalidVersion, Version
+    except ImportError:
+        return tuple((0, int(part)) if part.isdigit() else (-1, part) for part in re.split(r"[.+-]", version))
+    try:
+        return (1, Version(version))
+    except InvalidVersion:
+        return (0, version)
+
+
+def is_prerelease(version):
+    """PEP 440 pre-release or development release. Local labels ("1.0+abc") do not count."""
+    try:
+        from packaging.version import InvalidVersion, Version
+    except ImportError:
+        return bool(PRERELEASE.search(version.split("+")[0]))
+    try:
+        return Version(version).is_prerelease
+    except InvalidVersion:
+        return bool(PRERELEASE.search(version.split("+")[0]))
+
+
+def latest_version(versions, include_prereleases=False):
+    candidates = [v for v in versions if include_prereleases or not is_prerelease(v)]
+    return max(candidates, key=version_key) if candidates else None
+
+
+def parse_filename(filename):
+    """(canonical project name, version) of a wheel or sdist filename or URL, or None for other files."""
+    filename = unquote(filename.split("#")[0].split("/")[-1])
+    if not filename.endswith(ARCHIVE_SUFFIXES):
+        return None
+    if filename.endswith(".whl"):
+        parts = filename[:-4].split("-")
+        project, version = parts[0], parts[1] if len(parts) > 1 else None
+    else:
+        stem = next(filename[:-len(suffix)] for suffix in ARCHIVE_SUFFIXES if filename.endswith(suffix))
+        project, _, version = stem.rpartition("-")
+    if not project or not version:
+        return None
+    return canonical_name(project), version
+
+
+def version_from_filename(filename, name):
+    """Version of a wheel or sdist filename for project name, or None for other files."""
+    parsed = parse_filename(filename)
+    if parsed is None or parsed[0] != canonical_name(name):
+        return None
+    return parsed[1]
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            attributes = dict(attrs)
+            if "href" in attributes and "data-yanked" not in attributes:
+                self.links.append(attributes["href"])
+
+
+def _fetch(url, accept=None):
+    request = urllib.request.Request(url, headers={"Accept": accept} if accept else {})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return response.read()
+
+
+class PyPIJsonSource:
+    """Release versions from the PyPI JSON API."""
+
+    def __init__(self, base_url=PYPI_JSON_URL):
+        self.base_url = base_url.rstrip("/")
+        self.key = base_url
+
+    def versions(self, name):
+        data = json.loads(_fetch(f"{self.base_url}/{canonical_name(name)}/json"))
+        return [
+            version for version, files in data["releases"].items()
+            if files and not all(file.get("yanked") for file in files)
+        ]
+
+
+class SimpleIndexSource:
+    """Versions from the file links of a PEP 503 simple index (remote, local mirror or file:// folder)."""
+
+    def __init__(self, index_url):
+        self.index_url = index_url.rstrip("/") + "/"
+        self.key = index_url
+
+    def versions(self, name):
+        url = urljoin(self.index_url, canonical_name(name) + "/")
+        if urlsplit(url).scheme == "file":
+            url += "index.html"
+        parser = _LinkParser()
+        parser.feed(_fetch(url, accept="text/html").decode("utf-8", errors="replace"))
+        return sorted({v for v in (version_from_filename(link, name) for link in parser.links) if v})
+
+
+class WheelhouseSource:
+    """Versions of the wheels and sdists in a local folder (no network)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.key = os.path.abspath(directory)
+        self._projects = None
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        # one listing of the folder, grouped by project, serves every lookup
+        projects = {}
+        for filename in os.listdir(self.directory):
+            parsed = parse_filename(filename)
+            if parsed:
+                projects.setdefault(parsed[0], set()).add(parsed[1])
+        return projects
+
+    def versions(self, name):
+        with self._lock:
+            if self._projects is None:
+                self._projects = self._scan()
+        versions = self._projects.get(canonical_name(name))
+        if not versions:
+            raise LookupError(f"{name} is not in the wheelhouse")
+        return sorted(versions)
+
+
+class IndexCache:
+    """Index responses on disk, one JSON file per (source, package), valid for ttl seconds."""
+
+    def __init__(self, cache_dir, ttl=6 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, source_key, name):
+        key = hashlib.sha256(f"{source_key}|{canonical_name(name)}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, source_key, name):
+        try:
+            with open(self._path(source_key, name), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry["versions"]
+
+    def put(self, source_key, name, versions):
+        path = self._path(source_key, name)
+        # a unique temporary file per write, threads storing the same package must not share one
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(path) + ".", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"name": name, "fetched_at": time.time(), "versions": versions}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+@dataclass
+class Resolution:
+    requirement: Requirement
+    latest: str | None
+    error: str | None
+    cached: bool
+
+    @property
+    def output_line(self):
+        """Pinned requirements move to the latest version, anything else is kept as written."""
+        if self.latest and self.requirement.pinned_version:
+            return self.requirement.with_version(self.latest)
+        return self.requirement.line
+
+
+def _lookup(requirement, source, cache, include_prereleases):
+    versions = cache.get(source.key, requirement.name) if cache else None
+    cached = versions is not None
+    if not cached:
+        versions = source.versions(requirement.name)
+        if cache:
+            cache.put(source.key, requirement.name, versions)
+    return latest_version(versions, include_prereleases), cached
+
+
+def resolve_latest(requirements, source, cache=None, max_workers=16, include_prereleases=False, on_progress=None):
+    """Look up the latest version of every requirement concurrently. Returns Resolutions in input order.
+
+    on_progress(done, total) is called from the calling thread after every lookup.
+    """
+    results = [None] * len(requirements)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_lookup, requirement, source, cache, include_prereleases): position
+            for position, requirement in enumerate(requirements)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            position = futures[future]
+            try:
+                latest, cached = future.result()
+                results[position] = Resolution(requirements[position], latest, None, cached)
+            except (urllib.error.URLError, OSError, LookupError, ValueError, KeyError) as e:
+                results[position] = Resolution(requirements[position], None, str(e), False)
+            if on_progress:
+                on_progress(done, len(requirements))
+    return results
@@ -0,0 +1,163 @@
+"""
+Page Extraction Overview:
+This module provides the extraction backends for `website-crawler.py`. Every backend turns a page's HTML
+into the same record (url, title, h1s, h2s, h3s, text) plus the list of links on the page. The lean
+backends parse the HTML once with a fast parser, drop boilerplate (script, style, nav, footer, ...) and
+store the main content as one whitespace-normalized string instead of the raw body text. Backends take the
+raw response bytes and decode them with the charset of the HTTP header, the one declared in the document
+(meta tag or XML declaration) or UTF-8, in that order.
+
+Backends:
+- "bs4": the original BeautifulSoup extraction (raw body text), kept as the baseline.
+- "lxml": lxml.html, single pass over the tree.
+- "selectolax": selectolax (Lexbor), the fastest option when installed.
+
+Dependencies:
+- codecs
+- re
+- bs4 (BeautifulSoup) for the "bs4" backend
+- lxml (optional) for the "lxml" backend
+- selectolax (optional) for the "selectolax" backend
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import codecs
+import re
+
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "nav", "footer", "aside", "form")
+HEADINGS = ("h1", "h2", "h3")
+WHITESPACE = re.compile(r"\s+")
+HEADER_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+DECLARED_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w.:-]+)|<\?xml[^>]+encoding=["']([\w.:-]+)""", re.IGNORECASE)
+
+
+def normalize_text(text):
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def header_charset(content_type):
+    """The charset parameter of a Content-Type header, or None."""
+    match = HEADER_CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def document_encoding(html, encoding=None):
+    """Encoding to decode html bytes with: the given one (HTTP header), the declared one, else UTF-8."""
+    if encoding is None:
+        match = DECLARED_CHARSET.search(html[:2048])
+        encoding = (match.group(1) or match.group(2)).decode("ascii") if match else None
+    try:
+        return codecs.lookup(encoding).name if encoding else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+
+def decode_html(html, encoding=None):
+    """html as text, bytes are decoded with document_encoding."""
+    if isinstance(html, str):
+        return html
+    return html.decode(document_encoding(html, encoding), errors="replace")
+
+
+def empty_record(url):
+    return {"url": url, "title": None, "h1s": [], "h2s": [], "h3s": [], "text": ""}
+
+
+def extract_bs4(html, url, encoding=None):
+    """Baseline: the record the crawler has always stored, with the raw body text."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(decode_html(html, encoding), "html.parser")
+    data = {
+        "url": url,
+        "title": soup.title.string if soup.title else None,
+        "h1s": [h1.text for h1 in soup.find_all("h1")],
+        "h2s": [h2.text for h2 in soup.find_all("h2")],
+        "h3s": [h3.text for h3 in soup.find_all("h3")],
+        "body": [body.text for body in soup.find_all("body")],
+    }
+    links = [a["href"] for a in soup.find_all("a", href=True)]
+    return data, links
+
+
+def extract_lxml(html, url, encoding=None):
+    import lxml.etree
+    import lxml.html
+
+    # lxml parses bytes, a str with an XML encoding declaration (XHTML) is rejected
+    if isinstance(html, str):
+        html, encoding = html.encode("utf-8"), "utf-8"
+    if not html.strip():
+        return empty_record(url), []
+    try:
+        tree = lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=document_encoding(html, encoding)))
+    except lxml.etree.ParserError:
+        # nothing but comments or whitespace
+        return empty_record(url), []
+    links = [href for href in tree.xpath("//a/@href")]
+    title = tree.findtext(".//title")
+    for element in list(tree.iter(*BOILERPLATE_TAGS)):
+        element.drop_tree()
+    headings = {tag: [] for tag in HEADINGS}
+    for element in tree.iter(*HEADINGS):
+        text = normalize_text(" ".join(element.itertext()))
+        if text:
+            headings[element.tag].append(text)
+    # lxml elements are falsy when they have no children, so test against None explicitly
+    main = next((element for element in (tree.find(".//main"), tree.find(".//article"), tree.find(".//body"))
+                 if element is not None), tree)
+    # text_content() would join adjacent blocks without a space ("</p><p>" -> "ab")
+    text = normalize_text(" ".join(main.itertext()))
+    data = {
+        "url": url,
+        "title": normalize_text(title) if title else None,
+        "h1s": headings["h1"],
+        "h2s": headings["h2"],
+        "h3s": headings["h3"],
+        "text": text,
+    }
+    return data, links
+
+
+def extract_selectolax(html, url, encoding=None):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(decode_html(html, encoding))
+    links = [node.attributes.get("href") for node in tree.css("a[href]")]
+    title = tree.css_first("title")
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+    headings = {tag: [] for tag in HEADINGS}
+    for node in tree.css(",".join(HEADINGS)):
+        text = normalize_text(node.text(separator=" "))
+        if text:
+            headings[node.tag].append(text)
+    main = tree.css_first("main") or tree.css_first("article") or tree.body
+    data = {
+        "url": url,
+        "title": normalize_text(title.text()) if title else None,
+        "h1s": headings["h1"],
+        "h2s": headings["h2"],
+        "h3s": headings["h3"],
+        "text": normalize_text(main.text(separator=" ")) if main else "",
+    }
+    return data, [link for link in links if link]
+
+
+EXTRACTORS = {
+    "bs4": extract_bs4,
+    "lxml": extract_lxml,
+    "selectolax": extract_selectolax,
+}
+
+
+def get_extractor(name):
+    """Return the extract(html, url, encoding=None) -> (record, links) function for a backend name.
+
+    html is the response body (bytes) or already decoded text, encoding the charset of the HTTP header.
+    """
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extractor '{name}', choose one of {', '.join(EXTRACTORS)}")
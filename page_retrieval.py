@@ -0,0 +1,323 @@
+"""
+Page Retrieval Overview:
+This module builds a local search index over the pages collected by `website-crawler.py`, so `ChatGPT.py`
+can ground its answers in crawled content. Records are split into overlapping word chunks, embedded with a
+hashed bag-of-words embedder (no model calls, no vocabulary to store) and written to a memory-mapped float32
+matrix. Queries are answered with one vectorized NumPy product over the matrix, or, for large corpora, by
+scanning only the closest lists of an IVF-style coarse quantizer (spherical k-means centroids).
+
+Key Features:
+- Reads crawlee dataset folders (one JSON file per record) and compressed shards (crawl_dataset.py).
+- Hashed-feature embeddings with IDF weighting.
+- Memory-mapped vectors, chunk texts stored as compressed shards.
+- Exact top-k search, optional IVF coarse quantizer with nprobe lists scanned per query.
+- Passage formatting for the chat prompt.
+
+Usage:
+    python page_retrieval.py build storage/datasets/default retrieval_index
+    python page_retrieval.py build crawl_dataset retrieval_index --lists 1024
+    python page_retrieval.py query retrieval_index "injection molding materials"
+
+Dependencies:
+- json
+- os
+- re
+- shutil
+- zlib
+- numpy
+- crawl_dataset (chunk storage and shard input)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+
+import numpy as np
+
+from crawl_dataset import MANIFEST, ShardReader, ShardWriter
+
+DIMENSIONS = 256
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+EMBED_BATCH = 4096
+KMEANS_SAMPLE = 50_000
+KMEANS_ITERATIONS = 10
+TOKEN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+CHUNKS_FOLDER = "chunks"
+
+
+class HashedEmbedder:
+    """Maps text to a fixed-size vector by hashing words into signed buckets."""
+
+    def __init__(self, dim=DIMENSIONS, stop_words=STOP_WORDS):
+        self.dim = dim
+        self.stop_words = stop_words
+        self._features = {}
+
+    def _feature(self, token):
+        feature = self._features.get(token)
+        if feature is None:
+            if len(self._features) > 2_000_000:
+                self._features.clear()
+            value = zlib.crc32(token.encode("utf-8"))
+            feature = self._features[token] = (value % self.dim, 1.0 if value & 0x80000000 else -1.0)
+        return feature
+
+    def tokens(self, text):
+        """Words of text without stop words."""
+        return [token for token in TOKEN.findall(text.lower()) if token not in self.stop_words]
+
+    def embed(self, texts):
+        """Return an (len(texts), dim) float32 matrix of L2-normalized, log-scaled term vectors."""
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in self.tokens(text):
+                col, sign = self._feature(token)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(cols, dtype=np.int64)
+        matrix = np.bincount(flat, weights=np.asarray(signs), minlength=len(texts) * self.dim)
+        matrix = matrix.reshape(len(texts), self.dim).astype(np.float32)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+def record_text(record):
+    """Page text of a crawl record, for both the lean ('text') and the original ('body') record layout."""
+    if record.get("text"):
+        return record["text"]
+    return " ".join(" ".join(body.split()) for body in record.get("body") or [])
+
+
+def chunk_text(text, words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    tokens = text.split()
+    step = max(words - overlap, 1)
+    return [" ".join(tokens[start:start + words]) for start in range(0, max(len(tokens) - overlap, 1), step)]
+
+
+def iter_records(source):
+    """Yield the records of a crawlee dataset folder or a shard folder."""
+    if os.path.exists(os.path.join(source, MANIFEST)):
+        with ShardReader(source) as reader:
+            yield from reader
+        return
+    for name in sorted(os.listdir(source)):
+        if name.endswith(".json") and not name.startswith("__"):
+            with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                yield json.load(f)
+
+
+def iter_chunks(records):
+    for record in records:
+        title = record.get("title") or ""
+        for chunk in chunk_text(record_text(record)):
+            if chunk:
+                yield {"url": record.get("url"), "title": title, "text": chunk}
+
+
+def _spherical_kmeans(vectors, lists, iterations=KMEANS_ITERATIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        # re-seed empty lists from random vectors so every list stays usable
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def build_index(chunks, directory, dim=DIMENSIONS, lists=0, batch_size=EMBED_BATCH):
+    """Embed chunk dicts ({'url', 'title', 'text'}) into an index folder. Returns the number of chunks.
+
+    lists > 0 also trains an IVF coarse quantizer with that many lists. The index is built in a sibling
+    folder and swapped in when it is complete, so a rebuild replaces the old index instead of appending to
+    its chunks, and a failed build leaves the old index in place.
+    """
+    directory = os.path.normpath(directory)
+    building, previous = directory + ".building", directory + ".previous"
+    for leftover in (building, previous):
+        shutil.rmtree(leftover, ignore_errors=True)
+    try:
+        count = _build_index(chunks, building, dim, lists, batch_size)
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(building, directory)
+    # open memory maps of the old index stay valid until they are closed
+    shutil.rmtree(previous, ignore_errors=True)
+    return count
+
+
+def _build_index(chunks, directory, dim, lists, batch_size):
+    os.makedirs(directory)
+    embedder = HashedEmbedder(dim)
+    document_frequency = np.zeros(dim, dtype=np.int64)
+    count = 0
+    with open(os.path.join(directory, VECTORS_FILE), "wb") as vectors_file, \
+            ShardWriter(os.path.join(directory, CHUNKS_FOLDER)) as chunk_writer:
+        batch = []
+
+        def flush():
+            matrix = embedder.embed([f"{chunk['title']} {chunk['text']}" for chunk in batch])
+            document_frequency[:] += np.count_nonzero(matrix, axis=0)
+            matrix.tofile(vectors_file)
+            batch.clear()
+
+        for chunk in chunks:
+            chunk_writer.write(chunk)
+            batch.append(chunk)
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    if not count:
+        raise ValueError("No page text found to index.")
+
+    # second pass: weight the stored vectors by IDF, so words common to every page neither dominate the
+    # scores nor the IVF clusters
+    idf = np.log((1 + count) / (1 + document_frequency)).astype(np.float32) + 1.0
+    np.save(os.path.join(directory, "idf.npy"), idf)
+    vectors = np.memmap(os.path.join(directory, VECTORS_FILE), dtype=np.float32, mode="r+", shape=(count, dim))
+    for start in range(0, count, 65536):
+        block = vectors[start:start + 65536] * idf
+        vectors[start:start + 65536] = block / np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+    vectors.flush()
+    meta = {"dim": dim, "count": count, "lists": 0}
+    if lists:
+        lists = min(lists, count)
+        sample = np.random.default_rng(0).choice(count, size=min(KMEANS_SAMPLE, count), replace=False)
+        centroids = _spherical_kmeans(np.asarray(vectors[np.sort(sample)]), lists)
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1) for start in range(0, count, 65536)
+        ])
+        order = np.argsort(assignment, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))]).astype(np.int64)
+        # rewrite the matrix in list order, so every list is one contiguous slice to scan
+        with open(os.path.join(directory, VECTORS_FILE + ".tmp"), "wb") as f:
+            for start in range(0, count, 65536):
+                np.asarray(vectors[order[start:start + 65536]]).tofile(f)
+        del vectors
+        os.replace(os.path.join(directory, VECTORS_FILE + ".tmp"), os.path.join(directory, VECTORS_FILE))
+        np.save(os.path.join(directory, "centroids.npy"), centroids)
+        np.save(os.path.join(directory, "ivf_order.npy"), order)
+        np.save(os.path.join(directory, "ivf_offsets.npy"), offsets)
+        meta["lists"] = lists
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return count
+
+
+class RetrievalIndex:
+    """Read-only view of an index folder built by build_index."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.lists = meta["lists"]
+        self.embedder = HashedEmbedder(self.dim)
+        self.vectors = np.memmap(os.path.join(directory, VECTORS_FILE), dtype=np.float32, mode="r",
+                                 shape=(self.count, self.dim))
+        self.idf = np.load(os.path.join(directory, "idf.npy"))
+        self.chunks = ShardReader(os.path.join(directory, CHUNKS_FOLDER))
+        if self.lists:
+            self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            self.order = np.load(os.path.join(directory, "ivf_order.npy"), mmap_mode="r")
+            self.offsets = np.load(os.path.join(directory, "ivf_offsets.npy"))
+
+    def _query_vector(self, query):
+        vector = self.embedder.embed([query])[0] * self.idf
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def search_ids(self, query, k=5, nprobe=None):
+        """Return (ids, scores) of the k best chunks. nprobe=None scans every vector (exact search)."""
+        vector = self._query_vector(query)
+        if self.lists and nprobe:
+            closest = np.argpartition(-(self.centroids @ vector), min(nprobe, self.lists) - 1)[:nprobe]
+            positions = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in closest])
+            scores = np.concatenate([self.vectors[self.offsets[c]:self.offsets[c + 1]] @ vector for c in closest])
+        else:
+            positions = None
+            scores = self.vectors @ vector
+        k = min(k, len(scores))
+        if not k:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        if positions is not None:
+            best_positions = positions[best]
+        else:
+            best_positions = best
+        # with IVF the matrix rows are stored in list order, map them back to chunk ids
+        ids = np.asarray(self.order[best_positions]) if self.lists else best_positions
+        return ids, scores[best]
+
+    def search(self, query, k=5, nprobe=None):
+        """Return the k best chunks as dicts with url, title, text and score."""
+        ids, scores = self.search_ids(query, k, nprobe)
+        return [dict(self.chunks[int(i)], score=float(score)) for i, score in zip(ids, scores) if score > 0]
+
+
+def format_passages(results, max_chars=6000):
+    """Numbered passages with their source URL, for the chat prompt."""
+    passages = []
+    used = 0
+    for number, result in enumerate(results, start=1):
+        passage = f"[{number}] {result['title']} ({result['url']})\n{result['text']}"
+        if used + len(passage) > max_chars:
+            break
+        passages.append(passage)
+        used += len(passage)
+    return "\n\n".join(passages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local retrieval index over crawled pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a crawlee dataset folder or a shard folder")
+    build.add_argument("source")
+    build.add_argument("directory")
+    build.add_argument("--dim", type=int, default=DIMENSIONS)
+    build.add_argument("--lists", type=int, default=0, help="IVF lists (0 for exact search only)")
+    query = commands.add_parser("query", help="print the best chunks for a query")
+    query.add_argument("directory")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--nprobe", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        count = build_index(iter_chunks(iter_records(args.source)), args.directory, args.dim, args.lists)
+        print(f"Indexed {count} chunks in {time.perf_counter() - started:.1f}s")
+    else:
+        index = RetrievalIndex(args.directory)
+        for result in index.search(args.text, args.k, args.nprobe):
+            print(f"{result['score']:.3f}  {result['url']}\n       {result['text'][:160]}")
+
+
+if __name__ == "__main__":
+    main()
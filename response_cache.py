@@ -0,0 +1,185 @@
+"""
+Response Cache Overview:
+This module is a semantic cache of chatbot answers. Many queries are rewordings of earlier ones ("how do I
+reverse a list in Python?", "python list reverse", "how can I reverse a python list"), which an exact-match
+cache misses. A query is reduced to its content words, stemmed ("lists", "reversing" -> "list", "revers"),
+in any order, plus the ordered word pairs around direction words ("celsius to fahrenheit" is not "fahrenheit
+to celsius"). Stored queries are embedded locally with the hashed embedder of page_retrieval.py and kept in a
+fixed-size vector matrix together with their answers. A lookup is one vectorized dot product over the matrix,
+restricted to stored queries of the same namespace (model, agent type, ...) with the same content words and
+direction pairs, so "sort a list" never returns the answer to "reverse a list". The most similar one above the
+similarity threshold returns its answer without a model call.
+
+Key Features:
+- Local, word-order insensitive matching of content-word stems, no embedding API calls.
+- Guard against different content words: only queries with the same set of stems (and direction pairs) match.
+- Queries with fewer than MIN_CONTENT_WORDS words besides question words are never cached or served, they
+  say too little ("tell me more") to be answered from another conversation.
+- Namespaces, so answers are only reused for the same model and settings.
+- Configurable cosine similarity threshold, per cache and per lookup.
+- Bounded window: at most max_entries answers, least recently used evicted first, entries expire after ttl.
+- Thread-safe, one instance can be shared across Streamlit sessions.
+- Hit/miss counters for the current process.
+
+Dependencies:
+- hashlib
+- threading
+- time
+- numpy
+- page_retrieval (HashedEmbedder)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+from page_retrieval import DIMENSIONS, STOP_WORDS, TOKEN, HashedEmbedder
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 24 * 3600
+MIN_CONTENT_WORDS = 2
+# words that phrase a question without changing what is asked
+QUERY_STOP_WORDS = STOP_WORDS | frozenset(
+    "how what which why when where who do does did can could should would i me my you your please "
+    "tell explain show give way".split()
+)
+# the words on either side of these keep their order ("celsius to fahrenheit")
+DIRECTION_WORDS = frozenset("to into from than vs versus".split())
+
+
+def stem(word):
+    """Strip a common inflection, so "lists", "reversing" and "reversed" match "list" and "reverse"."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def query_terms(query):
+    """(content word stems in query order, ordered stem pairs around direction words) of a query."""
+    words = TOKEN.findall(query.lower())
+    content = [stem(word) for word in words if word not in QUERY_STOP_WORDS]
+    pairs = [
+        (stem(left), stem(right)) for left, word, right in zip(words, words[1:], words[2:])
+        if word in DIRECTION_WORDS and left not in QUERY_STOP_WORDS and right not in QUERY_STOP_WORDS
+    ]
+    return content, pairs
+
+
+def signature(content, pairs):
+    """64 bit fingerprint of the set of content stems and direction pairs, equal for rewordings."""
+    raw = " ".join(sorted(set(content))) + "|" + " ".join(f"{left}>{right}" for left, right in sorted(set(pairs)))
+    return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class SemanticCache:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL,
+                 dim=DIMENSIONS, clock=time.time):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.embedder = HashedEmbedder(dim, stop_words=frozenset())
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._namespaces = np.full(max_entries, -1, dtype=np.int64)  # -1 marks a free slot
+        self._signatures = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._entries = [None] * max_entries
+        self._namespace_ids = {}
+        self._lock = threading.Lock()
+
+    def _prepare(self, query):
+        """(vector, signature) of a query, or None when it has too few content words to be matched."""
+        content, pairs = query_terms(query)
+        if len(content) < MIN_CONTENT_WORDS:
+            return None
+        return self.embedder.embed([" ".join(content)])[0], signature(content, pairs)
+
+    def cacheable(self, query):
+        """True when the query has enough content words to be matched against other queries."""
+        return len(query_terms(query)[0]) >= MIN_CONTENT_WORDS
+
+    def _namespace_id(self, namespace):
+        return self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+
+    def _live(self, now):
+        """Boolean mask of slots that hold an entry that has not expired."""
+        live = (self._namespaces >= 0) & (self._expires > now)
+        self._namespaces[(self._namespaces >= 0) & ~live] = -1
+        return live
+
+    def lookup(self, query, namespace="", threshold=None):
+        """Return {"query", "response", "similarity"} of the closest cached query above the threshold, or None."""
+        threshold = self.threshold if threshold is None else threshold
+        prepared = self._prepare(query)
+        if prepared is None:
+            return None
+        vector, query_signature = prepared
+        with self._lock:
+            now = self.clock()
+            # only queries with the same content words are compared, the similarity ranks among those
+            candidates = (self._live(now) & (self._namespaces == self._namespace_ids.get(namespace, -2))
+                          & (self._signatures == query_signature))
+            if candidates.any():
+                similarities = np.where(candidates, self._vectors @ vector, -1.0)
+                slot = int(np.argmax(similarities))
+                if similarities[slot] >= threshold:
+                    self._last_used[slot] = now
+                    self.hits += 1
+                    cached_query, response = self._entries[slot]
+                    return {"query": cached_query, "response": response, "similarity": float(similarities[slot])}
+            self.misses += 1
+            return None
+
+    def store(self, query, response, namespace=""):
+        """Cache response for query. A query that is already cached in the namespace is replaced."""
+        prepared = self._prepare(query)
+        if prepared is None:
+            return
+        vector, query_signature = prepared
+        with self._lock:
+            now = self.clock()
+            namespace_id = self._namespace_id(namespace)
+            live = self._live(now)
+            same = (live & (self._namespaces == namespace_id) & (self._signatures == query_signature)
+                    & (self._vectors @ vector >= 0.9999))
+            if same.any():
+                slot = int(np.argmax(same))
+            elif not live.all():
+                slot = int(np.argmin(live))
+            else:
+                slot = int(np.argmin(self._last_used))  # least recently used
+            self._vectors[slot] = vector
+            self._signatures[slot] = query_signature
+            self._namespaces[slot] = namespace_id
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._entries[slot] = (query, response)
+
+    def clear(self):
+        with self._lock:
+            self._namespaces[:] = -1
+            self._entries = [None] * self.max_entries
+
+    def __len__(self):
+        with self._lock:
+            return int(self._live(self.clock()).sum())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
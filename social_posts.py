@@ -0,0 +1,73 @@
+"""
+Social Posts Overview:
+This module holds the Claude prompt and call that write a social media post for a platform and topic. It is
+shared by `Anthropic-Post-Generator.py` and the HTTP API gateway, so both produce the same posts. It also
+reads and appends to the JSON file of saved posts.
+
+Key Features:
+- Platform-aware post prompt (length limits, hashtags, hook and call to action).
+- One call to the Anthropic messages API with any client the caller created.
+- JSON post store (a list of post objects in one file).
+
+Dependencies:
+- json
+- os
+- anthropic (the caller passes the client)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import json
+import os
+
+POST_MODEL = "claude-3-5-sonnet-20240620"
+POST_SYSTEM_PROMPT = "You are an expert in generating posts for social media"
+PLATFORMS = ["Twitter", "Instagram", "Facebook"]
+
+
+def build_post_prompt(platform, topic):
+    return f"""You are tasked with generating a social media post for a specific platform. Your goal is to create a concise, engaging post that adheres to the platform's best practices and captures the given topic.
+You will be provided with the following information:
+Social Media Platform : {platform}
+Topic : {topic}
+
+Guidelines for generating the social media post:
+1. Tailor the post to the specific social media platform, considering character limits and typical post structures.
+2. Focus on the given TOPIC, ensuring the content is relevant and informative.
+4. Include appropriate hashtags, mentions, or emojis if relevant to the platform and topic.
+5. Create a compelling hook or opening to grab the audience's attention.
+6. If applicable, include a call-to-action that encourages engagement.
+
+Your output should be the social media post only, without any additional explanation or information. Present your post within <post> tags.
+Remember to keep the post concise and tailored to the specific platform's best practices. Do not exceed character limits or include elements that are not typical for the given platform.
+        """
+
+
+def generate_post(client, platform, topic, max_tokens=1300):
+    """Generate one post with an Anthropic client. Errors from the API are raised to the caller."""
+    message = client.messages.create(
+        model=POST_MODEL,
+        system=POST_SYSTEM_PROMPT,
+        max_tokens=max_tokens,
+        messages=[
+            {"role": "user", "content": build_post_prompt(platform, topic)}
+        ]
+    )
+    return message.content[0].text
+
+
+def load_posts(path):
+    """Saved posts, oldest first. A missing file is an empty store."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def append_post(path, post):
+    """Append one post to the store. The whole file is read and rewritten."""
+    posts = load_posts(path)
+    posts.append(post)
+    with open(path, "w") as f:
+        json.dump(posts, f, indent=4)
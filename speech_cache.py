@@ -0,0 +1,113 @@
+"""
+Speech Cache Overview:
+This module keeps synthesized speech on disk, keyed by the normalized text of a segment, the voice and the
+TTS model. Text-to-Speech synthesizes one sentence per segment when the cache is enabled, so an edited text
+only pays for the sentences that actually changed. Cache hits are a file copy and return in milliseconds.
+
+Key Features:
+- Keys are a SHA-256 of (normalized text, voice, model).
+- One MP3 file per entry, the file modification time doubles as the LRU timestamp.
+- Size-bounded eviction of the least recently used entries.
+- Hit/miss counters for the current process.
+
+Dependencies:
+- os
+- hashlib
+- shutil
+- tempfile
+- threading
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+def make_speech_key(text, voice, model):
+    raw = "|".join([normalize_text(text), voice, model])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key, output_path):
+        """Copy the cached audio for key to output_path. Returns True on a hit."""
+        entry_path = self._entry_path(key)
+        try:
+            shutil.copyfile(entry_path, output_path)
+            os.utime(entry_path)  # mark as most recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, audio_path):
+        """Store a copy of audio_path under key and evict old entries if the cache is over budget."""
+        # a unique temporary file per call, two workers can store the same sentence at the same time
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix=f"{key}.", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file, open(audio_path, "rb") as audio_file:
+                shutil.copyfileobj(audio_file, tmp_file)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes. Returns the number removed."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            entries.sort(reverse=True)
+            total, removed = 0, 0
+            for _, size, path in entries:
+                total += size
+                if total > self.max_bytes:
+                    os.remove(path)
+                    removed += 1
+            return removed
+
+    def wrap(self, synthesize, model):
+        """Return a synthesize(text, voice, segment_path) function that serves and fills the cache."""
+        def cached_synthesize(text, voice, segment_path):
+            key = make_speech_key(text, voice, model)
+            if self.get(key, segment_path):
+                return segment_path
+            synthesize(text, voice, segment_path, model=model)
+            self.put(key, segment_path)
+            return segment_path
+        return cached_synthesize
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,160 @@
+"""
+Speech Synthesis Overview:
+This module splits long text at sentence boundaries and synthesizes the segments in parallel with OpenAI's
+TTS model. Each segment is streamed to its own file inside a per-request folder as the audio bytes arrive,
+and segments are handed back in text order as soon as they are ready, so playback of the first segment can
+start while the rest are still being generated. The ordered segments are finally concatenated into one MP3.
+
+Key Features:
+- Sentence-boundary splitting with a per-segment character budget, sentences over the TTS input limit
+  (4096 characters) are split at word boundaries.
+- Parallel synthesis with a bounded thread pool.
+- Streaming writes to per-request files, so concurrent users never share an output file.
+- In-order delivery of finished segments and MP3 concatenation.
+- Segment files are removed once joined, request folders older than an hour are pruned.
+
+Dependencies:
+- os
+- re
+- shutil
+- time
+- uuid
+- concurrent.futures
+- openai (imported on first synthesis)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+TTS_MODEL = "tts-1"
+MAX_SEGMENT_CHARS = 600
+MAX_INPUT_CHARS = 4096  # the TTS API rejects longer input
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+REQUEST_DIR_TTL = 3600  # seconds a request folder is kept, long enough to play back its audio
+REQUEST_DIR_NAME = re.compile(r"[0-9a-f]{32}")
+
+
+def split_long_sentence(sentence, max_chars=MAX_INPUT_CHARS):
+    """Split a sentence over max_chars at word boundaries, and a single word over max_chars anywhere."""
+    pieces, current = [], ""
+    for word in sentence.split():
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sentences(text, max_chars=MAX_INPUT_CHARS):
+    """Sentences of text, those longer than the TTS input limit split further at word boundaries."""
+    sentences = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if len(sentence) > max_chars:
+            sentences.extend(split_long_sentence(sentence, max_chars))
+        elif sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def split_into_segments(text, max_chars=MAX_SEGMENT_CHARS):
+    """Group whole sentences into segments of at most max_chars (a longer sentence becomes its own segment,
+    split at word boundaries when it is over the TTS input limit)."""
+    segments, current = [], ""
+    for sentence in split_sentences(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def new_request_dir(base_dir):
+    """Create a unique output folder for one synthesis request."""
+    request_dir = os.path.join(base_dir, uuid.uuid4().hex)
+    os.makedirs(request_dir)
+    return request_dir
+
+
+def prune_request_dirs(base_dir, max_age=REQUEST_DIR_TTL):
+    """Delete request folders under base_dir not modified for max_age seconds, other entries are left alone."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(base_dir))
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for entry in entries:
+        if not (REQUEST_DIR_NAME.fullmatch(entry.name) and entry.is_dir(follow_symlinks=False)):
+            continue
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # pruned by another session
+    return removed
+
+
+def synthesize_segment(text, voice, segment_path, model=TTS_MODEL):
+    """Stream the audio for one segment of text to segment_path as it arrives."""
+    import openai  # slow to import, so only loaded once something is synthesized
+
+    with openai.audio.speech.with_streaming_response.create(model=model, voice=voice, input=text) as response:
+        with open(segment_path, "wb") as f:
+            for chunk in response.iter_bytes(chunk_size=16 * 1024):
+                f.write(chunk)
+    return segment_path
+
+
+def synthesize_in_order(segments, voice, request_dir, max_workers=4, synthesize=synthesize_segment):
+    """
+    Synthesize all segments in parallel and yield (index, segment_path) in text order.
+
+    Each segment is yielded as soon as it and every segment before it have finished, so the caller can
+    start playing the first segment while later ones are still being generated.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(synthesize, segment, voice, os.path.join(request_dir, f"segment_{idx:04d}.mp3"))
+            for idx, segment in enumerate(segments)
+        ]
+        for idx, future in enumerate(futures):
+            yield idx, future.result()
+
+
+def concatenate_segments(segment_paths, output_path):
+    """Join MP3 segments into one file. MP3 frames are self-contained, so byte concatenation plays back in order."""
+    with open(output_path, "wb") as output:
+        for segment_path in segment_paths:
+            with open(segment_path, "rb") as segment:
+                output.write(segment.read())
+    return output_path
+
+
+def remove_segments(segment_paths):
+    """Delete segment files that are no longer needed once joined."""
+    for segment_path in segment_paths:
+        try:
+            os.remove(segment_path)
+        except FileNotFoundError:
+            pass
@@ -6,8 +6,10 @@ Users can input stock ticker symbols, set model parameters, and receive detailed
 
 Modules:
 - streamlit: For creating the web interface.
-- pandas: For handling and manipulating the stock data.
+- pandas: For handling and manipulating the stock data (imported on first analysis).
 - yfinance: For downloading historical stock data.
+- market_data: Batched downloads and a local Parquet cache of the stock data.
+- stock_analytics: Vectorized statistics for all tickers, summarized compactly for the prompt, and the prompt itself (shared with api_gateway).
 - openai_client: For interacting with OpenAI's GPT-4 model.
 - tiktoken: For token counting related to the OpenAI API.
 
@@ -18,8 +20,14 @@ Functions:
 - estimate_cost(token_count): 
     Estimates the cost of using the GPT-4 model based on the number of tokens processed, assuming a rate of $0.06 per 1000 tokens.
 
-- generate_analysis(messages, temperature, max_tokens, agent_type="Stock Analyst"): 
-    Generates an analysis of stock data by sending a prompt to the GPT-4 model. Returns the model's response or displays an error if the request fails.
+- stream_analysis(messages, temperature, max_tokens, on_delta, agent_type="Stock Analyst"):
+    Generates an analysis of stock data by streaming a prompt to the GPT-4 model, in a worker thread. Calls on_delta with each text fragment, returns the full response and raises on errors.
+
+- render_analysis(model_response, prompt, latency):
+    Renders the sections of a model response with its token count, estimated cost and latency.
+
+- run_analyses(jobs, temperature, max_tokens, max_workers):
+    Runs the analysis of every ticker concurrently, streaming each ticker's text into its own section as it arrives.
 
 - main(): 
     The main function that sets up the Streamlit application. It defines the user interface components, gathers user inputs, and manages the stock analysis workflow.
@@ -28,46 +36,114 @@ parag.jn@gmail.com
 """
 
 import streamlit as st
-import pandas as pd
-import yfinance as yf
-from openai_client import OpenAIClient
-import tiktoken
+import time
+from datetime import date
+from openai_client import get_shared_client
+from app_profiling import stage, start_rerun
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Set page config for wide mode
 st.set_page_config(layout="wide")
 
-# Initialize OpenAI Client
-openai_client_obj = OpenAIClient()
-client = openai_client_obj.get_client()
+# pandas, yfinance, tiktoken and openai are imported on first use, so the page renders before they load
+@st.cache_resource
+def get_market_data_store():
+    from market_data import MarketDataStore
+    return MarketDataStore()
+
+@st.cache_resource
+def get_encoding():
+    import tiktoken
+    return tiktoken.encoding_for_model("gpt-4")
 
 def get_token_count(text):
-    encoding = tiktoken.encoding_for_model("gpt-4")
+    encoding = get_encoding()
     return len(encoding.encode(text))
 
 def estimate_cost(token_count):
     # Assuming $0.06 per 1K tokens for GPT-4
     return (token_count / 1000) * 0.06
 
-def generate_analysis(messages, temperature, max_tokens, agent_type="Stock Analyst"):
-    try:
-        prepended_message = {
-            "Expert Analyst": "You are an expert data analyst.",
-        }.get(agent_type, "You are an expert stock market data analyst")
-
-        messages.insert(0, {"role": "system", "content": prepended_message})
-
-        response = client.chat.completions.create(
-            model='gpt-4',
-            messages=messages,
-            max_tokens=max_tokens,
-            n=1,
-            stop=None,
-            temperature=temperature,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"An unexpected error occurred: {e}")
-    return None
+def _system_message(agent_type):
+    prepended_message = {
+        "Expert Analyst": "You are an expert data analyst.",
+    }.get(agent_type, "You are an expert stock market data analyst")
+    return {"role": "system", "content": prepended_message}
+
+def stream_analysis(messages, temperature, max_tokens, on_delta, agent_type="Stock Analyst"):
+    # runs in a worker thread, so errors are raised to the caller instead of shown with st.error
+    response = get_shared_client().chat.completions.create(
+        model='gpt-4',
+        messages=[_system_message(agent_type)] + messages,
+        max_tokens=max_tokens,
+        n=1,
+        stop=None,
+        temperature=temperature,
+        stream=True,
+    )
+    fragments = []
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            fragments.append(chunk.choices[0].delta.content)
+            on_delta(chunk.choices[0].delta.content)
+    return "".join(fragments)
+
+def render_analysis(model_response, prompt, latency):
+    model_response = model_response.replace('$','INR')
+    st.markdown("**Analysis Results:**")
+
+    # Split the response into sections
+    sections = model_response.split('\n\n')
+
+    for section in sections:
+        if ':' in section:
+            title, content = section.split(':', 1)
+            st.markdown(f"**{title.strip()}**")
+            st.write(content.strip())
+        else:
+            st.write(section)
+    # Calculate and display token count and estimated cost
+    prompt_token_count = get_token_count(prompt)
+    token_count = get_token_count(model_response)
+    estimated_cost = estimate_cost(prompt_token_count + token_count)
+    st.markdown(f"<small>Prompt tokens: {prompt_token_count} | Response tokens: {token_count} | Estimated cost: ${estimated_cost:.4f} | Latency: {latency:.1f}s</small>", unsafe_allow_html=True)
+
+def run_analyses(jobs, temperature, max_tokens, max_workers):
+    """
+    jobs maps ticker -> (prompt, placeholder). Analyses run in a thread pool, the main thread polls their
+    progress and renders each ticker's streamed text into its placeholder, since Streamlit elements must be
+    written from the script thread. Returns the per-ticker latencies.
+    """
+    progress = {ticker: {"text": "", "latency": None} for ticker in jobs}
+
+    def analyze(ticker, prompt):
+        started = time.perf_counter()
+
+        def on_delta(delta):
+            progress[ticker]["text"] += delta
+
+        try:
+            return stream_analysis([{"role": "user", "content": prompt}], temperature, max_tokens, on_delta)
+        finally:
+            progress[ticker]["latency"] = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(analyze, ticker, prompt): ticker for ticker, (prompt, _) in jobs.items()}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2)
+            for ticker in (futures[future] for future in pending):
+                if progress[ticker]["text"]:
+                    jobs[ticker][1].markdown(progress[ticker]["text"] + " ▌")
+            for future in done:
+                ticker = futures[future]
+                prompt, placeholder = jobs[ticker]
+                with placeholder.container():
+                    try:
+                        render_analysis(future.result(), prompt, progress[ticker]["latency"])
+                    except Exception as e:
+                        st.error(f"An unexpected error occurred: {e}")
+    return {ticker: state["latency"] for ticker, state in progress.items()}
 
 def main():
     st.title("Stock Analysis App")
@@ -76,70 +152,57 @@ def main():
     st.sidebar.header("Model Parameters")
     max_tokens = st.sidebar.slider("Max Tokens", 300, 3000, 1500)
     temperature = st.sidebar.slider("Temperature", 0.0, 1.0, 0.7)
+    max_workers = st.sidebar.slider("Parallel analyses", 1, 10, 4)
 
     # User inputs
     tickers = st.text_input("Enter ticker symbols (comma-separated)", "AAPL,MSFT,GOOGL").split(',')
-    tickers = [ticker.strip().upper() for ticker in tickers]
+    # a ticker entered twice is analyzed once, every ticker has one section
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
 
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Start Date", pd.to_datetime("2022-01-01"))
+        start_date = st.date_input("Start Date", date(2022, 1, 1))
     with col2:
-        end_date = st.date_input("End Date", pd.to_datetime("2024-09-01"))
+        end_date = st.date_input("End Date", date(2024, 9, 1))
 
     if st.button("Analyze"):
+        # one batched download for every ticker, served from the local cache where possible
+        with st.spinner("Loading stock data ..."):
+            with stage("data load"):
+                market_data = get_market_data_store().get(tickers, start_date, end_date, interval="5d")
+
+            # all statistics for all tickers in one vectorized pass
+            with stage("statistics"):
+                from stock_analytics import build_prompt, compute_statistics, format_summary
+                statistics = compute_statistics(market_data)
+
+        # lay out a section per ticker up front, results fill in as they arrive
+        jobs = {}
         for ticker in tickers:
             st.subheader(f"Analysis for {ticker}")
 
-            data_df = yf.download(ticker, start=start_date, end=end_date, interval="5d")
-
-            if not data_df.empty:
-                # data_df = data_df.drop(['Open', 'High', 'Low'], axis=1)
-                data_df.index = pd.to_datetime(data_df.index).date
-
-                # st.write("Stock Data:")
-                # st.dataframe(data_df)
-
-                prompt = f'''I have a dataset of historical stock prices for {ticker}.
-The data is:
-{data_df.to_string()}
-The data is aggregated over a 5-day interval (weekly data) between {start_date} and {end_date}.
-Analyze this data and provide the following information:
-1. **Best months to invest**: List 2-3 specific month names that are historically best for investing, based on lowest average closing prices. Include the average closing price for each month.
-2. **Best months to sell**: List 2-3 specific month names that are historically best for selling, based on highest average closing prices. Include the average closing price for each month.
-3. **Stock trend**: In 1-2 sentences, describe the overall trend (bullish, bearish, or sideways) based on the price movement from {start_date} to {end_date}. Include the percentage change in closing price over this period.
-4. **Key statistics**: Provide the following key stats:
-   - Highest closing price (with date)
-   - Lowest closing price (with date)
-   - Average trading volume
-Limit your response strictly to these points and keep it concise.
-'''
-                messages = [{"role": "user", "content": prompt}]
-                with st.spinner("Working to build your analysis ..."):
-                    model_response = generate_analysis(messages, temperature, max_tokens)
-
-                if model_response:
-                    model_response = model_response.replace('$','INR')
-                    st.markdown("**Analysis Results:**")
-                    
-                    # Split the response into sections
-                    sections = model_response.split('\n\n')
-                    
-                    for section in sections:
-                        if ':' in section:
-                            title, content = section.split(':', 1)
-                            st.markdown(f"**{title.strip()}**")
-                            st.write(content.strip())
-                        else:
-                            st.write(section)
-                    # Calculate and display token count and estimated cost
-                    token_count = get_token_count(model_response)
-                    estimated_cost = estimate_cost(token_count)
-                    st.markdown(f"<small>Token count: {token_count} | Estimated cost: ${estimated_cost:.4f}</small>", unsafe_allow_html=True)
-                else:
-                    st.warning(f"No data available for {ticker} in the specified date range.")
+            if ticker in statistics:
+                summary = format_summary(ticker, statistics[ticker])
+                with st.expander("Computed statistics"):
+                    st.text(summary)
+
+                placeholder = st.empty()
+                placeholder.info("Working to build your analysis ...")
+                jobs[ticker] = (build_prompt(ticker, summary, start_date, end_date), placeholder)
+            else:
+                st.warning(f"No data available for {ticker} in the specified date range.")
 
             st.markdown("---")
 
+        if jobs:
+            started = time.perf_counter()
+            with stage("API call"):
+                latencies = run_analyses(jobs, temperature, max_tokens, max_workers)
+            wall_time = time.perf_counter() - started
+            serial_time = sum(latency for latency in latencies.values() if latency)
+            st.caption(f"Analyzed {len(jobs)} tickers in {wall_time:.1f}s with {max_workers} parallel analyses "
+                       f"(serial baseline: {serial_time:.1f}s, {serial_time / wall_time:.1f}x faster)")
+
 if __name__ == "__main__":
-    main()
+    with start_rerun("stock-analysis-usingGPT"):
+        main()
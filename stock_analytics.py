@@ -0,0 +1,132 @@
+"""
+Stock Analytics Overview:
+This module computes the statistics the stock analysis prompt asks for, locally and for all tickers at once
+with vectorized pandas operations. Only the compact per-ticker summary is sent to the model, which then
+writes the narrative, instead of the whole price table.
+
+Key Features:
+- Best months to buy/sell by average closing price.
+- Percentage trend over the period.
+- Highest/lowest close with dates and average volume.
+- Moving averages, annualized volatility and maximum drawdown.
+- Compact text summary per ticker and the analysis prompt built from it.
+
+Dependencies:
+- numpy
+- pandas
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+
+def wide_frame(market_data, column):
+    """Combine one column of every ticker's frame into a single date x ticker frame."""
+    frames = {
+        ticker: df[column].squeeze(axis=1) if isinstance(df[column], pd.DataFrame) else df[column]
+        for ticker, df in market_data.items()
+        if not df.empty
+    }
+    if not frames:
+        return pd.DataFrame()
+    wide = pd.concat(frames, axis=1)
+    wide.index = pd.to_datetime(wide.index)
+    return wide.sort_index()
+
+
+def compute_statistics(market_data, short_window=4, long_window=12, months=3):
+    """
+    Compute the analysis statistics for every ticker in market_data ({ticker: OHLCV DataFrame}).
+
+    Returns {ticker: dict of statistics}. Tickers without data are left out.
+    """
+    close = wide_frame(market_data, "Close")
+    if close.empty:
+        return {}
+    volume = wide_frame(market_data, "Volume")
+
+    # average close per calendar month, across all years in the range
+    monthly = close.groupby(close.index.month).mean()
+    monthly.index = [calendar.month_name[m] for m in monthly.index]
+
+    first = close.apply(lambda col: col.loc[col.first_valid_index()])
+    last = close.apply(lambda col: col.loc[col.last_valid_index()])
+    trend_pct = (last / first - 1) * 100
+
+    returns = close.pct_change(fill_method=None)
+    # annualize with the observed bar spacing (5d bars, daily bars, ...)
+    bar_days = pd.Series(close.index).diff().dt.days.median()
+    periods_per_year = 252 if not bar_days or bar_days <= 1 else 365.25 / bar_days
+    volatility_pct = returns.std() * np.sqrt(periods_per_year) * 100
+    drawdown_pct = (close / close.cummax() - 1).min() * 100
+
+    short_ma = close.rolling(short_window, min_periods=1).mean().iloc[-1]
+    long_ma = close.rolling(long_window, min_periods=1).mean().iloc[-1]
+
+    stats = {
+        "start": close.apply(lambda col: col.first_valid_index()),
+        "end": close.apply(lambda col: col.last_valid_index()),
+        "first_close": first,
+        "last_close": last,
+        "trend_pct": trend_pct,
+        "high_close": close.max(),
+        "high_date": close.idxmax(),
+        "low_close": close.min(),
+        "low_date": close.idxmin(),
+        "avg_volume": volume.mean() if not volume.empty else pd.Series(np.nan, index=close.columns),
+        "volatility_pct": volatility_pct,
+        "max_drawdown_pct": drawdown_pct,
+        "short_ma": short_ma,
+        "long_ma": long_ma,
+    }
+    result = {}
+    for ticker in close.columns:
+        ticker_stats = {name: series[ticker] for name, series in stats.items()}
+        ticker_monthly = monthly[ticker].dropna()
+        ticker_stats["best_buy_months"] = ticker_monthly.nsmallest(months).round(2).to_dict()
+        ticker_stats["best_sell_months"] = ticker_monthly.nlargest(months).round(2).to_dict()
+        ticker_stats["short_window"] = short_window
+        ticker_stats["long_window"] = long_window
+        result[ticker] = ticker_stats
+    return result
+
+
+def format_summary(ticker, stats):
+    """Render one ticker's statistics as a compact text block for the prompt."""
+    def months(values):
+        return ", ".join(f"{month} ({price:.2f})" for month, price in values.items())
+
+    return (
+        f"Ticker: {ticker}\n"
+        f"Period: {stats['start']:%Y-%m-%d} to {stats['end']:%Y-%m-%d}\n"
+        f"Lowest average close by month: {months(stats['best_buy_months'])}\n"
+        f"Highest average close by month: {months(stats['best_sell_months'])}\n"
+        f"Close: {stats['first_close']:.2f} -> {stats['last_close']:.2f} ({stats['trend_pct']:+.2f}%)\n"
+        f"Highest close: {stats['high_close']:.2f} on {stats['high_date']:%Y-%m-%d}\n"
+        f"Lowest close: {stats['low_close']:.2f} on {stats['low_date']:%Y-%m-%d}\n"
+        f"Average volume: {stats['avg_volume']:,.0f}\n"
+        f"Moving averages: {stats['short_window']}-bar {stats['short_ma']:.2f}, {stats['long_window']}-bar {stats['long_ma']:.2f}\n"
+        f"Annualized volatility: {stats['volatility_pct']:.1f}%\n"
+        f"Maximum drawdown: {stats['max_drawdown_pct']:.1f}%"
+    )
+
+
+def build_prompt(ticker, summary, start_date, end_date):
+    """The analysis prompt for one ticker. The model only writes the narrative around the computed statistics."""
+    return f'''These statistics were computed from weekly (5-day interval) historical stock prices for {ticker} between {start_date} and {end_date}:
+{summary}
+Using only these statistics, provide the following information:
+1. **Best months to invest**: The 2-3 month names with the lowest average closing prices, with the average closing price for each month.
+2. **Best months to sell**: The 2-3 month names with the highest average closing prices, with the average closing price for each month.
+3. **Stock trend**: In 1-2 sentences, describe the overall trend (bullish, bearish, or sideways) from {start_date} to {end_date}, including the percentage change in closing price, volatility and drawdown.
+4. **Key statistics**: Provide the following key stats:
+   - Highest closing price (with date)
+   - Lowest closing price (with date)
+   - Average trading volume
+Limit your response strictly to these points and keep it concise.
+'''
@@ -0,0 +1,108 @@
+"""
+Summary Batch Overview:
+This module summarizes many PDF documents at once for the batch mode of `Content-summarizer.py`. Documents are
+queued into a bounded pool of worker threads (the job runner of image_batch.py, with retries), each worker
+extracts the text of one document and summarizes it, and results are yielded in completion order so the app
+can show every summary as soon as it is done. The finished summaries are then written in bulk to one zip
+archive with a DOCX and/or PPTX file per document and a combined file with all of them.
+
+Key Features:
+- Bounded concurrency, per-document retries with backoff, completion-order results.
+- Per-document timings and extracted text size.
+- Throughput statistics (documents per minute, speed-up over summarizing one document at a time).
+- Bulk DOCX/PPTX output in a zip archive built in memory.
+
+Dependencies:
+- io
+- time
+- zipfile
+- document_summary (text extraction, prompt, DOCX/PPTX writers)
+- image_batch (bounded job runner with retries)
+
+Author: parag.jn@gmail.com
+Date: August 2024
+"""
+
+import io
+import time
+import zipfile
+
+from document_summary import SUMMARY_PROMPT, extract_pdf_text, write_docx, write_pptx
+from image_batch import run_batch
+
+OUTPUT_FORMATS = {"DOCX": (".docx", write_docx), "PPTX": (".pptx", write_pptx)}
+
+
+def summarize_document(summarize_text, file, model, num_pages):
+    """Extract and summarize one PDF. Returns {"summary", "characters", "seconds"}."""
+    started = time.perf_counter()
+    text = extract_pdf_text(file, num_pages)
+    summary = summarize_text(text, model, SUMMARY_PROMPT).replace('$', 'USD')
+    return {"summary": summary, "characters": len(text), "seconds": time.perf_counter() - started}
+
+
+def run_summary_batch(documents, summarize, max_workers=4, retries=1, backoff=1.0):
+    """
+    Run summarize(file) for every (name, file) in documents with at most max_workers in flight.
+
+    Yields (name, result, error) in completion order. error is None on success, otherwise the
+    exception raised by the last attempt and result is None.
+    """
+    jobs = [{"name": name, "file": file} for name, file in documents]
+    for job, result, error, _ in run_batch(jobs, lambda job: summarize(job["file"]), max_workers, retries, backoff):
+        yield job["name"], result, error
+
+
+def bulk_outputs(summaries, formats=("DOCX",)):
+    """
+    Zip archive (bytes) of the (name, summary) pairs, names without extension: a <name>-summary file per
+    document and format, and an all-summaries file per format with one heading or slide per document.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for output_format in formats:
+            extension, write = OUTPUT_FORMATS[output_format]
+            for name, summary in summaries:
+                archive.writestr(f"{name}-summary{extension}", write([(None, summary)], io.BytesIO()).getvalue())
+            archive.writestr(f"all-summaries{extension}", write(summaries, io.BytesIO(), title="Document Summaries").getvalue())
+    return buffer.getvalue()
+
+
+class SummaryBatchStats:
+    """Collects counts, text size and throughput for one batch run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.characters = 0
+        self.document_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def record(self, result, error):
+        if error is None:
+            self.completed += 1
+            self.characters += result["characters"]
+            self.document_seconds += result["seconds"]
+        else:
+            self.failed += 1
+
+    @property
+    def done(self):
+        return self.completed + self.failed
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def documents_per_minute(self):
+        return self.completed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def summary(self):
+        speedup = self.document_seconds / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.completed}/{self.total} documents in {self.elapsed:.1f}s "
+            f"({self.documents_per_minute:.1f} documents/minute, {self.characters / 1000:.0f}k characters), "
+            f"{self.failed} failed. One at a time: {self.document_seconds:.1f}s ({speedup:.1f}x faster)"
+        )
@@ -6,8 +6,26 @@
 
 import streamlit as st
 from pathlib import Path
-import openai
 from dotenv import load_dotenv
+from speech_synthesis import (
+    TTS_MODEL, concatenate_segments, new_request_dir, prune_request_dirs, remove_segments, split_into_segments,
+    split_sentences, synthesize_in_order, synthesize_segment,
+)
+from speech_cache import SpeechCache
+from app_profiling import stage, start_rerun
+
+# every request gets its own folder under here, so concurrent users never overwrite each other
+SPEECH_DIR = Path(__file__).parent / "speech"
+SPEECH_CACHE_DIR = SPEECH_DIR / "cache"
+
+@st.cache_resource
+def prune_old_speech():
+    # once per server start, folders left over from earlier runs are removed
+    return prune_request_dirs(SPEECH_DIR)
+
+@st.cache_resource
+def get_speech_cache():
+    return SpeechCache(str(SPEECH_CACHE_DIR))
 
 st.set_page_config(
     page_title="Open Ai - Chatbot",
@@ -22,33 +40,63 @@ st.set_page_config(
 # Load environment variables from .env file
 load_dotenv()
 
-def generate_speech(text,voice="alloy"):
-    # speech_file_path = Path('speech.mp3')
-    # Create speech using OpenAI's API (Assuming api features are correct)
-    speech_file_path = Path(__file__).parent / "speech.mp3"
-    response = openai.audio.speech.create(
-        model="tts-1",
-        voice=voice,
-        input=text  # Use the text provided by the user
-    )
-    # Save the response audio to a file
-    with open(speech_file_path, 'wb') as f:
-        f.write(response.content)
-        return speech_file_path
+def generate_speech(text,voice="alloy",on_segment=None,cache=None):
+    # Long text is split at sentence boundaries and the segments are synthesized in parallel.
+    # on_segment(index, total, path) is called for each segment in order as soon as it is ready.
+    # With a cache every sentence is its own segment, so edited texts only synthesize changed sentences.
+    if cache is not None:
+        segments = split_sentences(text)
+        synthesize = cache.wrap(synthesize_segment, TTS_MODEL)
+    else:
+        segments = split_into_segments(text)
+        synthesize = synthesize_segment
+    if not segments:
+        return None
+    # request folders are kept for an hour so their audio can be played back, older ones are removed
+    prune_request_dirs(SPEECH_DIR)
+    request_dir = new_request_dir(SPEECH_DIR)
+    segment_paths = []
+    for idx, segment_path in synthesize_in_order(segments, voice, request_dir, synthesize=synthesize):
+        segment_paths.append(segment_path)
+        if on_segment:
+            on_segment(idx, len(segments), segment_path)
+    # Join the segments into a single file for the request, the segments are not needed after that
+    speech_file = concatenate_segments(segment_paths, Path(request_dir) / "speech.mp3")
+    remove_segments(segment_paths)
+    return speech_file
 
 def main():
+    prune_old_speech()
     st.title("Text to Speech Converter")
 
     voices = ['alloy', 'echo', 'fable', 'onyx', 'nova','shimmer']
     with st.sidebar:
         selected_voice = st.radio("Select the voice to generate speech",options=voices,index=1)
+        use_cache = st.checkbox("Reuse previously generated sentences (cache)", value=True)
+    cache = get_speech_cache() if use_cache else None
   
     # User input
     user_input = st.text_area("Enter text you want converted to speech:", "The quick brown fox jumped over the lazy dog.")
     if st.button("Generate Speech"):
-        speech_file = generate_speech(user_input,selected_voice)
+        status = st.empty()
+
+        def play_segment(idx, total, segment_path):
+            status.info(f"Generated segment {idx + 1} of {total} ...")
+            if idx == 0 and total > 1:
+                # start playing the first segment while the rest are still being generated
+                st.audio(str(segment_path), format='audio/mp3', start_time=0, autoplay=True)
+
+        with stage("API call"):
+            speech_file = generate_speech(user_input,selected_voice,on_segment=play_segment,cache=cache)
+        status.empty()
         if speech_file:
             st.audio(str(speech_file), format='audio/mp3', start_time=0)
+            if cache is not None:
+                cache_stats = cache.stats()
+                st.caption(f"Speech cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
+        else:
+            st.warning("Please enter some text to convert.")
 
 if __name__ == "__main__":
-    main()
+    with start_rerun("text-to-speech"):
+        main()
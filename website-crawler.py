@@ -1,7 +1,32 @@
+import argparse
 import asyncio
+import time
 from datetime import timedelta
+from urllib.parse import urlsplit
 
+from crawlee import ConcurrencySettings, Request
+from crawlee import service_container
+from crawlee.configuration import Configuration
+from crawlee.memory_storage_client import MemoryStorageClient
 from crawlee.beautifulsoup_crawler import BeautifulSoupCrawler, BeautifulSoupCrawlingContext
+from crawlee.http_crawler import HttpCrawler, HttpCrawlingContext
+
+from crawl_dataset import ShardWriter
+from crawl_frontier import BloomFilter, CrawlScope, PoliteHttpClient, RobotsRules, normalize_url
+from crawl_state import CrawlState, content_hash
+from page_extract import EXTRACTORS, get_extractor, header_charset
+
+
+def extract_page_data(context: BeautifulSoupCrawlingContext) -> dict:
+    # Extract data from the page.
+    return {
+        'url': context.request.url,
+        'title': context.soup.title.string if context.soup.title else None,
+        'h1s': [h1.text for h1 in context.soup.find_all('h1')],
+        'h2s': [h2.text for h2 in context.soup.find_all('h2')],
+        'h3s': [h3.text for h3 in context.soup.find_all('h3')],
+        'body': [body.text for body in context.soup.find_all('body')],
+    }
 
 
 async def main() -> None:
@@ -26,15 +51,7 @@ async def main() -> None:
     async def request_handler(context: BeautifulSoupCrawlingContext) -> None:
         context.log.info(f'Processing {context.request.url} ...')
 
-        # Extract data from the page.
-        data = {
-            'url': context.request.url,
-            'title': context.soup.title.string if context.soup.title else None,
-            'h1s': [h1.text for h1 in context.soup.find_all('h1')],
-            'h2s': [h2.text for h2 in context.soup.find_all('h2')],
-            'h3s': [h3.text for h3 in context.soup.find_all('h3')],
-            'body': [body.text for body in context.soup.find_all('body')],
-        }
+        data = extract_page_data(context)
 
         # Push the extracted data to the default dataset. In local configuration,
         # the data will be stored as JSON files in ./storage/datasets/default.
@@ -44,5 +61,177 @@ async def main() -> None:
     await crawler.run(['https://www.aupl.info'])
 
 
+def build_production_crawler(
+    start_urls: list[str],
+    max_requests: int | None = None,
+    max_concurrency: int = 50,
+    per_domain_concurrency: int = 4,
+    delay: float = 0.0,
+    respect_robots: bool = True,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    max_depth: int | None = None,
+    seen_capacity: int = 1_000_000,
+    push_data: bool = True,
+    extractor: str = 'lxml',
+    state: CrawlState | None = None,
+    sink: ShardWriter | None = None,
+) -> tuple[HttpCrawler | BeautifulSoupCrawler, BloomFilter]:
+    # Production crawl: discovered links are enqueued within the scope rules, seen URLs are
+    # remembered in a fixed-size Bloom filter and every domain is fetched politely.
+    # This crawl is not memory-bounded: the Bloom filter only fixes the cost of deduplication,
+    # crawlee's request queue keeps every enqueued request in memory and grows with the frontier.
+    # With a CrawlState the crawl is incremental: pages unchanged since the previous run are
+    # neither processed nor pushed again. With a ShardWriter sink records go into compressed
+    # shards instead of the crawlee dataset.
+    robots = RobotsRules() if respect_robots else None
+    seen = BloomFilter(capacity=seen_capacity)
+    scope = CrawlScope(
+        allowed_domains=[urlsplit(url).hostname for url in start_urls],
+        include=include,
+        exclude=exclude,
+        max_depth=max_depth,
+    )
+    # The bs4 extractor keeps the original BeautifulSoup record. The lean extractors parse the raw
+    # response once themselves, so a plain HttpCrawler is enough and no soup is built.
+    crawler_class = BeautifulSoupCrawler if extractor == 'bs4' else HttpCrawler
+    extract = get_extractor(extractor)
+    crawler = crawler_class(
+        max_request_retries=1,
+        request_handler_timeout=timedelta(seconds=30),
+        max_requests_per_crawl=max_requests,
+        concurrency_settings=ConcurrencySettings(
+            min_concurrency=min(max_concurrency, per_domain_concurrency),
+            desired_concurrency=max_concurrency,
+            max_concurrency=max_concurrency,
+        ),
+        http_client=PoliteHttpClient(per_domain_concurrency=per_domain_concurrency, delay=delay, robots=robots,
+                                     state=state),
+        configure_logging=False,
+    )
+
+    @crawler.router.default_handler
+    async def request_handler(context: HttpCrawlingContext | BeautifulSoupCrawlingContext) -> None:
+        url = context.request.url
+        response = context.http_response
+        previous = state.get(url) if state is not None else None
+        if previous is not None and response.status_code == 304:
+            state.stats.record_not_modified(previous, context.request.user_data.get('fetch_seconds', 0.0))
+            state.touch(url, response.headers.get('etag'), response.headers.get('last-modified'))
+            links = previous['links']
+        else:
+            body = response.read()
+            digest = content_hash(body) if state is not None else None
+            if previous is not None and previous['content_hash'] == digest:
+                state.stats.record_same_content(previous)
+                state.touch(url, response.headers.get('etag'), response.headers.get('last-modified'))
+                links = previous['links']
+            else:
+                started = time.perf_counter()
+                if extractor == 'bs4':
+                    data = extract_page_data(context)
+                    links = [link['href'] for link in context.soup.find_all('a', href=True)]
+                else:
+                    data, links = extract(body, url, header_charset(response.headers.get('content-type')))
+                if sink is not None:
+                    sink.write(data)
+                elif push_data:
+                    await context.push_data(data)
+                if state is not None:
+                    state.stats.record_fetched(previous)
+                    state.record(
+                        url,
+                        response.headers.get('etag'),
+                        response.headers.get('last-modified'),
+                        digest,
+                        len(body),
+                        context.request.user_data.get('fetch_seconds', 0.0),
+                        time.perf_counter() - started,
+                        links,
+                    )
+
+        # Enqueue the in-scope links we have not seen yet.
+        depth = context.request.user_data.get('depth', 0) + 1
+        base_url = context.request.loaded_url or context.request.url
+        new_requests = []
+        for link in links:
+            url = normalize_url(link, base_url)
+            if not url or not scope.allows(url, depth) or not seen.add(url):
+                continue
+            if robots is not None and not await robots.allowed(url):
+                continue
+            new_requests.append(Request.from_url(url, user_data={'depth': depth}))
+        if new_requests:
+            await context.add_requests(new_requests)
+
+    for url in start_urls:
+        seen.add(normalize_url(url))
+    return crawler, seen
+
+
+async def run_production(args: argparse.Namespace) -> None:
+    state = CrawlState(args.state_file) if args.incremental else None
+    sink = None
+    if args.output == 'shards':
+        sink = ShardWriter(args.output_dir)
+        # keep the request queue in memory too, so no per-request JSON files are written
+        service_container.set_local_storage_client(
+            MemoryStorageClient(Configuration(persist_storage=False, write_metadata=False))
+        )
+    crawler, seen = build_production_crawler(
+        args.urls,
+        max_requests=args.max_requests,
+        max_concurrency=args.max_concurrency,
+        per_domain_concurrency=args.per_domain_concurrency,
+        delay=args.delay,
+        respect_robots=not args.ignore_robots,
+        include=args.include,
+        exclude=args.exclude,
+        max_depth=args.max_depth,
+        seen_capacity=args.seen_capacity,
+        extractor=args.extractor,
+        state=state,
+        sink=sink,
+    )
+    await crawler.run([normalize_url(url) for url in args.urls])
+    if sink is not None:
+        sink.close()
+        print(f'Records written to {args.output_dir} ({sum(shard["records"] for shard in sink.shards)} in total)')
+    print(f'Seen {seen.count} URLs using {seen.memory_bytes / (1024 * 1024):.1f} MB for deduplication')
+    if state is not None:
+        state.close()
+        print(f'Incremental crawl: {state.stats.summary()}')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Crawl websites with crawlee and BeautifulSoup.')
+    parser.add_argument('--mode', choices=['demo', 'production'], default='demo',
+                        help='demo crawls 10 pages of the example site, production follows links')
+    parser.add_argument('--urls', nargs='+', default=['https://www.aupl.info'], help='start URLs (production mode)')
+    parser.add_argument('--max-requests', type=int, default=None, help='stop after this many pages')
+    parser.add_argument('--max-concurrency', type=int, default=50, help='global concurrent requests')
+    parser.add_argument('--per-domain-concurrency', type=int, default=4, help='concurrent requests per domain')
+    parser.add_argument('--delay', type=float, default=0.0, help='minimum seconds between requests to a domain')
+    parser.add_argument('--ignore-robots', action='store_true', help='do not check robots.txt')
+    parser.add_argument('--include', nargs='*', help='only enqueue URLs matching one of these regexes')
+    parser.add_argument('--exclude', nargs='*', help='never enqueue URLs matching one of these regexes')
+    parser.add_argument('--max-depth', type=int, default=None, help='maximum link depth from the start URLs')
+    parser.add_argument('--seen-capacity', type=int, default=1_000_000,
+                        help='expected number of URLs, sizes the fixed-memory seen-URL filter')
+    parser.add_argument('--extractor', choices=list(EXTRACTORS), default='lxml',
+                        help='page extraction backend (production mode), bs4 is the original full-body extraction')
+    parser.add_argument('--incremental', action='store_true',
+                        help='send conditional requests and skip pages unchanged since the previous run')
+    parser.add_argument('--state-file', default='crawl_state.db', help='per-URL state kept between incremental runs')
+    parser.add_argument('--output', choices=['dataset', 'shards'], default='dataset',
+                        help='dataset writes one JSON file per page (crawlee), shards writes compressed JSONL shards')
+    parser.add_argument('--output-dir', default='crawl_dataset', help='folder of the shards (--output shards)')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.mode == 'production':
+        asyncio.run(run_production(args))
+    else:
+        asyncio.run(main())